@@ -4,24 +4,46 @@
 - pykrx: KOSPI/KOSDAQ 전종목 시세
 - 상한가/하한가/급등락/크로스 분석
 - Claude API: 네이버금융 뉴스 → 사유 요약
+- 경제일정: econ_calendar (ForexFactory, 변경분만 기록)
+- 관심종목 알림: watchlist (구독자별 digest)
 - gspread: Google Sheets에 기록
+  (스크린 행은 사유 없이 먼저 기록 → 사유 작업 큐(reason_queue)가 분석 후 사유 칸을 채움)
 """
 
 import os
 import sys
 import time
 import logging
+import argparse
 from datetime import datetime, timedelta
 from typing import Optional
 from pathlib import Path
 
-import requests
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 import gspread
 from google.oauth2.service_account import Credentials
 from pykrx import stock
-import anthropic
+import pandas as pd
+
+from ma_state import MAState, MA_STATE_DIR
+from screens import (
+    load_screens, load_thresholds, snapshot_frame, run_screens, to_records,
+    build_rows, reason_items, reason_tabs,
+)
+from sinks import build_sinks, ensure_headers
+from sectors import (
+    SECTOR_HEADERS, load_sector_map, sector_summary, sector_rows, group_reason_items,
+)
+from streaks import StreakIndex, STREAK_PATH, STREAK_HEADERS, streak_rows
+from checkpoints import RunCheckpoint, prune_runs
+from reason_queue import ReasonQueue, REASON_QUEUE_PATH, item_codes
+import reason_queue
+from econ_calendar import CALENDAR_HEADERS, refresh as refresh_calendar
+from watchlist import load_index as load_watchlists, screen_hits, notify as notify_watchlists
+from reason_engine import ReasonEngine
+from profiling import StageProfiler, profile_dir
+import krx
+from krx import Fetched, KRXError, KRX_RETRIES
 
 # ---------------------------------------------------------------------------
 # Setup
@@ -42,17 +64,35 @@ ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 GOOGLE_SHEETS_ID = os.getenv("GOOGLE_SHEETS_ID", "")
 CREDENTIALS_FILE = Path(__file__).parent / "credentials.json"
 
-# Thresholds
-LIMIT_UP_PCT = 29.5   # 상한가 (가격제한폭 30%)
-LIMIT_DOWN_PCT = -29.5  # 하한가
-SURGE_PCT = 5.0        # 급등락 기준
+# Thresholds (screens.json에서 관리, 스크린 정의도 같은 파일)
+_THRESHOLDS = load_thresholds()
+LIMIT_UP_PCT = _THRESHOLDS["limit_up"]      # 상한가 (가격제한폭 30%)
+LIMIT_DOWN_PCT = _THRESHOLDS["limit_down"]  # 하한가
+SURGE_PCT = _THRESHOLDS["surge"]            # 급등락 기준
 MA_SHORT = 5           # 단기 이동평균
 MA_LONG = 20           # 장기 이동평균
 MA_LOOKBACK = 60       # 크로스 감지용 조회일수
-
-NAVER_FINANCE_NEWS_URL = "https://finance.naver.com/item/news_news.naver?code={code}&page=1"
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+# 크로스 분석 시간 제한 (초, 0 = 제한 없음). --time-budget으로 덮어씀
+CROSS_TIME_BUDGET = float(os.getenv("CROSS_TIME_BUDGET", "0"))
+# AI 사유 분석을 업종 단위로 묶을지 (--group-reasons)
+REASONS_BY_SECTOR = os.getenv("REASONS_BY_SECTOR", "0") == "1"
+# 기록 직후 사유 작업 큐를 처리할 시간 (초, 0 = 큐가 빌 때까지). 남은 작업은 다음 워커 실행에서
+REASON_DRAIN_BUDGET = float(os.getenv("REASON_DRAIN_BUDGET", "600"))
+# 체크포인트 단계 (runs/YYYYMMDD/, 재실행 시 첫 미완료 단계부터)
+STAGES = ["snapshot", "crosses", "screens", "write", "alerts", "reasons"]
+
+# 프로세스 수명 동안 재사용하는 참조 데이터 / 사유 엔진 (daemon 모드에서 실행 간 유지)
+_ticker_names: dict[str, str] = {}
+REASON_ENGINE = ReasonEngine("KR")
+
+
+# 탭별 헤더 (Sheets / SQLite 공통, 스크린 탭은 screens.json 컬럼)
+TAB_HEADERS = {
+    **{screen.tab: screen.columns for screen in load_screens("KR")},
+    "크로스": ["날짜", "종목코드", "종목명", "시장", "유형", "단기MA", "장기MA", "종가"],
+    "연속": STREAK_HEADERS,
+    "업종": SECTOR_HEADERS,
+    "경제일정": CALENDAR_HEADERS,
 }
 
 
@@ -71,21 +111,14 @@ def connect_sheets() -> gspread.Spreadsheet:
 
 
 def ensure_worksheets(spreadsheet: gspread.Spreadsheet) -> dict[str, gspread.Worksheet]:
-    """5개 탭이 존재하는지 확인하고 없으면 생성"""
-    tab_headers = {
-        "상한가": ["날짜", "종목코드", "종목명", "시장", "종가", "등락률(%)", "거래량", "사유"],
-        "하한가": ["날짜", "종목코드", "종목명", "시장", "종가", "등락률(%)", "거래량", "사유"],
-        "급등락": ["날짜", "종목코드", "종목명", "시장", "종가", "등락률(%)", "방향", "거래량", "사유"],
-        "크로스": ["날짜", "종목코드", "종목명", "시장", "유형", "단기MA", "장기MA", "종가"],
-        "경제일정": ["날짜", "이벤트명", "중요도", "예상영향", "출처URL"],
-    }
-
+    """탭이 존재하는지 확인하고 없으면 생성 (컬럼이 추가된 탭은 헤더 갱신)"""
     existing = {ws.title: ws for ws in spreadsheet.worksheets()}
     worksheets = {}
 
-    for tab_name, headers in tab_headers.items():
+    for tab_name, headers in TAB_HEADERS.items():
         if tab_name in existing:
             worksheets[tab_name] = existing[tab_name]
+            ensure_headers(existing[tab_name], headers)
         else:
             ws = spreadsheet.add_worksheet(title=tab_name, rows=1000, cols=len(headers))
             ws.update("A1", [headers])
@@ -100,6 +133,19 @@ def ensure_worksheets(spreadsheet: gspread.Spreadsheet) -> dict[str, gspread.Wor
 # ---------------------------------------------------------------------------
 # 시세 데이터 수집
 # ---------------------------------------------------------------------------
+def get_ticker_name(ticker: str) -> str:
+    """종목명 조회 (프로세스 내 캐시, 조회 실패 시 종목코드 반환 — 캐시하지 않음)"""
+    name = _ticker_names.get(ticker)
+    if name is None:
+        try:
+            name = krx.call(stock.get_market_ticker_name, ticker, what=f"{ticker} 종목명")
+        except KRXError as e:
+            log.warning(f"종목명 조회 실패: {e}")
+            return ticker
+        _ticker_names[ticker] = name
+    return name
+
+
 def get_trading_date() -> str:
     """가장 최근 거래일 반환 (YYYYMMDD)"""
     today = datetime.now()
@@ -111,331 +157,534 @@ def get_trading_date() -> str:
     return today.strftime("%Y%m%d")
 
 
-def fetch_market_data(date: str, market: str) -> dict:
+def fetch_market_data(date: str, market: str) -> Fetched:
     """
-    pykrx로 전종목 OHLCV + 등락률 수집
-    Returns: {ticker: {종목명, 시가, 고가, 저가, 종가, 거래량, 등락률}}
+    pykrx로 전종목 OHLCV + 등락률 수집 (krx.market_ohlcv: 재시도 + 휴장일/실패 구분)
+    Returns: Fetched — data는 종목코드 index, 컬럼 [시가, 고가, 저가, 종가, 거래량, 거래대금, 등락률, 시장]
+             (거래정지 종목 제외, 휴장일/실패면 빈 DataFrame)
     """
     log.info(f"{market} {date} 시세 수집 중...")
-    try:
-        df = stock.get_market_ohlcv_by_ticker(date, market=market)
-        if df.empty:
-            log.warning(f"{market} 데이터 없음 (공휴일/비거래일?)")
-            return {}
+    fetched = krx.market_ohlcv(date, market)
+    if fetched.failed:
+        log.error(f"{market} 시세 수집 실패: {fetched.error}")
+        return Fetched(Fetched.FAILED, snapshot_frame(None, market), fetched.error)
+    if fetched.empty:
+        log.warning(f"{market} 데이터 없음 (휴장일)")
+        return Fetched(Fetched.EMPTY, snapshot_frame(None, market))
 
-        # 등락률은 별도로 가져오기
-        df_chg = stock.get_market_ohlcv_by_ticker(date, market=market)
+    result = snapshot_frame(fetched.data, market)
+    log.info(f"{market}: {len(result)}개 종목 수집 완료")
+    return Fetched(Fetched.OK, result)
 
-        result = {}
-        for ticker in df.index:
-            name = stock.get_market_ticker_name(ticker)
-            close = int(df.loc[ticker, "종가"])
-            volume = int(df.loc[ticker, "거래량"])
-            change_pct = float(df.loc[ticker, "등락률"])
 
-            if close == 0 or volume == 0:
-                continue
-
-            result[ticker] = {
-                "종목명": name,
-                "종가": close,
-                "거래량": volume,
-                "등락률": round(change_pct, 2),
-            }
-
-        log.info(f"{market}: {len(result)}개 종목 수집 완료")
-        return result
-    except Exception as e:
-        log.error(f"{market} 시세 수집 실패: {e}")
-        return {}
+def ma_frame(markets: list[str]) -> pd.DataFrame:
+    """저장된 MA 상태 → 종목별 단기MA/장기MA (스크린 조건용)"""
+    frames = []
+    for market in markets:
+        state = MAState.load(MA_STATE_DIR / f"ma_{market}.npz", MA_SHORT, MA_LONG)
+        frames.append(pd.DataFrame({"단기MA": state.ma_s, "장기MA": state.ma_l}, index=state.codes))
+    return pd.concat(frames) if frames else pd.DataFrame(columns=["단기MA", "장기MA"])
 
 
 # ---------------------------------------------------------------------------
-# 필터링
+# 크로스
 # ---------------------------------------------------------------------------
-def filter_limit_up(data: dict, market: str) -> list[dict]:
-    """상한가 종목 필터"""
-    return [
-        {"종목코드": t, "종목명": d["종목명"], "시장": market,
-         "종가": d["종가"], "등락률(%)": d["등락률"], "거래량": d["거래량"]}
-        for t, d in data.items()
-        if d["등락률"] >= LIMIT_UP_PCT
-    ]
+def previous_trading_date(date: str) -> Optional[str]:
+    """date 직전 거래일 (YYYYMMDD). 조회 실패 시 None"""
+    end_dt = datetime.strptime(date, "%Y%m%d")
+    start_str = (end_dt - timedelta(days=14)).strftime("%Y%m%d")
+    try:
+        days = krx.business_days(start_str, date)
+    except KRXError as e:
+        log.warning(f"거래일 조회 실패: {e}")
+        return None
+    earlier = [d for d in days if d < date]
+    return max(earlier) if earlier else None
 
 
-def filter_limit_down(data: dict, market: str) -> list[dict]:
-    """하한가 종목 필터"""
-    return [
-        {"종목코드": t, "종목명": d["종목명"], "시장": market,
-         "종가": d["종가"], "등락률(%)": d["등락률"], "거래량": d["거래량"]}
-        for t, d in data.items()
-        if d["등락률"] <= LIMIT_DOWN_PCT
-    ]
+def fetch_close_history(ticker: str, start_str: str, date: str,
+                        retries: int = KRX_RETRIES) -> tuple[list[float], Optional[float]]:
+    """
+    종목 일봉 종가 조회 (거래정지일 제외)
+    Returns: (date 이전 종가 목록(오래된 순), date 당일 종가 또는 None)
+    Raises: KRXError (재시도 후에도 실패)
+    """
+    df = krx.ticker_ohlcv(start_str, date, ticker, retries=retries)
+    df = df[df["거래량"] > 0]
+    day = datetime.strptime(date, "%Y%m%d")
+    history = [float(v) for v in df.loc[df.index < day, "종가"]]
+    today = df.loc[df.index == day, "종가"]
+    return history, (float(today.iloc[0]) if len(today) else None)
 
 
-def filter_surge(data: dict, market: str) -> list[dict]:
-    """급등락 종목 필터 (|등락률| >= 5%)"""
-    results = []
-    for t, d in data.items():
-        pct = d["등락률"]
-        if abs(pct) >= SURGE_PCT:
-            direction = "급등" if pct > 0 else "급락"
-            results.append({
-                "종목코드": t, "종목명": d["종목명"], "시장": market,
-                "종가": d["종가"], "등락률(%)": pct, "방향": direction,
-                "거래량": d["거래량"],
-            })
-    # 등락률 절대값 큰 순 정렬
-    results.sort(key=lambda x: abs(x["등락률(%)"]), reverse=True)
-    return results[:50]  # 상위 50개
+def prioritize(codes: list[str], snapshot: Optional[pd.DataFrame]) -> tuple[list[str], list[str]]:
+    """
+    일봉 조회 순서 결정: 당일 거래대금 큰 종목부터
+    Returns: (조회 순서, 건너뛴 종목) — 스냅샷에 없는 종목(거래정지/거래량 0)은 건너뜀
+    """
+    if snapshot is None or snapshot.empty:
+        return list(codes), []
+    if "거래대금" in snapshot.columns:
+        value = snapshot["거래대금"]
+    else:
+        value = snapshot["종가"] * snapshot["거래량"]
+    ranked = value.reindex(codes)
+    skipped = ranked.index[ranked.isna()].tolist()
+    ordered = ranked.dropna().sort_values(ascending=False, kind="stable").index.tolist()
+    return ordered, skipped
 
 
-def detect_cross(date: str, market: str) -> list[dict]:
-    """골든크로스 / 데드크로스 감지 (MA5 vs MA20)"""
+def detect_cross(date: str, market: str, snapshot: Optional[pd.DataFrame] = None,
+                 deadline: Optional[float] = None) -> tuple[list[dict], dict]:
+    """
+    골든크로스 / 데드크로스 감지 (MA5 vs MA20)
+    종목별 MA 상태(ma_state)를 실행 간 유지하여, 직전 거래일 상태가 있으면
+    당일 스냅샷 종가만으로 O(종목수) 갱신. 상태가 없거나 끊겼으면 일봉 조회로 재구성.
+
+    일봉 조회가 필요한 종목은 거래대금 순으로 처리하고, deadline(time.monotonic 기준)을
+    넘기면 중단. 남은 종목은 상태에 미처리로 남아 다음 실행에서 보충됨.
+    일봉 조회는 1차에서 재시도 1회만 하고, 실패 종목은 끝에 모아 재시도 횟수를 늘려 한 번 더 조회.
+    그래도 실패한 종목은 미처리로 남음 (다음 실행에서 보충).
+    Returns: (크로스 목록, {"total", "scanned", "pending", "attempted", "succeeded", "failed", "error"})
+    """
     log.info(f"{market} 크로스 분석 중...")
     crosses = []
+    coverage = {"total": 0, "scanned": 0, "pending": 0,
+                "attempted": 0, "succeeded": 0, "failed": 0, "error": ""}
     try:
         # 최근 거래일 기준 MA_LOOKBACK일치 데이터
         end_dt = datetime.strptime(date, "%Y%m%d")
         start_dt = end_dt - timedelta(days=MA_LOOKBACK * 2)  # 여유있게
         start_str = start_dt.strftime("%Y%m%d")
 
-        tickers = stock.get_market_ticker_list(date, market=market)
-
-        for ticker in tickers:
+        state_path = MA_STATE_DIR / f"ma_{market}.npz"
+        state = MAState.load(state_path, MA_SHORT, MA_LONG)
+        tickers = krx.ticker_list(date, market)
+        date_i = int(date)
+        persist = True
+        if state.as_of > date_i:
+            # 과거 날짜 재처리: 저장된 최신 상태는 건드리지 않음
+            state = MAState(MA_SHORT, MA_LONG)
+            persist = False
+
+        prev_date = previous_trading_date(date)
+        if state.as_of == date_i:
+            # 같은 날 재실행: 갱신된 종목은 저장된 결과 사용, 미처리 종목만 보충
+            log.info(f"  {market} MA 상태 재사용 ({state.as_of})")
+        else:
+            incremental = (
+                snapshot is not None and not snapshot.empty and prev_date is not None
+                and state.as_of == int(prev_date)
+            )
+            if not incremental:
+                log.info(f"  {market} MA 상태 재구성 (저장 상태 {state.as_of or '없음'})")
+                state = MAState(MA_SHORT, MA_LONG)
+
+        # 신규 상장/이전 종목 (재구성 시 전 종목), 지난 실행에서 못 다 한 종목은 일봉으로 seed
+        state.sync_universe(tickers)
+        ordered, skipped = prioritize(state.pending(), snapshot)
+        closes = {}
+        if snapshot is not None:
+            closes = snapshot["종가"].astype(float).to_dict()
+
+        def seed(ticker: str, retries: int):
+            history, today_close = fetch_close_history(ticker, start_str, date, retries)
+            state.seed(ticker, history, int(prev_date) if prev_date else 0)
+            if today_close is not None:
+                closes.setdefault(ticker, today_close)
+
+        failed = []
+        for n, ticker in enumerate(ordered):
+            if deadline is not None and time.monotonic() >= deadline:
+                log.warning(f"  {market} 시간 제한 도달: 일봉 조회 {n}/{len(ordered)}개에서 중단")
+                break
+            if not krx.breaker.allow():
+                log.warning(f"  {market} KRX 응답 불안정: 일봉 조회 {n}/{len(ordered)}개에서 중단")
+                break
+            coverage["attempted"] += 1
             try:
-                df = stock.get_market_ohlcv(start_str, date, ticker)
-                if len(df) < MA_LONG + 2:
+                seed(ticker, retries=1)
+                coverage["succeeded"] += 1
+            except KRXError:
+                failed.append(ticker)
+
+        # 2차: 실패 종목만 재시도 (브레이커가 열려 있으면 쿨다운이 끝날 때까지 대기)
+        if failed:
+            log.info(f"  {market} 일봉 조회 실패 {len(failed)}개 재시도")
+            wait = krx.breaker.remaining()
+            if wait and (deadline is None or time.monotonic() + wait < deadline):
+                time.sleep(wait)
+            recovered = 0
+            for ticker in failed:
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                if not krx.breaker.allow():
+                    break
+                try:
+                    seed(ticker, retries=KRX_RETRIES)
+                    recovered += 1
+                except KRXError:
                     continue
-
-                df["MA_S"] = df["종가"].rolling(window=MA_SHORT).mean()
-                df["MA_L"] = df["종가"].rolling(window=MA_LONG).mean()
-                df = df.dropna()
-
-                if len(df) < 2:
-                    continue
-
-                prev_s, curr_s = df["MA_S"].iloc[-2], df["MA_S"].iloc[-1]
-                prev_l, curr_l = df["MA_L"].iloc[-2], df["MA_L"].iloc[-1]
-
-                cross_type = None
-                if prev_s <= prev_l and curr_s > curr_l:
-                    cross_type = "골든크로스"
-                elif prev_s >= prev_l and curr_s < curr_l:
-                    cross_type = "데드크로스"
-
-                if cross_type:
-                    name = stock.get_market_ticker_name(ticker)
-                    crosses.append({
-                        "종목코드": ticker,
-                        "종목명": name,
-                        "시장": market,
-                        "유형": cross_type,
-                        "단기MA": int(round(curr_s)),
-                        "장기MA": int(round(curr_l)),
-                        "종가": int(df["종가"].iloc[-1]),
-                    })
-            except Exception:
-                continue
+            coverage["succeeded"] += recovered
+            log.info(f"  {market} 재시도 복구 {recovered}/{len(failed)}개")
+        coverage["failed"] = coverage["attempted"] - coverage["succeeded"]
+        if coverage["attempted"]:
+            log.info(
+                f"  {market} 일봉 조회: 시도 {coverage['attempted']}, "
+                f"성공 {coverage['succeeded']}, 실패 {coverage['failed']}"
+            )
+
+        # seed 안 된 종목은 오늘 종가로 갱신하지 않음 (과거 없이 MA가 시작되지 않도록)
+        # 거래정지 종목은 closes에 없으므로 갱신되지 않음
+        for ticker in state.pending():
+            closes.pop(ticker, None)
+        results = state.update(date_i, closes)
+        if skipped:
+            log.info(f"  {market} 거래정지/거래량 0 종목 {len(skipped)}개 건너뜀")
+
+        if persist:
+            state.save(state_path)
+
+        # 미처리 = seed 대기 중 거래 있는 종목 (거래정지 종목은 커버리지에서 제외)
+        pending = set(state.pending())
+        traded = set(snapshot.index) if snapshot is not None and not snapshot.empty else set(tickers)
+        coverage["total"] = len(traded & set(tickers))
+        coverage["pending"] = len(pending & traded)
+        coverage["scanned"] = coverage["total"] - coverage["pending"]
+        if coverage["pending"]:
+            log.warning(
+                f"  {market} 부분 커버리지: {coverage['scanned']}/{coverage['total']}개 "
+                f"(남은 {coverage['pending']}개는 다음 실행에서 보충)"
+            )
+
+        for r in results:
+            crosses.append({
+                "종목코드": r["종목코드"],
+                "종목명": get_ticker_name(r["종목코드"]),
+                "시장": market,
+                "유형": r["유형"],
+                "단기MA": int(round(r["단기MA"])),
+                "장기MA": int(round(r["장기MA"])),
+                "종가": int(r["종가"]),
+            })
 
         log.info(f"{market}: {len(crosses)}개 크로스 감지")
     except Exception as e:
         log.error(f"{market} 크로스 분석 실패: {e}")
+        coverage["error"] = str(e)
 
-    return crosses
+    return crosses, coverage
 
 
 # ---------------------------------------------------------------------------
-# 뉴스 크롤링 + AI 사유 분석
+# 연속 기록
 # ---------------------------------------------------------------------------
-def fetch_naver_news(ticker: str, max_articles: int = 3) -> list[str]:
-    """네이버 금융에서 종목 관련 뉴스 제목 크롤링"""
-    try:
-        url = NAVER_FINANCE_NEWS_URL.format(code=ticker)
-        resp = requests.get(url, headers=HEADERS, timeout=10)
-        resp.encoding = "euc-kr"
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        titles = []
-        for a_tag in soup.select("td.title a"):
-            title = a_tag.get_text(strip=True)
-            if title:
-                titles.append(title)
-            if len(titles) >= max_articles:
-                break
-        return titles
-    except Exception as e:
-        log.debug(f"뉴스 크롤링 실패 ({ticker}): {e}")
-        return []
+def track_streaks(date: str, screens: list, records: dict[str, list[dict]]) -> list[list[str]]:
+    """
+    연속 상한가 / 연속 급등·급락 갱신 (당일 스크린 종목만 처리)
+    records의 각 종목에 연속일 / 연속시작 / 누적등락률(%)을 채우고 연속 탭 행 반환
+    """
+    date_i = int(date)
+    index = StreakIndex.load(STREAK_PATH)
+    persist = index.as_of <= date_i
+    if not persist:
+        # 과거 날짜 재처리: 저장된 최신 기록은 건드리지 않음
+        index = StreakIndex()
+
+    prev_date = previous_trading_date(date)
+    prev_i = int(prev_date) if prev_date else None
+    index.update_screens(date_i, prev_i, screens, records)
 
+    if persist:
+        index.save(STREAK_PATH)
+    rows = streak_rows(index, date_i)
+    log.info(f"연속 기록: {len(rows)}개")
+    return rows
 
-def analyze_reasons_batch(items: list[dict]) -> dict[str, str]:
+
+# ---------------------------------------------------------------------------
+# 기록 (탭 단위 체크포인트)
+# ---------------------------------------------------------------------------
+def write_checkpointed(sink, ckpt: RunCheckpoint, written: list[str],
+                       tab: str, headers: list[str], rows: list[list[str]]) -> bool:
     """
-    Claude API로 종목별 사유를 배치 분석
-    Returns: {종목코드: 사유 한줄 요약}
+    탭 하나를 기록하고, 모든 sink가 성공했을 때만 written / 체크포인트에 기록 완료로 남김
+    (Sheets만 실패하고 SQLite는 성공한 탭을 완료로 남기면 재실행해도 Sheets에 다시 쓰지 않음)
+    Returns: 모든 sink 기록 성공 여부
     """
-    if not ANTHROPIC_API_KEY or not items:
-        return {}
-
-    # 종목별 뉴스 수집
-    news_data = {}
-    for item in items:
-        code = item["종목코드"]
-        if code not in news_data:
-            headlines = fetch_naver_news(code)
-            news_data[code] = headlines
-            time.sleep(0.3)  # 크롤링 예의
-
-    # 프롬프트 구성
-    entries = []
-    for i, item in enumerate(items):
-        code = item["종목코드"]
-        name = item["종목명"]
-        pct = item.get("등락률(%)", 0)
-        headlines = news_data.get(code, [])
-        news_text = " / ".join(headlines) if headlines else "뉴스 없음"
-        entries.append(f"{i+1}. {name}({code}) 등락률:{pct}% 뉴스:[{news_text}]")
-
-    prompt = f"""아래는 오늘 한국 주식 시장에서 주목할 종목 {len(items)}개의 정보입니다.
-각 종목에 대해 등락 사유를 한국어 한 줄(30자 이내)로 요약해주세요.
-뉴스가 없으면 등락률과 시장 상황을 기반으로 추정해주세요.
-
-반드시 아래 JSON 배열 형식으로만 응답하세요:
-["1번 사유", "2번 사유", ...]
-
-종목 목록:
-{chr(10).join(entries)}"""
-
+    if tab in written:
+        log.info(f"{tab}: 이미 기록됨, 건너뜀")
+        return True
     try:
-        client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-        response = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=2048,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        text = response.content[0].text.strip()
-        # JSON 추출
-        if "```" in text:
-            import re
-            m = re.search(r"```(?:json)?\s*([\s\S]*?)```", text)
-            if m:
-                text = m.group(1).strip()
-
-        import json
-        reasons = json.loads(text)
-
-        result = {}
-        for i, item in enumerate(items):
-            if i < len(reasons):
-                result[item["종목코드"]] = reasons[i]
-        return result
-
-    except Exception as e:
-        log.error(f"AI 사유 분석 실패: {e}")
-        return {}
+        failed = sink.write(tab, headers, rows)
+    except Exception:
+        # 모든 sink 실패 — 오류는 MultiSink가 sink별로 남김
+        return False
+    if failed:
+        return False
+    written.append(tab)
+    ckpt.save("write", {"tabs": written}, complete=False)
+    return True
 
 
 # ---------------------------------------------------------------------------
-# Google Sheets 기록
+# AI 사유 분석 (reason_engine: 네이버 뉴스 → Claude, 작업 큐로 처리)
 # ---------------------------------------------------------------------------
-def write_to_sheet(ws: gspread.Worksheet, rows: list[list[str]]):
-    """시트 상단(2행)에 데이터 삽입"""
-    if not rows:
-        return
-    # 2행부터 삽입 (1행은 헤더)
-    ws.insert_rows(rows, row=2)
-    log.info(f"  → '{ws.title}'에 {len(rows)}행 기록")
+def drain_reasons(spreadsheet: Optional[gspread.Spreadsheet] = None,
+                  worksheets: Optional[dict[str, gspread.Worksheet]] = None,
+                  budget: float = REASON_DRAIN_BUDGET,
+                  path: str = REASON_QUEUE_PATH):
+    """
+    사유 작업 큐 처리 → 시트 / DB의 사유 칸 채움 (analyzer, backfill, daemon, reason_queue CLI 공용)
+    budget: 처리 시간 제한 (초, 0 = 큐가 빌 때까지)
+    """
+    queue = ReasonQueue(path)
+    try:
+        if not queue.pending():
+            return {}
+        if not ANTHROPIC_API_KEY:
+            log.info(f"ANTHROPIC_API_KEY 없음 — 사유 작업 {queue.pending()}개는 큐에 남겨둠")
+            return {}
+        if spreadsheet is None:
+            spreadsheet = connect_sheets()
+        sink = build_sinks(spreadsheet, worksheets)
+        deadline = time.monotonic() + budget if budget > 0 else None
+
+        def analyze(items: list[dict]) -> dict[str, str]:
+            # 예산 안에 못 끝낸 항목은 비워 둠 → 큐가 백오프 후 재시도 (마지막 시도만 템플릿)
+            timeout = max(1.0, deadline - time.monotonic()) if deadline else None
+            return REASON_ENGINE.analyze(items, timeout=timeout, fallback=False)
+
+        try:
+            return reason_queue.drain(queue, analyze, sink, deadline,
+                                      fallback=REASON_ENGINE.fallback_reason)
+        finally:
+            sink.close()
+    finally:
+        queue.close()
 
 
 # ---------------------------------------------------------------------------
 # 메인 실행
 # ---------------------------------------------------------------------------
-def main():
+def main(spreadsheet: Optional[gspread.Spreadsheet] = None,
+         worksheets: Optional[dict[str, gspread.Worksheet]] = None,
+         time_budget: float = CROSS_TIME_BUDGET,
+         group_reasons: bool = REASONS_BY_SECTOR,
+         from_stage: Optional[str] = None,
+         profile: bool = False):
+    """
+    일간 분석 실행
+    daemon 모드에서는 이미 연결된 spreadsheet / worksheets를 넘겨받아 재사용
+    time_budget: 크로스 분석 시간 제한 (초, 0 = 제한 없음)
+    group_reasons: AI 사유 분석을 업종 단위로 묶어 요청
+    from_stage: 이 단계부터 다시 실행 (없으면 체크포인트의 첫 미완료 단계부터)
+    profile: 단계별 CPU / 메모리 프로파일을 runs/profiles/에 기록
+    """
+    prof = StageProfiler(profile, profile_dir("KR") if profile else None)
+    try:
+        run(spreadsheet, worksheets, time_budget, group_reasons, from_stage, prof)
+    finally:
+        prof.close()
+
+
+def run(spreadsheet: Optional[gspread.Spreadsheet], worksheets: Optional[dict[str, gspread.Worksheet]],
+        time_budget: float, group_reasons: bool, from_stage: Optional[str], prof: StageProfiler):
+    """main 본체 — 단계마다 prof.stage()로 구분 (체크포인트 단계와 같은 이름)"""
     date = get_trading_date()
     date_formatted = f"{date[:4]}-{date[4:6]}-{date[6:]}"
     log.info(f"=== 주식 일간 분석 시작 ({date_formatted}) ===")
 
-    # 1. Google Sheets 연결
-    spreadsheet = connect_sheets()
-    worksheets = ensure_worksheets(spreadsheet)
-
-    # 2. 시세 수집
-    kospi_data = fetch_market_data(date, "KOSPI")
-    kosdaq_data = fetch_market_data(date, "KOSDAQ")
-
-    if not kospi_data and not kosdaq_data:
-        log.warning("시세 데이터 없음. 비거래일일 수 있습니다.")
+    # 단계별 결과는 runs/YYYYMMDD/에 저장 → 실패 후 재실행 시 완료된 단계는 건너뜀
+    ckpt = RunCheckpoint(date, STAGES, from_stage=from_stage)
+    if ckpt.complete():
+        log.info("이미 완료된 실행입니다 (다시 실행하려면 --from-stage 지정)")
         return
+    if ckpt.completed:
+        log.info(f"체크포인트에서 재개: {ckpt.first_incomplete()} 단계부터")
+    prune_runs()
+
+    # 1. 시세 수집
+    with prof.stage("snapshot"):
+        if ckpt.done("snapshot"):
+            snapshot = ckpt.load("snapshot")
+        else:
+            fetched = {market: fetch_market_data(date, market) for market in ("KOSPI", "KOSDAQ")}
+            failed = [market for market, f in fetched.items() if f.failed]
+            if failed:
+                # 조회 실패를 휴장일로 처리하지 않음 → 종료 코드 1로 cron/daemon 재시도
+                raise KRXError(f"시세 수집 실패: {', '.join(failed)}")
+            frames = [f.data for f in fetched.values() if not f.data.empty]
+            if not frames:
+                log.warning("시세 데이터 없음 (휴장일)")
+                return
+            snapshot = pd.concat(frames)
+            ckpt.save("snapshot", snapshot)
+        kospi_data = snapshot[snapshot["시장"] == "KOSPI"]
+        kosdaq_data = snapshot[snapshot["시장"] == "KOSDAQ"]
+
+    # 2. 크로스 분석 (MA 상태 갱신, 시간 제한은 두 시장 합산)
+    with prof.stage("crosses"):
+        if ckpt.done("crosses"):
+            saved = ckpt.load("crosses")
+            crosses, partial = saved["crosses"], saved["partial"]
+        else:
+            deadline = time.monotonic() + time_budget if time_budget > 0 else None
+            crosses, partial = [], []
+            for market, data in (("KOSPI", kospi_data), ("KOSDAQ", kosdaq_data)):
+                found, coverage = detect_cross(date, market, data, deadline)
+                crosses += found
+                if coverage["pending"] or coverage["error"]:
+                    partial.append((market, coverage))
+            ckpt.save("crosses", {"crosses": crosses, "partial": partial})
+        log.info(f"크로스: {len(crosses)}개" + (" (부분 분석)" if partial else ""))
+
+    # 3. 스크린 (screens.json) — 전 스크린을 스냅샷 한 번에 평가
+    with prof.stage("screens"):
+        screens = load_screens("KR")
+        if ckpt.done("screens"):
+            saved = ckpt.load("screens")
+            records, streak_tab_rows = saved["records"], saved["streaks"]
+            sector_tab_rows, items_for_ai = saved["sectors"], saved["items"]
+        else:
+            frame = snapshot
+            if any(f in ("단기MA", "장기MA", "정배열") for sc in screens for f in sc.fields()):
+                frame = frame.join(ma_frame(["KOSPI", "KOSDAQ"]))
+            hits = run_screens(screens, frame)
+            # 업종 맵에 종목명도 있으므로 종목명 조회 캐시를 미리 채움
+            sector_map = load_sector_map(date)
+            for code, name in sector_map.names.items():
+                _ticker_names.setdefault(code, name)
+            records = {name: to_records(df, get_ticker_name) for name, df in hits.items()}
+            streak_tab_rows = track_streaks(date, screens, records)
+
+            # 업종별 집계 (breadth / 평균 등락률)
+            sectors = sector_summary(snapshot, sector_map, SURGE_PCT)
+            sector_tab_rows = sector_rows(sectors, snapshot, sector_map, date_formatted, get_ticker_name)
+
+            # AI 사유 분석 대상 (스크린별 reasons 설정: 상한가 + 하한가 + 급등락 상위 20개)
+            items_for_ai = reason_items(screens, records)
+            if group_reasons and items_for_ai:
+                grouped = group_reason_items(items_for_ai, sector_map)
+                log.info(f"업종 묶음: {len(items_for_ai)}개 → {len(grouped)}개 항목")
+                items_for_ai = grouped
+            ckpt.save("screens", {
+                "records": records, "streaks": streak_tab_rows,
+                "sectors": sector_tab_rows, "items": items_for_ai,
+            })
+        log.info(", ".join(f"{name}: {len(r)}개" for name, r in records.items()))
+        log.info(f"업종: {len(sector_tab_rows)}개")
+
+    # 4. 기록 (Sheets + SQLite) — 사유는 비워 두고 먼저 기록 (뉴스 수집 / Claude 응답을 기다리지 않음)
+    #    탭 단위로 진행 상황 저장, 재실행 시 기록된 탭은 건너뜀
+    with prof.stage("write"):
+        if spreadsheet is None:
+            spreadsheet = connect_sheets()
+        if worksheets is None:
+            worksheets = ensure_worksheets(spreadsheet)
+        sink = build_sinks(spreadsheet, worksheets)
+        written = ckpt.load("write", {"tabs": []})["tabs"]
+        # 다시 기록하는 경우 이미 분석된 사유는 채워서 기록
+        queue = ReasonQueue()
+        reasons = queue.reasons(date_formatted)
+        queue.close()
+        failed_tabs = []
+
+        def write(tab: str, headers: list[str], rows: list[list[str]]):
+            # 실패한 탭이 있어도 나머지 탭은 계속 기록
+            if not write_checkpointed(sink, ckpt, written, tab, headers, rows):
+                failed_tabs.append(tab)
+
+        for screen in screens:
+            rows = build_rows(screen, records[screen.name], date_formatted, reasons)
+            write(screen.tab, screen.columns, rows)
+
+        # 크로스
+        rows = []
+        for item in crosses:
+            rows.append([
+                date_formatted, item["종목코드"], item["종목명"], item["시장"],
+                item["유형"], str(item["단기MA"]), str(item["장기MA"]), str(item["종가"]),
+            ])
+        for market, coverage in partial:
+            # 시간 제한 / 조회 실패로 일부 종목만 분석된 날은 표시 행 추가
+            if coverage.get("error"):
+                note = f"※ 크로스 분석 실패 ({coverage['error'][:80]})"
+            else:
+                note = f"※ 부분 분석 {coverage['scanned']}/{coverage['total']}개 (나머지는 다음 실행에서 보충)"
+                if coverage.get("failed"):
+                    note += f", 조회 실패 {coverage['failed']}개"
+            rows.append([date_formatted, "-", note, market, "부분분석", "", "", ""])
+        write("크로스", TAB_HEADERS["크로스"], rows)
+        write("연속", TAB_HEADERS["연속"], streak_tab_rows)
+        write("업종", TAB_HEADERS["업종"], sector_tab_rows)
+        sink.close()
+        if failed_tabs:
+            # write 단계를 미완료로 두고 종료 → 재실행 시 실패한 탭만 다시 기록
+            raise RuntimeError(f"기록 실패 탭: {', '.join(failed_tabs)}")
+        ckpt.save("write", {"tabs": written})
+
+    # 5. 관심종목 알림 — 스크린 / 크로스 hit만 역색인에서 찾아 구독자별 digest 발송
+    #    보낸 구독자는 체크포인트에 남겨 재실행 시 중복 발송 안 함 (실패한 구독자만 다시 시도)
+    with prof.stage("alerts"):
+        if not ckpt.done("alerts"):
+            sent = ckpt.load("alerts", {"sent": []})["sent"]
+
+            def mark_sent(name: str):
+                sent.append(name)
+                ckpt.save("alerts", {"sent": sent}, complete=False)
 
-    # 3. 필터링
-    limit_up = filter_limit_up(kospi_data, "KOSPI") + filter_limit_up(kosdaq_data, "KOSDAQ")
-    limit_down = filter_limit_down(kospi_data, "KOSPI") + filter_limit_down(kosdaq_data, "KOSDAQ")
-    surge = filter_surge(kospi_data, "KOSPI") + filter_surge(kosdaq_data, "KOSDAQ")
-    surge.sort(key=lambda x: abs(x["등락률(%)"]), reverse=True)
-    surge = surge[:50]
-
-    log.info(f"상한가: {len(limit_up)}개, 하한가: {len(limit_down)}개, 급등락: {len(surge)}개")
-
-    # 4. 크로스 분석
-    crosses = detect_cross(date, "KOSPI") + detect_cross(date, "KOSDAQ")
-    log.info(f"크로스: {len(crosses)}개")
-
-    # 5. AI 사유 분석 (상한가 + 하한가 + 급등락 상위 20개)
-    items_for_ai = limit_up + limit_down + surge[:20]
-    if items_for_ai:
-        log.info(f"AI 사유 분석 중 ({len(items_for_ai)}개 종목)...")
-        reasons = analyze_reasons_batch(items_for_ai)
-    else:
-        reasons = {}
-
-    # 6. 시트 기록
-    # 상한가
-    rows = []
-    for item in limit_up:
-        reason = reasons.get(item["종목코드"], "")
-        rows.append([
-            date_formatted, item["종목코드"], item["종목명"], item["시장"],
-            str(item["종가"]), str(item["등락률(%)"]), str(item["거래량"]), reason,
-        ])
-    write_to_sheet(worksheets["상한가"], rows)
-
-    # 하한가
-    rows = []
-    for item in limit_down:
-        reason = reasons.get(item["종목코드"], "")
-        rows.append([
-            date_formatted, item["종목코드"], item["종목명"], item["시장"],
-            str(item["종가"]), str(item["등락률(%)"]), str(item["거래량"]), reason,
-        ])
-    write_to_sheet(worksheets["하한가"], rows)
-
-    # 급등락
-    rows = []
-    for item in surge:
-        reason = reasons.get(item["종목코드"], "")
-        rows.append([
-            date_formatted, item["종목코드"], item["종목명"], item["시장"],
-            str(item["종가"]), str(item["등락률(%)"]), item["방향"],
-            str(item["거래량"]), reason,
-        ])
-    write_to_sheet(worksheets["급등락"], rows)
-
-    # 크로스
-    rows = []
-    for item in crosses:
-        rows.append([
-            date_formatted, item["종목코드"], item["종목명"], item["시장"],
-            item["유형"], str(item["단기MA"]), str(item["장기MA"]), str(item["종가"]),
-        ])
-    write_to_sheet(worksheets["크로스"], rows)
+            try:
+                hits = screen_hits(screens, records) + [("크로스", item) for item in crosses]
+                _, failed = notify_watchlists(load_watchlists(), date_formatted, hits,
+                                              skip=sent, on_sent=mark_sent)
+            except Exception as e:
+                log.error(f"관심종목 알림 실패: {e}")
+                failed = [None]
+            ckpt.save("alerts", {"sent": sent}, complete=not failed)
+
+    # 6. AI 사유 — 작업 큐에 넣고, 시간이 허락하는 만큼 바로 처리 (남은 작업은 워커가 재시도)
+    with prof.stage("reasons"):
+        if not ckpt.done("reasons"):
+            queue = ReasonQueue()
+            try:
+                queued = queue.enqueue(date_formatted, [
+                    (item, reason_tabs(screens, records, item_codes(item))) for item in items_for_ai
+                ])
+            finally:
+                queue.close()
+            log.info(f"사유 작업 {queued}개 추가 ({len(items_for_ai)}개 항목)")
+            ckpt.save("reasons", {"queued": queued})
+        try:
+            drain_reasons(spreadsheet, worksheets)
+        except Exception as e:
+            # 행은 이미 기록됨 → 사유는 다음 워커 실행에서 채움
+            log.error(f"사유 작업 처리 실패 (큐에 남김): {e}")
+
+    # 7. 경제일정 — 새로 생기거나 바뀐 이벤트만 기록 (피드가 그대로면 Sheets 호출 없음)
+    with prof.stage("calendar"):
+        try:
+            refresh_calendar(spreadsheet, worksheets, ["경제일정"])
+        except Exception as e:
+            log.error(f"경제일정 갱신 실패: {e}")
 
     log.info(f"=== 분석 완료 ===")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="한국 주식 일간 분석")
+    parser.add_argument("--time-budget", type=float, default=CROSS_TIME_BUDGET,
+                        help="크로스 분석 시간 제한 (초, 0 = 제한 없음). 거래대금 순으로 처리")
+    parser.add_argument("--group-reasons", action="store_true", default=REASONS_BY_SECTOR,
+                        help="AI 사유 분석을 업종 단위로 묶어 요청 (프롬프트 축소)")
+    parser.add_argument("--from-stage", choices=STAGES,
+                        help="이 단계부터 다시 실행 (기본: 체크포인트의 첫 미완료 단계부터)")
+    parser.add_argument("--profile", action="store_true",
+                        help="단계별 cProfile / 스택 샘플(flamegraph) / 메모리 peak를 runs/profiles/에 기록")
+    args = parser.parse_args()
     try:
-        main()
+        main(time_budget=args.time_budget, group_reasons=args.group_reasons,
+             from_stage=args.from_stage, profile=args.profile)
     except Exception as e:
         log.error(f"치명적 오류: {e}", exc_info=True)
         sys.exit(1)
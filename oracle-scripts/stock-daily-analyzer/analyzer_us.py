@@ -3,7 +3,9 @@
 미국 주식 일간 분석기 (Oracle Cloud Cron)
 - TwelveData API: S&P 500 / NASDAQ 100 주요 종목 시세
 - 급등락 (|등락률| >= 3%) / MA 크로스 분석
-- 경제일정: TwelveData 또는 수동 관리
+- 급등락 사유: reason_engine (Yahoo Finance 헤드라인 → Claude), 크로스 분석과 겹쳐 수집
+- 경제일정: econ_calendar (ForexFactory USD events, only new / changed rows written)
+- 관심종목 알림: watchlist (one digest per subscriber)
 - gspread: Google Sheets에 기록
 """
 
@@ -11,14 +13,24 @@ import os
 import sys
 import time
 import logging
+import argparse
 from datetime import datetime, timedelta
 from typing import Optional
 
 import requests
+import pandas as pd
 from dotenv import load_dotenv
 import gspread
 from google.oauth2.service_account import Credentials
 
+from ma_state import MAState, MA_STATE_DIR
+from screens import load_screens, run_screens, to_records, build_rows, reason_items
+from reason_engine import ReasonEngine
+from econ_calendar import refresh as refresh_calendar
+from watchlist import load_index as load_watchlists, screen_hits, notify as notify_watchlists
+from sinks import build_sinks
+from profiling import StageProfiler, profile_dir
+
 # ---------------------------------------------------------------------------
 # Setup
 # ---------------------------------------------------------------------------
@@ -50,9 +62,19 @@ US_TICKERS = [
     "MU", "LRCX", "KLAC", "MRVL", "PANW",
 ]
 
-SURGE_THRESHOLD = 3.0  # US stocks: |change| >= 3% counts as surge
 MA_SHORT = 5
 MA_LONG = 20
+# Time limit for surge reasons (headlines + Claude), same default as the KR run
+US_REASON_BUDGET = float(os.getenv("US_REASON_BUDGET", "600"))
+
+# TwelveData 연결 / 사유 엔진 재사용 (daemon 모드에서 실행 간 유지)
+SESSION = requests.Session()
+REASON_ENGINE = ReasonEngine("US")
+
+TAB_HEADERS = {
+    "US_급등락": ["날짜", "Ticker", "종목명", "시장", "종가", "등락률(%)", "방향", "거래량", "사유"],
+    "US_크로스": ["날짜", "Ticker", "종목명", "시장", "유형", "단기MA", "장기MA", "종가"],
+}
 
 # ---------------------------------------------------------------------------
 # Google Sheets
@@ -68,22 +90,6 @@ def connect_sheets():
     return gc.open_by_key(GOOGLE_SHEETS_ID)
 
 
-def write_to_sheet(sp, tab_name: str, headers: list, rows: list[list]):
-    """Write data to a Google Sheet tab, creating it if needed."""
-    existing = {ws.title: ws for ws in sp.worksheets()}
-    data = [headers] + rows
-
-    if tab_name in existing:
-        ws = existing[tab_name]
-        ws.clear()
-        ws.update(values=data, range_name="A1")
-    else:
-        ws = sp.add_worksheet(tab_name, 1000, len(headers))
-        ws.update(values=data, range_name="A1")
-
-    log.info(f"✅ {tab_name}: {len(rows)} rows written")
-
-
 # ---------------------------------------------------------------------------
 # TwelveData API
 # ---------------------------------------------------------------------------
@@ -91,7 +97,7 @@ def write_to_sheet(sp, tab_name: str, headers: list, rows: list[list]):
 def fetch_quote(ticker: str) -> Optional[dict]:
     """Fetch real-time quote for a single ticker."""
     try:
-        resp = requests.get(
+        resp = SESSION.get(
             "https://api.twelvedata.com/quote",
             params={"symbol": ticker, "apikey": TWELVE_DATA_API_KEY},
             timeout=10,
@@ -109,7 +115,7 @@ def fetch_quote(ticker: str) -> Optional[dict]:
 def fetch_time_series(ticker: str, outputsize: int = 30) -> Optional[list]:
     """Fetch daily time series for MA cross detection."""
     try:
-        resp = requests.get(
+        resp = SESSION.get(
             "https://api.twelvedata.com/time_series",
             params={
                 "symbol": ticker,
@@ -142,86 +148,119 @@ def get_exchange(ticker: str) -> str:
 # Analysis
 # ---------------------------------------------------------------------------
 
-def analyze_surges(today_str: str) -> list[list]:
-    """Find stocks with |change| >= SURGE_THRESHOLD."""
-    results = []
-
+def fetch_quotes() -> dict[str, dict]:
+    """Fetch quotes for all tracked tickers once (shared by surge and cross analysis)."""
+    quotes = {}
     for ticker in US_TICKERS:
         quote = fetch_quote(ticker)
-        if not quote:
-            continue
+        if quote:
+            quotes[ticker] = quote
+        time.sleep(0.15)  # Rate limit: ~8 req/sec (free tier)
+    return quotes
+
 
+def quotes_frame(quotes: dict[str, dict]) -> pd.DataFrame:
+    """Quotes → screen snapshot (Ticker index; 종목명, 시장, 종가, 거래량, 등락률)."""
+    records = {}
+    for ticker, quote in quotes.items():
         try:
-            change_pct = float(quote.get("percent_change", 0))
-            close = quote.get("close", "0")
-            volume = quote.get("volume", "0")
-            name = quote.get("name", ticker)
-            exchange = get_exchange(ticker)
-
-            if abs(change_pct) >= SURGE_THRESHOLD:
-                direction = "급등" if change_pct > 0 else "급락"
-                results.append([
-                    today_str,
-                    ticker,
-                    name,
-                    exchange,
-                    close,
-                    f"{change_pct:.2f}",
-                    direction,
-                    volume,
-                    "",  # 사유 — can be filled by Claude API later
-                ])
+            records[ticker] = {
+                "종목명": quote.get("name", ticker),
+                "시장": get_exchange(ticker),
+                "종가": float(quote.get("close", 0)),
+                "거래량": int(float(quote.get("volume", 0))),
+                "등락률": float(quote.get("percent_change", 0)),
+            }
         except (ValueError, TypeError) as e:
             log.warning(f"Parse error for {ticker}: {e}")
-            continue
+    return pd.DataFrame.from_dict(
+        records, orient="index", columns=["종목명", "시장", "종가", "거래량", "등락률"]
+    )
 
-        time.sleep(0.15)  # Rate limit: ~8 req/sec (free tier)
 
-    results.sort(key=lambda r: abs(float(r[5])), reverse=True)
-    return results
+def analyze_surges(quotes: dict[str, dict]) -> tuple[list, dict[str, list[dict]]]:
+    """
+    Run the US screens from screens.json (US_급등락: |change| >= us_surge).
+    Returns (screens, {screen name: records}); rows are built at write time with reasons.
+    """
+    screens = load_screens("US")
+    hits = run_screens(screens, quotes_frame(quotes))
+    return screens, {screen.name: to_records(hits[screen.name]) for screen in screens}
 
 
-def analyze_crosses(today_str: str) -> list[list]:
-    """Detect MA5/MA20 golden/dead crosses."""
-    results = []
+def _quote_date(quote: dict) -> int:
+    return int(str(quote["datetime"])[:10].replace("-", ""))
 
-    for ticker in US_TICKERS:
-        series = fetch_time_series(ticker, outputsize=MA_LONG + 5)
-        if not series or len(series) < MA_LONG + 1:
-            continue
 
+def analyze_crosses(today_str: str, quotes: dict[str, dict]) -> list[list]:
+    """
+    Detect MA5/MA20 golden/dead crosses.
+    Uses the persisted per-ticker MA state (ma_state): when a ticker's last
+    stored close matches today's previous_close, the MAs are advanced with the
+    quote close alone. Otherwise (new ticker, missed day, split) the ticker is
+    re-seeded from the daily time series.
+    """
+    state_path = MA_STATE_DIR / "ma_US.npz"
+    state = MAState.load(state_path, MA_SHORT, MA_LONG)
+    state.sync_universe(US_TICKERS)
+
+    closes = {}
+    reseeded = 0
+    for ticker, quote in quotes.items():
         try:
-            closes = [float(v["close"]) for v in series]
-            ma_short_today = sum(closes[:MA_SHORT]) / MA_SHORT
-            ma_long_today = sum(closes[:MA_LONG]) / MA_LONG
-            ma_short_yesterday = sum(closes[1:MA_SHORT + 1]) / MA_SHORT
-            ma_long_yesterday = sum(closes[1:MA_LONG + 1]) / MA_LONG
-
-            cross_type = None
-            if ma_short_yesterday <= ma_long_yesterday and ma_short_today > ma_long_today:
-                cross_type = "골든크로스"
-            elif ma_short_yesterday >= ma_long_yesterday and ma_short_today < ma_long_today:
-                cross_type = "데드크로스"
-
-            if cross_type:
-                name = series[0].get("name", ticker)
-                exchange = get_exchange(ticker)
-                results.append([
-                    today_str,
-                    ticker,
-                    name if name != ticker else ticker,
-                    exchange,
-                    cross_type,
-                    f"{ma_short_today:.2f}",
-                    f"{ma_long_today:.2f}",
-                    series[0]["close"],
-                ])
+            date_i = _quote_date(quote)
+            close = float(quote["close"])
+            prev_close = float(quote.get("previous_close") or 0)
         except (ValueError, TypeError, KeyError) as e:
             log.warning(f"Cross analysis error for {ticker}: {e}")
             continue
 
-        time.sleep(0.15)
+        last = state.last_close(ticker)
+        contiguous = last is not None and prev_close and abs(last - prev_close) <= prev_close * 1e-3
+        already = state.last_update(ticker) == date_i
+        if not already and not contiguous:
+            series = fetch_time_series(ticker, outputsize=MA_LONG + 5)
+            time.sleep(0.15)
+            if not series:
+                continue
+            try:
+                history = [
+                    (int(v["datetime"][:10].replace("-", "")), float(v["close"]))
+                    for v in reversed(series)
+                ]
+            except (ValueError, TypeError, KeyError) as e:
+                log.warning(f"Cross analysis error for {ticker}: {e}")
+                continue
+            before = [c for d, c in history if d < date_i]
+            prev_day = max((d for d, _ in history if d < date_i), default=0)
+            state.seed(ticker, before, prev_day)
+            reseeded += 1
+        closes[ticker] = close
+
+    if reseeded:
+        log.info(f"MA state re-seeded from time series: {reseeded} tickers")
+
+    crosses = []
+    # 보통은 하루치지만, 일부 종목 시세 날짜가 다를 수 있어 날짜별로 갱신
+    for d in sorted({_quote_date(quotes[t]) for t in closes}):
+        day_closes = {t: c for t, c in closes.items() if _quote_date(quotes[t]) == d}
+        crosses += state.update(d, day_closes)
+    state.save(state_path)
 
+    results = []
+    for c in crosses:
+        ticker = c["종목코드"]
+        quote = quotes[ticker]
+        results.append([
+            today_str,
+            ticker,
+            quote.get("name", ticker),
+            get_exchange(ticker),
+            c["유형"],
+            f"{c['단기MA']:.2f}",
+            f"{c['장기MA']:.2f}",
+            quote.get("close", ""),
+        ])
     return results
 
 
@@ -229,7 +268,8 @@ def analyze_crosses(today_str: str) -> list[list]:
 # Main
 # ---------------------------------------------------------------------------
 
-def main():
+def main(sp=None, profile: bool = False):
+    """profile: stage-level CPU / memory profiles under runs/profiles/"""
     if not TWELVE_DATA_API_KEY:
         log.error("TWELVE_DATA_API_KEY is not set. Exiting.")
         sys.exit(1)
@@ -237,33 +277,77 @@ def main():
     today_str = datetime.now().strftime("%Y-%m-%d")
     log.info(f"=== US Stock Daily Analysis: {today_str} ===")
 
-    sp = connect_sheets()
-
-    # 1. 급등락
-    log.info("Analyzing US surges...")
-    surge_rows = analyze_surges(today_str)
-    write_to_sheet(
-        sp,
-        "US_급등락",
-        ["날짜", "Ticker", "종목명", "시장", "종가", "등락률(%)", "방향", "거래량", "사유"],
-        surge_rows,
-    )
+    if sp is None:
+        sp = connect_sheets()
+    # US 탭은 매 실행마다 내용 교체 (지난 기록과 비교해 바뀐 행만 기록)
+    sink = build_sinks(sp, mode="replace")
 
-    # 2. 크로스
-    log.info("Analyzing US MA crosses...")
-    cross_rows = analyze_crosses(today_str)
-    write_to_sheet(
-        sp,
-        "US_크로스",
-        ["날짜", "Ticker", "종목명", "시장", "유형", "단기MA", "장기MA", "종가"],
-        cross_rows,
-    )
+    prof = StageProfiler(profile, profile_dir("US") if profile else None)
+    try:
+        with prof.stage("quotes"):
+            log.info("Fetching US quotes...")
+            quotes = fetch_quotes()
+
+        # 1. 급등락 — reason headlines start downloading in the background
+        with prof.stage("surges"):
+            log.info("Analyzing US surges...")
+            screens, records = analyze_surges(quotes)
+            items = reason_items(screens, records)
+            deadline = time.monotonic() + US_REASON_BUDGET
+            REASON_ENGINE.prefetch(items)
+
+        # 2. 크로스
+        with prof.stage("crosses"):
+            log.info("Analyzing US MA crosses...")
+            cross_rows = analyze_crosses(today_str, quotes)
+
+        # 3. 사유 (budget counts from the surge stage, so header fetches overlapping crosses are free)
+        with prof.stage("reasons"):
+            reasons = {}
+            if items:
+                log.info(f"Analyzing US surge reasons ({len(items)} tickers)...")
+                reasons = REASON_ENGINE.analyze(items, timeout=max(1.0, deadline - time.monotonic()))
+            log.info(f"US reasons: {len(reasons)}/{len(items)}")
+
+        # a failed sink (e.g. a Sheets 429 while SQLite succeeds) doesn't stop the other tabs,
+        # but the run exits non-zero at the end; replace-mode tabs are rewritten on the next run
+        with prof.stage("write"):
+            failed_tabs = []
+            for screen in screens:
+                if sink.write(screen.tab, screen.columns,
+                              build_rows(screen, records[screen.name], today_str, reasons)):
+                    failed_tabs.append(screen.tab)
+            if sink.write("US_크로스", TAB_HEADERS["US_크로스"], cross_rows):
+                failed_tabs.append("US_크로스")
+            sink.close()
+    finally:
+        prof.close()
+
+    # 4. 관심종목 알림 — only today's hits are looked up in the watchlist index
+    try:
+        hits = screen_hits(screens, records) + [
+            ("US_크로스", {"종목코드": row[1], "종목명": row[2], "유형": row[4], "종가": row[7]})
+            for row in cross_rows
+        ]
+        notify_watchlists(load_watchlists(), today_str, hits)
+    except Exception as e:
+        log.error(f"US watchlist alerts failed: {e}")
 
-    # 3. 경제일정 — 수동 관리 (시트에 직접 입력하거나 별도 스크립트)
-    log.info("US_경제일정 is managed manually or via separate calendar feed.")
+    # 5. 경제일정 — conditional fetch; nothing is written when the feed is unchanged
+    try:
+        refresh_calendar(sp, tabs=["US_경제일정"])
+    except Exception as e:
+        log.error(f"US calendar refresh failed: {e}")
 
-    log.info(f"=== Done: {len(surge_rows)} surges, {len(cross_rows)} crosses ===")
+    surges = sum(len(r) for r in records.values())
+    log.info(f"=== Done: {surges} surges, {len(cross_rows)} crosses ===")
+    if failed_tabs:
+        raise RuntimeError(f"US write failed for: {', '.join(failed_tabs)}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="US stock daily analysis")
+    parser.add_argument("--profile", action="store_true",
+                        help="write per-stage cProfile / flamegraph stacks / peak memory to runs/profiles/")
+    args = parser.parse_args()
+    main(profile=args.profile)
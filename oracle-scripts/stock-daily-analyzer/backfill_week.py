@@ -1,15 +1,32 @@
 #!/usr/bin/env python3
 """
 최근 1주일(5거래일) 데이터를 Google Sheets에 백필
+- 시트 기록은 쓰기 지연 큐(sheet_queue)로 보내고, 기록이 진행되는 동안 다음 날짜 수집을 계속함
+- 스크린 행은 사유 없이 기록하고, 사유 분석 항목은 사유 작업 큐(reason_queue)에 넣음
+  → 기록이 끝난 뒤 큐를 처리해 사유 칸을 채움 (남은 작업은 daemon / reason_queue.py work)
+- 더 긴 기간: python3 backfill_week.py --days 22
 """
 
 import time
 import logging
+import argparse
 from datetime import datetime, timedelta
 
 import gspread
+import pandas as pd
 from google.oauth2.service_account import Credentials
-from pykrx import stock
+
+from screens import (
+    load_screens, snapshot_frame, run_screens, to_records, build_rows, reason_items, reason_tabs,
+)
+from sinks import build_sinks, ensure_headers
+from streaks import StreakIndex, STREAK_HEADERS, streak_rows
+import krx
+from krx import KRXError
+from analyzer import detect_cross, get_ticker_name, drain_reasons
+from econ_calendar import CALENDAR_HEADERS
+from profiling import StageProfiler, profile_dir
+from reason_queue import ReasonQueue, item_codes
 
 # ---------------------------------------------------------------------------
 # Setup
@@ -20,11 +37,12 @@ log = logging.getLogger(__name__)
 GOOGLE_SHEETS_ID = "17NC0KpHBCF9ZSx3ca32jaH1kmFIo3OuETbAa9_c_hQE"
 CREDENTIALS_FILE = "/Users/jangbookeun/Downloads/stock-daily-analyzer-0af664b5b37f.json"
 
-LIMIT_UP_PCT = 29.5
-LIMIT_DOWN_PCT = -29.5
-SURGE_PCT = 5.0
-MA_SHORT = 5
-MA_LONG = 20
+TAB_HEADERS = {
+    **{screen.tab: screen.columns for screen in load_screens("KR")},
+    "크로스": ["날짜", "종목코드", "종목명", "시장", "유형", "단기MA", "장기MA", "종가"],
+    "연속": STREAK_HEADERS,
+    "경제일정": CALENDAR_HEADERS,
+}
 
 
 def connect_sheets():
@@ -38,20 +56,13 @@ def connect_sheets():
 
 
 def ensure_worksheets(spreadsheet):
-    tab_headers = {
-        "상한가": ["날짜", "종목코드", "종목명", "시장", "종가", "등락률(%)", "거래량", "사유"],
-        "하한가": ["날짜", "종목코드", "종목명", "시장", "종가", "등락률(%)", "거래량", "사유"],
-        "급등락": ["날짜", "종목코드", "종목명", "시장", "종가", "등락률(%)", "방향", "거래량", "사유"],
-        "크로스": ["날짜", "종목코드", "종목명", "시장", "유형", "단기MA", "장기MA", "종가"],
-        "경제일정": ["날짜", "이벤트명", "중요도", "예상영향", "출처URL"],
-    }
-
     existing = {ws.title: ws for ws in spreadsheet.worksheets()}
     worksheets = {}
 
-    for tab_name, headers in tab_headers.items():
+    for tab_name, headers in TAB_HEADERS.items():
         if tab_name in existing:
             worksheets[tab_name] = existing[tab_name]
+            ensure_headers(existing[tab_name], headers)
         else:
             ws = spreadsheet.add_worksheet(title=tab_name, rows=1000, cols=len(headers))
             ws.update(values=[headers], range_name="A1")
@@ -75,178 +86,75 @@ def get_recent_weekdays(n=5):
 
 
 def fetch_market_data(date, market):
+    """시세 수집 (휴장일이면 빈 DataFrame, 조회 실패면 KRXError — 휴장일로 처리하지 않음)"""
     log.info(f"  {market} {date} 시세 수집 중...")
-    try:
-        df = stock.get_market_ohlcv_by_ticker(date, market=market)
-        time.sleep(1)  # KRX API rate limit
-
-        if df.empty:
-            log.warning(f"  {market} 데이터 없음")
-            return {}
-
-        result = {}
-        for ticker in df.index:
-            try:
-                name = stock.get_market_ticker_name(ticker)
-                close = int(df.loc[ticker, "종가"])
-                volume = int(df.loc[ticker, "거래량"])
-                change_pct = float(df.loc[ticker, "등락률"])
-
-                if close == 0 or volume == 0:
-                    continue
-
-                result[ticker] = {
-                    "종목명": name,
-                    "종가": close,
-                    "거래량": volume,
-                    "등락률": round(change_pct, 2),
-                }
-            except Exception:
-                continue
-
-        log.info(f"  {market}: {len(result)}개 종목")
-        return result
-    except Exception as e:
-        log.error(f"  {market} 수집 실패: {e}")
-        return {}
-
-
-def detect_cross(date, market):
-    log.info(f"  {market} 크로스 분석 중...")
-    crosses = []
-    try:
-        end_dt = datetime.strptime(date, "%Y%m%d")
-        start_dt = end_dt - timedelta(days=90)
-        start_str = start_dt.strftime("%Y%m%d")
-
-        tickers = stock.get_market_ticker_list(date, market=market)
-        time.sleep(1)
-
-        count = 0
-        for ticker in tickers:
-            try:
-                df = stock.get_market_ohlcv(start_str, date, ticker)
-                time.sleep(0.2)  # rate limit
-
-                if len(df) < MA_LONG + 2:
-                    continue
-
-                df["MA_S"] = df["종가"].rolling(window=MA_SHORT).mean()
-                df["MA_L"] = df["종가"].rolling(window=MA_LONG).mean()
-                df = df.dropna()
-
-                if len(df) < 2:
-                    continue
-
-                prev_s, curr_s = df["MA_S"].iloc[-2], df["MA_S"].iloc[-1]
-                prev_l, curr_l = df["MA_L"].iloc[-2], df["MA_L"].iloc[-1]
-
-                cross_type = None
-                if prev_s <= prev_l and curr_s > curr_l:
-                    cross_type = "골든크로스"
-                elif prev_s >= prev_l and curr_s < curr_l:
-                    cross_type = "데드크로스"
-
-                if cross_type:
-                    name = stock.get_market_ticker_name(ticker)
-                    crosses.append({
-                        "종목코드": ticker,
-                        "종목명": name,
-                        "시장": market,
-                        "유형": cross_type,
-                        "단기MA": int(round(curr_s)),
-                        "장기MA": int(round(curr_l)),
-                        "종가": int(df["종가"].iloc[-1]),
-                    })
-
-                count += 1
-                if count % 100 == 0:
-                    log.info(f"    크로스 분석 진행: {count}/{len(tickers)}")
-
-            except Exception:
-                continue
-
-    except Exception as e:
-        log.error(f"  {market} 크로스 분석 실패: {e}")
-
-    log.info(f"  {market} 크로스: {len(crosses)}개 감지")
-    return crosses
+    fetched = krx.market_ohlcv(date, market)
+    time.sleep(1)  # KRX API rate limit
+    if fetched.failed:
+        raise KRXError(f"{market} 수집 실패: {fetched.error}")
+    if fetched.empty:
+        log.warning(f"  {market} 데이터 없음")
+    result = snapshot_frame(fetched.data, market)
+    log.info(f"  {market}: {len(result)}개 종목")
+    return result
+
+
+def process_date(date, sink, streaks, prev_date=None, prof=None, queue=None, failed=None):
+    """
+    date 하루 처리. streaks는 백필 기간 동안 메모리에만 유지하는 연속 기록
+    (운영 중인 state/streaks_KR.json은 건드리지 않음). Returns: 데이터 유무
+    prof: StageProfiler (단계명은 "{날짜}-{단계}")
+    queue: ReasonQueue (사유 분석 항목을 넣을 큐, 없으면 사유 없이 기록만)
+    failed: 일부 sink 기록이 실패한 (날짜, 탭)을 모을 목록 — 나머지 sink / 탭은 계속 기록
+    """
+    prof = prof or StageProfiler()
+    date_formatted = f"{date[:4]}-{date[4:6]}-{date[6:]}"
 
+    def write(tab: str, headers: list[str], rows: list[list[str]]):
+        if sink.write(tab, headers, rows) and failed is not None:
+            failed.append((date_formatted, tab))
 
-def process_date(date, worksheets):
-    date_formatted = f"{date[:4]}-{date[4:6]}-{date[6:]}"
     log.info(f"\n{'='*50}")
     log.info(f"처리 중: {date_formatted}")
     log.info(f"{'='*50}")
 
     # 시세 수집
-    kospi = fetch_market_data(date, "KOSPI")
-    time.sleep(2)
-    kosdaq = fetch_market_data(date, "KOSDAQ")
-    time.sleep(2)
+    with prof.stage(f"{date}-snapshot"):
+        kospi = fetch_market_data(date, "KOSPI")
+        time.sleep(2)
+        kosdaq = fetch_market_data(date, "KOSDAQ")
+        time.sleep(2)
 
-    if not kospi and not kosdaq:
+    if kospi.empty and kosdaq.empty:
         log.warning(f"  {date_formatted} 데이터 없음 (공휴일/비거래일)")
-        return
-
-    # 상한가
-    limit_up = []
-    for market_name, data in [("KOSPI", kospi), ("KOSDAQ", kosdaq)]:
-        for t, d in data.items():
-            if d["등락률"] >= LIMIT_UP_PCT:
-                limit_up.append([
-                    date_formatted, t, d["종목명"], market_name,
-                    str(d["종가"]), str(d["등락률"]), str(d["거래량"]), ""
-                ])
-    if limit_up:
-        worksheets["상한가"].insert_rows(limit_up, row=2)
-        log.info(f"  상한가: {len(limit_up)}개 기록")
-        time.sleep(1)
-    else:
-        log.info(f"  상한가: 0개")
-
-    # 하한가
-    limit_down = []
-    for market_name, data in [("KOSPI", kospi), ("KOSDAQ", kosdaq)]:
-        for t, d in data.items():
-            if d["등락률"] <= LIMIT_DOWN_PCT:
-                limit_down.append([
-                    date_formatted, t, d["종목명"], market_name,
-                    str(d["종가"]), str(d["등락률"]), str(d["거래량"]), ""
-                ])
-    if limit_down:
-        worksheets["하한가"].insert_rows(limit_down, row=2)
-        log.info(f"  하한가: {len(limit_down)}개 기록")
-        time.sleep(1)
-    else:
-        log.info(f"  하한가: 0개")
-
-    # 급등락
-    surge = []
-    for market_name, data in [("KOSPI", kospi), ("KOSDAQ", kosdaq)]:
-        for t, d in data.items():
-            if abs(d["등락률"]) >= SURGE_PCT:
-                direction = "급등" if d["등락률"] > 0 else "급락"
-                surge.append({
-                    "row": [
-                        date_formatted, t, d["종목명"], market_name,
-                        str(d["종가"]), str(d["등락률"]), direction,
-                        str(d["거래량"]), ""
-                    ],
-                    "pct": abs(d["등락률"])
-                })
-    surge.sort(key=lambda x: x["pct"], reverse=True)
-    surge_rows = [s["row"] for s in surge[:50]]
-    if surge_rows:
-        worksheets["급등락"].insert_rows(surge_rows, row=2)
-        log.info(f"  급등락: {len(surge_rows)}개 기록")
-        time.sleep(1)
-    else:
-        log.info(f"  급등락: 0개")
-
-    # 크로스 (시간이 오래 걸리므로 KOSPI만, 상위 500개 종목)
-    log.info(f"  크로스 분석 (KOSPI 대형주만)...")
-    crosses_kospi = detect_cross(date, "KOSPI")
+        return False
+
+    # 상한가 / 하한가 / 급등락 (screens.json, 사유는 큐 처리 후 채움)
+    with prof.stage(f"{date}-screens"):
+        screens = load_screens("KR")
+        hits = run_screens(screens, pd.concat([df for df in (kospi, kosdaq) if not df.empty]))
+        records = {name: to_records(df, get_ticker_name) for name, df in hits.items()}
+        streaks.update_screens(int(date), prev_date, screens, records)
+    for screen in screens:
+        rows = build_rows(screen, records[screen.name], date_formatted)
+        if rows:
+            write(screen.tab, screen.columns, rows)
+            log.info(f"  {screen.name}: {len(rows)}개 기록")
+        else:
+            log.info(f"  {screen.name}: 0개")
+    if queue is not None:
+        queued = queue.enqueue(date_formatted, [
+            (item, reason_tabs(screens, records, item_codes(item)))
+            for item in reason_items(screens, records)
+        ])
+        log.info(f"  사유 작업: {queued}개 추가")
+
+    # 크로스 (시간이 오래 걸리므로 KOSPI만, 일간 분석과 같은 detect_cross — 거래대금 순 조회 + 실패 종목 재시도)
+    log.info(f"  크로스 분석 (KOSPI만)...")
+    with prof.stage(f"{date}-crosses"):
+        crosses_kospi, coverage = detect_cross(date, "KOSPI", kospi)
+    if coverage["pending"] or coverage["error"]:
+        log.warning(f"  크로스 부분 분석: {coverage['scanned']}/{coverage['total']}개")
     time.sleep(2)
 
     cross_rows = []
@@ -256,38 +164,73 @@ def process_date(date, worksheets):
             c["유형"], str(c["단기MA"]), str(c["장기MA"]), str(c["종가"])
         ])
     if cross_rows:
-        worksheets["크로스"].insert_rows(cross_rows, row=2)
+        write("크로스", TAB_HEADERS["크로스"], cross_rows)
         log.info(f"  크로스: {len(cross_rows)}개 기록")
-        time.sleep(1)
     else:
         log.info(f"  크로스: 0개")
 
+    rows = streak_rows(streaks, int(date))
+    if rows:
+        write("연속", TAB_HEADERS["연속"], rows)
+    log.info(f"  연속: {len(rows)}개")
+
     log.info(f"  {date_formatted} 완료!")
+    return True
 
 
-def main():
+def main(spreadsheet=None, worksheets=None, days: int = 5, profile: bool = False):
     log.info("=== 최근 1주일 백필 시작 ===")
 
-    spreadsheet = connect_sheets()
-    log.info("Google Sheets 연결 성공")
+    if spreadsheet is None:
+        spreadsheet = connect_sheets()
+        log.info("Google Sheets 연결 성공")
 
-    worksheets = ensure_worksheets(spreadsheet)
-    log.info("시트 탭 확인 완료")
+    if worksheets is None:
+        worksheets = ensure_worksheets(spreadsheet)
+        log.info("시트 탭 확인 완료")
 
-    dates = get_recent_weekdays(n=5)
-    log.info(f"처리할 날짜: {dates}")
+    # 여러 날짜의 행을 모아 분당 쓰기 한도에 맞춰 기록
+    sink = build_sinks(spreadsheet, worksheets, queued=True)
 
-    # 오래된 날짜부터 처리
-    for date in dates:
-        try:
-            process_date(date, worksheets)
-        except Exception as e:
-            log.error(f"  {date} 처리 실패: {e}")
-            continue
-        time.sleep(3)  # 날짜 간 간격
+    dates = get_recent_weekdays(n=days)
+    log.info(f"처리할 날짜: {dates}")
 
+    # 오래된 날짜부터 처리 (연속 기록은 데이터가 있던 직전 날짜 기준)
+    streaks = StreakIndex()
+    prev_date = None
+    failed_writes = []
+    queue = ReasonQueue()
+    prof = StageProfiler(profile, profile_dir("backfill") if profile else None)
+    try:
+        for date in dates:
+            try:
+                if process_date(date, sink, streaks, prev_date, prof, queue, failed_writes):
+                    prev_date = int(date)
+            except Exception as e:
+                log.error(f"  {date} 처리 실패: {e}")
+                continue
+            time.sleep(3)  # 날짜 간 간격
+
+        log.info("남은 시트 기록 대기 중...")
+        with prof.stage("write"):
+            sink.close()
+    finally:
+        queue.close()
+        prof.close()
+
+    # 행이 모두 기록된 뒤에 사유 칸 채움 (분석 설정은 analyzer와 공유)
+    with_reasons = drain_reasons(spreadsheet, worksheets, budget=0)
+    log.info(f"사유 기록: {with_reasons.get('done', 0)}개 항목")
+    if failed_writes:
+        # Sheets / SQLite 중 하나라도 실패한 탭이 있으면 비정상 종료 (daemon / cron에서 실패로 보임)
+        raise RuntimeError("기록 실패: " + ", ".join(f"{d} {tab}" for d, tab in failed_writes))
     log.info("\n=== 백필 완료 ===")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="최근 N 평일 백필")
+    parser.add_argument("--days", type=int, default=5, help="백필할 평일 수 (기본 5)")
+    parser.add_argument("--profile", action="store_true",
+                        help="단계별 cProfile / 스택 샘플(flamegraph) / 메모리 peak를 runs/profiles/에 기록")
+    args = parser.parse_args()
+    main(days=args.days, profile=args.profile)
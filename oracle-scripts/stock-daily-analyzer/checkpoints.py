@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+실행 단계별 체크포인트
+- 날짜별 실행 디렉터리(runs/YYYYMMDD/)에 단계 결과를 저장
+  DataFrame → 압축 pickle(.pkl.gz), 그 외 → JSON
+- manifest.json에 완료된 단계 기록 → 재실행 시 첫 미완료 단계부터 이어서 실행
+- 첫 미완료 단계 이후의 결과는 무효화 (앞 단계가 바뀌면 뒤 단계도 다시 계산)
+- --from-stage: 지정 단계와 그 이후 결과를 지우고 다시 실행
+- 모든 파일은 임시 파일에 쓴 뒤 교체 (중간 실패 시 이전 결과 보존)
+"""
+
+import os
+import json
+import shutil
+import logging
+from pathlib import Path
+from typing import Any, Optional
+
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+RUNS_DIR = Path(os.getenv("RUNS_DIR", str(Path(__file__).parent / "runs")))
+# 보관할 실행 디렉터리 수 (오래된 것부터 삭제)
+RUNS_KEEP = int(os.getenv("RUNS_KEEP", "14"))
+
+
+def _json_default(o):
+    # numpy 스칼라 (np.int64 등)
+    if hasattr(o, "item"):
+        return o.item()
+    raise TypeError(f"JSON 직렬화 불가: {type(o).__name__}")
+
+
+class RunCheckpoint:
+    """한 번의 실행(run_id)에 대한 단계별 결과 저장소"""
+
+    def __init__(self, run_id: str, stages: list[str], root: Path = RUNS_DIR,
+                 from_stage: Optional[str] = None):
+        self.dir = root / run_id
+        self.stages = stages
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._manifest = self.dir / "manifest.json"
+        self.completed: list[str] = self._read_manifest()
+
+        if from_stage is not None:
+            if from_stage not in stages:
+                raise ValueError(f"알 수 없는 단계: {from_stage} (가능: {', '.join(stages)})")
+            self.reset(from_stage)
+        else:
+            # 첫 미완료 단계의 진행 중 결과(complete=False)는 남기고 그 이후만 무효화
+            first = self.first_incomplete()
+            if first is not None and first != stages[-1]:
+                self.reset(stages[stages.index(first) + 1])
+
+    # -- manifest ----------------------------------------------------------
+    def _read_manifest(self) -> list[str]:
+        if not self._manifest.exists():
+            return []
+        try:
+            with open(self._manifest, encoding="utf-8") as f:
+                return json.load(f).get("completed", [])
+        except Exception as e:
+            log.warning(f"체크포인트 manifest 손상, 처음부터 실행: {e}")
+            return []
+
+    def _write_json(self, path: Path, value: Any):
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False, default=_json_default)
+        os.replace(tmp, path)
+
+    def first_incomplete(self) -> Optional[str]:
+        for stage in self.stages:
+            if stage not in self.completed:
+                return stage
+        return None
+
+    def complete(self) -> bool:
+        return self.first_incomplete() is None
+
+    def done(self, stage: str) -> bool:
+        return stage in self.completed
+
+    def reset(self, stage: str):
+        """stage와 그 이후 단계 결과 삭제"""
+        later = self.stages[self.stages.index(stage):]
+        for name in later:
+            for path in self.dir.glob(f"{name}.*"):
+                path.unlink()
+        self.completed = [s for s in self.completed if s not in later]
+        self._write_json(self._manifest, {"completed": self.completed})
+
+    # -- 저장 / 로드 -------------------------------------------------------
+    def save(self, stage: str, value: Any, complete: bool = True):
+        """단계 결과 저장. complete=False면 진행 중 결과만 저장 (완료 표시 안 함)"""
+        if isinstance(value, pd.DataFrame):
+            path = self.dir / f"{stage}.pkl.gz"
+            tmp = self.dir / f"{stage}.tmp.pkl.gz"
+            value.to_pickle(tmp)
+            os.replace(tmp, path)
+        else:
+            self._write_json(self.dir / f"{stage}.json", value)
+        if complete and stage not in self.completed:
+            self.completed.append(stage)
+            self._write_json(self._manifest, {"completed": self.completed})
+
+    def load(self, stage: str, default: Any = None) -> Any:
+        frame = self.dir / f"{stage}.pkl.gz"
+        if frame.exists():
+            return pd.read_pickle(frame)
+        path = self.dir / f"{stage}.json"
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        return default
+
+
+def prune_runs(root: Path = RUNS_DIR, keep: int = RUNS_KEEP):
+    """최근 keep개 실행 디렉터리만 남김"""
+    if not root.exists():
+        return
+    runs = sorted(p for p in root.iterdir() if p.is_dir() and p.name.isdigit())
+    for path in runs[:-keep] if keep > 0 else runs:
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+상주 스케줄러 (daemon 모드)
+- 한국 분석 (평일 16:30 KST), 미국 분석 (화~토 06:00 KST)을 한 프로세스에서 실행
+- 장중 스크린 (평일 09:00~15:30 KST, intraday.py)도 같은 프로세스에서 실행
+- 사유 작업 큐 재시도 (평일 18:00 KST, reason_queue.py) — 한국 분석 직후 처리하지 못한 사유 채움
+- gspread 인증, HTTP 세션, Anthropic 클라이언트, 워크시트 메타데이터, 종목명 캐시를 실행 간 재사용
+- 로컬 상태 엔드포인트:
+    GET  /health          → 작업별 마지막 실행 결과 / 다음 실행 시각
+    POST /run/<job>       → 즉시 실행 요청 (kr, us, backfill, intraday, reasons)
+cron 실행(run.sh / run_us.sh)은 그대로 유지되며 daemon이 없을 때의 대안으로 사용
+"""
+
+import os
+import json
+import queue
+import logging
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+
+import analyzer
+import analyzer_us
+import backfill_week
+import intraday
+
+log = logging.getLogger(__name__)
+
+KST = ZoneInfo("Asia/Seoul")
+DAEMON_HOST = os.getenv("DAEMON_HOST", "127.0.0.1")
+DAEMON_PORT = int(os.getenv("DAEMON_PORT", "8787"))
+
+
+class Job:
+    """KST 기준 요일/시각에 실행되는 작업"""
+
+    def __init__(self, name: str, func: Callable[[], None],
+                 hour: Optional[int] = None, minute: int = 0,
+                 weekdays: tuple = ()):
+        self.name = name
+        self.func = func
+        self.hour = hour
+        self.minute = minute
+        self.weekdays = weekdays  # 0=월 ... 6=일, 비어 있으면 수동 실행 전용
+        self.runs = 0
+        # 마지막으로 처리한 예약 시각 (daemon 시작 전에 지난 예약은 실행하지 않음)
+        self.last_slot: Optional[datetime] = None
+        self.last_start: Optional[datetime] = None
+        self.last_end: Optional[datetime] = None
+        self.last_status = "never"
+        self.last_error = ""
+
+    def next_run(self, now: datetime) -> Optional[datetime]:
+        if self.hour is None or not self.weekdays:
+            return None
+        candidate = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        for _ in range(8):
+            if candidate > now and candidate.weekday() in self.weekdays:
+                return candidate
+            candidate += timedelta(days=1)
+        return None
+
+    def prev_run(self, now: datetime) -> Optional[datetime]:
+        """now 이전(포함) 가장 최근 예약 시각"""
+        if self.hour is None or not self.weekdays:
+            return None
+        candidate = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        for _ in range(8):
+            if candidate <= now and candidate.weekday() in self.weekdays:
+                return candidate
+            candidate -= timedelta(days=1)
+        return None
+
+    def due(self, now: datetime) -> Optional[datetime]:
+        """아직 실행하지 않은 지난 예약 시각 (없으면 None)"""
+        slot = self.prev_run(now)
+        if slot is None or (self.last_slot is not None and slot <= self.last_slot):
+            return None
+        return slot
+
+    def status(self, now: datetime) -> dict:
+        next_at = self.next_run(now)
+        return {
+            "runs": self.runs,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+            "last_start": self.last_start.isoformat() if self.last_start else None,
+            "last_end": self.last_end.isoformat() if self.last_end else None,
+            "last_slot": self.last_slot.isoformat() if self.last_slot else None,
+            "next_run": next_at.isoformat() if next_at else None,
+        }
+
+
+class Daemon:
+    """작업 스케줄링 + 실행 간 공유 리소스 보관"""
+
+    def __init__(self):
+        self.started_at = datetime.now(KST)
+        self.requests: "queue.Queue[str]" = queue.Queue()
+        self.running: Optional[str] = None
+        self._kr_spreadsheet = None
+        self._kr_worksheets = None
+        self._us_spreadsheet = None
+        self.jobs = {
+            "kr": Job("kr", self._run_kr, hour=16, minute=30, weekdays=(0, 1, 2, 3, 4)),
+            "us": Job("us", self._run_us, hour=6, minute=0, weekdays=(1, 2, 3, 4, 5)),
+            "intraday": Job("intraday", self._run_intraday, hour=9, minute=0, weekdays=(0, 1, 2, 3, 4)),
+            "reasons": Job("reasons", self._run_reasons, hour=18, minute=0, weekdays=(0, 1, 2, 3, 4)),
+            "backfill": Job("backfill", self._run_backfill),
+        }
+
+    # -- 공유 리소스 --------------------------------------------------------
+    def kr_sheets(self):
+        if self._kr_spreadsheet is None:
+            self._kr_spreadsheet = analyzer.connect_sheets()
+            self._kr_worksheets = analyzer.ensure_worksheets(self._kr_spreadsheet)
+            log.info("한국 시트 연결 (캐시)")
+        return self._kr_spreadsheet, self._kr_worksheets
+
+    def us_sheets(self):
+        if self._us_spreadsheet is None:
+            self._us_spreadsheet = analyzer_us.connect_sheets()
+            log.info("US sheet connected (cached)")
+        return self._us_spreadsheet
+
+    def reset_sheets(self):
+        """실패 후 다음 실행에서 재연결하도록 캐시 제거"""
+        self._kr_spreadsheet = None
+        self._kr_worksheets = None
+        self._us_spreadsheet = None
+
+    # -- 작업 --------------------------------------------------------------
+    def _run_kr(self):
+        spreadsheet, worksheets = self.kr_sheets()
+        analyzer.main(spreadsheet=spreadsheet, worksheets=worksheets)
+
+    def _run_us(self):
+        analyzer_us.main(sp=self.us_sheets())
+
+    def _run_intraday(self):
+        spreadsheet, _ = self.kr_sheets()
+        intraday.main(spreadsheet=spreadsheet)
+
+    def _run_backfill(self):
+        spreadsheet, worksheets = self.kr_sheets()
+        backfill_week.main(spreadsheet=spreadsheet, worksheets=worksheets)
+
+    def _run_reasons(self):
+        spreadsheet, worksheets = self.kr_sheets()
+        analyzer.drain_reasons(spreadsheet, worksheets)
+
+    def run_job(self, name: str):
+        job = self.jobs[name]
+        job.last_start = datetime.now(KST)
+        job.runs += 1
+        self.running = name
+        log.info(f"[daemon] '{name}' 실행 시작")
+        try:
+            job.func()
+            job.last_status = "ok"
+            job.last_error = ""
+        except (Exception, SystemExit) as e:
+            # analyzer_us.main은 설정 오류 시 sys.exit(1) 호출 → daemon은 유지
+            job.last_status = "error"
+            job.last_error = str(e)
+            log.error(f"[daemon] '{name}' 실패: {e}", exc_info=not isinstance(e, SystemExit))
+            self.reset_sheets()
+        finally:
+            job.last_end = datetime.now(KST)
+            self.running = None
+        log.info(f"[daemon] '{name}' 종료 ({job.last_status})")
+
+    # -- 스케줄러 ----------------------------------------------------------
+    def next_due(self, now: datetime) -> tuple[Optional[str], Optional[datetime]]:
+        """다음에 돌아올 예약 (대기 시간 계산용)"""
+        due = [(job.next_run(now), name) for name, job in self.jobs.items()]
+        due = [(at, name) for at, name in due if at is not None]
+        if not due:
+            return None, None
+        at, name = min(due)
+        return name, at
+
+    def overdue(self, now: datetime) -> list[tuple[datetime, str]]:
+        """예약 시각이 지났는데 아직 실행하지 않은 작업 (예약 시각 순)
+        — 다른 작업이 실행 중이던 동안 지난 예약도 모두 포함"""
+        return sorted((slot, name) for name, job in self.jobs.items()
+                      if (slot := job.due(now)) is not None)
+
+    def run_overdue(self):
+        while True:
+            pending = self.overdue(datetime.now(KST))
+            if not pending:
+                return
+            slot, name = pending[0]
+            self.jobs[name].last_slot = slot
+            self.run_job(name)
+
+    def loop(self):
+        # 시작 시점에 이미 지난 예약은 건너뜀 (재시작 직후 하루치 작업이 몰려 실행되지 않도록)
+        start = datetime.now(KST)
+        for job in self.jobs.values():
+            job.last_slot = job.prev_run(start)
+        while True:
+            now = datetime.now(KST)
+            name, at = self.next_due(now)
+            timeout = max(0.0, (at - now).total_seconds()) if at else None
+            log.info(f"[daemon] 다음 예약: {name} @ {at.isoformat() if at else '-'}")
+            try:
+                requested = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                requested = None
+
+            if requested is not None:
+                self.run_job(requested)
+            # 수동 실행 / 다른 예약 작업이 실행되는 동안 지난 예약도 모두 실행
+            self.run_overdue()
+
+    def status(self) -> dict:
+        now = datetime.now(KST)
+        return {
+            "status": "running" if self.running else "idle",
+            "running": self.running,
+            "started_at": self.started_at.isoformat(),
+            "uptime_sec": int((now - self.started_at).total_seconds()),
+            "queued": self.requests.qsize(),
+            "jobs": {name: job.status(now) for name, job in self.jobs.items()},
+        }
+
+
+# ---------------------------------------------------------------------------
+# 상태 엔드포인트
+# ---------------------------------------------------------------------------
+def make_handler(daemon: Daemon):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, body: dict):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path in ("/", "/health"):
+                self._send(200, daemon.status())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            parts = self.path.strip("/").split("/")
+            if len(parts) == 2 and parts[0] == "run" and parts[1] in daemon.jobs:
+                daemon.requests.put(parts[1])
+                self._send(202, {"queued": parts[1]})
+            else:
+                self._send(404, {"error": "unknown job"})
+
+        def log_message(self, format, *args):
+            log.debug("health: " + format % args)
+
+    return Handler
+
+
+def main():
+    daemon = Daemon()
+    server = ThreadingHTTPServer((DAEMON_HOST, DAEMON_PORT), make_handler(daemon))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    log.info(f"=== daemon 시작 (상태: http://{DAEMON_HOST}:{DAEMON_PORT}/health) ===")
+    try:
+        daemon.loop()
+    except KeyboardInterrupt:
+        log.info("daemon 종료")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
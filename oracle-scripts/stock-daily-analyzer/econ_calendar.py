@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+경제일정 수집 → 경제일정 / US_경제일정 탭 (증분 기록)
+- 소스는 교체 가능: ForexFactory 주간 JSON(대시보드와 같은 피드), 로컬 JSON(같은 형식, 오프라인 / 테스트)
+- 조건부 요청 (If-None-Match / If-Modified-Since) → 304면 내려받기 / 파싱 없이 종료
+- 로컬 이벤트 저장소(SQLite, (날짜, 시각, 통화, 이벤트명) 키) + 탭별 마지막 기록 내용 해시
+  (같은 날 같은 제목이 여러 번 있는 이벤트 — 연설, 입찰 등 — 는 UTC 시각으로 구분)
+  → 새 이벤트만 탭 상단에 삽입, 내용이 바뀐 이벤트는 바뀐 칸만 덮어씀, 변경 없으면 Sheets 호출 없음
+- 시트에 직접 입력한 행은 건드리지 않음 (저장소에 없는 이벤트)
+
+CLI:
+  python3 econ_calendar.py                     # 두 탭 모두 갱신
+  python3 econ_calendar.py --tab US_경제일정 --dry-run
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+from datetime import datetime, timezone
+from email.utils import formatdate
+from pathlib import Path
+from typing import Optional
+
+import requests
+
+from sinks import build_sinks, ensure_headers
+
+log = logging.getLogger(__name__)
+
+CALENDAR_DB_PATH = os.getenv(
+    "CALENDAR_DB_PATH", str(Path(__file__).parent / "calendar.db")
+)
+# 비어 있지 않으면 ForexFactory 대신 이 JSON 파일 사용 (ForexFactory 형식)
+CALENDAR_FILE = os.getenv("CALENDAR_FILE", "")
+FOREXFACTORY_URL = "https://nfs.faireconomy.media/ff_calendar_thisweek.json"
+
+# 시각(UTC HH:MM)은 끝 컬럼 — 기존 탭은 ensure_headers로 확장, 시트 / SQLite 행 키는 "이벤트명:시각"
+CALENDAR_HEADERS = ["날짜", "이벤트명", "중요도", "예상영향", "출처URL", "시각"]
+# 행 키 컬럼 (바뀐 칸만 덮어쓸 때 제외)
+KEY_HEADERS = ("날짜", "이벤트명", "시각")
+MAJOR_CURRENCIES = {"USD", "EUR", "JPY", "GBP", "CNY", "AUD", "CAD", "CHF", "NZD"}
+# 탭별 이벤트 필터 (통화)
+CALENDAR_TABS = {
+    "경제일정": None,
+    "US_경제일정": {"USD"},
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calendar_events (
+    date     TEXT NOT NULL,
+    time     TEXT NOT NULL,
+    country  TEXT NOT NULL,
+    event    TEXT NOT NULL,
+    data     TEXT NOT NULL,
+    hash     TEXT NOT NULL,
+    updated  REAL NOT NULL,
+    PRIMARY KEY (date, time, country, event)
+);
+CREATE TABLE IF NOT EXISTS calendar_written (
+    tab     TEXT NOT NULL,
+    date    TEXT NOT NULL,
+    time    TEXT NOT NULL,
+    country TEXT NOT NULL,
+    event   TEXT NOT NULL,
+    hash    TEXT NOT NULL,
+    data    TEXT NOT NULL,
+    PRIMARY KEY (tab, date, time, country, event)
+);
+CREATE TABLE IF NOT EXISTS calendar_sources (
+    source        TEXT PRIMARY KEY,
+    etag          TEXT NOT NULL DEFAULT '',
+    last_modified TEXT NOT NULL DEFAULT '',
+    checked       REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+# ---------------------------------------------------------------------------
+# 소스
+# ---------------------------------------------------------------------------
+class CalendarSource:
+    """
+    fetch(validators) → 원본 이벤트 목록 (ForexFactory 형식), 바뀐 게 없으면 None
+    validators: {"etag", "last_modified"} — 응답에 맞게 갱신함
+    """
+
+    name = "base"
+
+    def fetch(self, validators: dict) -> Optional[list[dict]]:
+        raise NotImplementedError
+
+
+class ForexFactorySource(CalendarSource):
+    name = "forexfactory"
+
+    def __init__(self, url: str = FOREXFACTORY_URL):
+        self.url = url
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "Mozilla/5.0"})
+
+    def fetch(self, validators: dict) -> Optional[list[dict]]:
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        resp = self.session.get(self.url, headers=headers, timeout=10)
+        if resp.status_code == 304:
+            return None
+        resp.raise_for_status()
+        validators["etag"] = resp.headers.get("ETag", "")
+        validators["last_modified"] = resp.headers.get("Last-Modified", "")
+        return resp.json() or []
+
+
+class LocalCalendarSource(CalendarSource):
+    """로컬 JSON 파일 (수정 시각을 Last-Modified로 사용)"""
+
+    name = "local"
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def fetch(self, validators: dict) -> Optional[list[dict]]:
+        modified = formatdate(self.path.stat().st_mtime, usegmt=True)
+        if validators.get("last_modified") == modified:
+            return None
+        with open(self.path, encoding="utf-8") as f:
+            events = json.load(f)
+        validators["last_modified"] = modified
+        return events
+
+
+def calendar_source() -> CalendarSource:
+    return LocalCalendarSource(CALENDAR_FILE) if CALENDAR_FILE else ForexFactorySource()
+
+
+def normalize(raw: list[dict]) -> list[dict]:
+    """
+    ForexFactory 이벤트 → 탭 행 dict (대시보드 route.ts의 fetchForexFactory와 같은 규칙)
+    중요도 High/Medium, 주요 통화만. 날짜 / 시각은 UTC 기준
+    """
+    events = []
+    for e in raw:
+        if e.get("impact") not in ("High", "Medium") or e.get("country") not in MAJOR_CURRENCIES:
+            continue
+        try:
+            at = datetime.fromisoformat(e["date"]).astimezone(timezone.utc)
+        except (KeyError, ValueError) as err:
+            log.warning(f"경제일정 날짜 해석 실패 ({e.get('title')}): {err}")
+            continue
+        forecast = ", ".join(
+            text for text in (
+                f"예상: {e['forecast']}" if e.get("forecast") else "",
+                f"이전: {e['previous']}" if e.get("previous") else "",
+            ) if text
+        )
+        events.append({
+            "날짜": at.strftime("%Y-%m-%d"),
+            "이벤트명": f"[{e['country']}] {e['title']}",
+            "중요도": "상" if e["impact"] == "High" else "중",
+            "예상영향": forecast or "-",
+            "출처URL": "https://www.forexfactory.com/calendar",
+            "시각": at.strftime("%H:%M"),
+            "country": e["country"],
+        })
+    return events
+
+
+def _key(row: dict) -> tuple[str, str]:
+    """시트 / SQLite 행 키 (날짜, "이벤트명:시각") — sinks.KEY_SUFFIX_COLUMNS와 같은 규칙"""
+    return row["날짜"], f"{row['이벤트명']}:{row['시각']}"
+
+
+def _hash(row: dict) -> str:
+    payload = json.dumps([row[h] for h in CALENDAR_HEADERS], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=12).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# 저장소
+# ---------------------------------------------------------------------------
+class CalendarStore:
+    def __init__(self, path: str = CALENDAR_DB_PATH):
+        self.conn = sqlite3.connect(path)
+        self._migrate()
+        self.conn.executescript(SCHEMA)
+
+    def _migrate(self):
+        """
+        (날짜, 이벤트명) 키였던 저장소 → 시각 / 통화 포함 키
+        이벤트는 다시 내려받고, 기록 표시는 다음 수집 때 (날짜, 이벤트명)이 같은 이벤트로 이어받음
+        (이미 시트에 있는 이벤트를 새 이벤트로 다시 삽입하지 않도록)
+        """
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(calendar_events)")]
+        if not columns or "time" in columns:
+            return
+        log.info("경제일정 저장소: 시각 포함 키로 변환")
+        with self.conn:
+            self.conn.execute("DROP TABLE calendar_events")
+            self.conn.execute("ALTER TABLE calendar_written RENAME TO calendar_written_legacy")
+            self.conn.execute("DELETE FROM calendar_sources")   # 304로 건너뛰지 않도록
+
+    def _adopt_legacy(self):
+        """이전 키로 기록 표시된 이벤트를 새 키로 옮기고 이전 표를 삭제 (_migrate 다음 첫 수집에서 한 번)"""
+        if not self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'calendar_written_legacy'"
+        ).fetchone():
+            return
+        self.conn.execute(
+            "INSERT OR IGNORE INTO calendar_written (tab, date, time, country, event, hash, data) "
+            "SELECT l.tab, e.date, e.time, e.country, e.event, e.hash, e.data "
+            "FROM calendar_written_legacy l JOIN calendar_events e ON e.date = l.date AND e.event = l.event"
+        )
+        self.conn.execute("DROP TABLE calendar_written_legacy")
+
+    def validators(self, source: str) -> dict:
+        row = self.conn.execute(
+            "SELECT etag, last_modified FROM calendar_sources WHERE source = ?", (source,)
+        ).fetchone()
+        return {"etag": row[0], "last_modified": row[1]} if row else {}
+
+    def set_validators(self, source: str, validators: dict):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO calendar_sources (source, etag, last_modified, checked) "
+                "VALUES (?, ?, ?, ?)",
+                (source, validators.get("etag", ""), validators.get("last_modified", ""), time.time()),
+            )
+
+    def upsert(self, events: list[dict]) -> int:
+        """Returns: 새로 생기거나 내용이 바뀐 이벤트 수"""
+        now = time.time()
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT INTO calendar_events (date, time, country, event, data, hash, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (date, time, country, event) DO UPDATE SET "
+                "data = excluded.data, hash = excluded.hash, "
+                "updated = excluded.updated WHERE calendar_events.hash != excluded.hash",
+                [
+                    (e["날짜"], e["시각"], e["country"], e["이벤트명"],
+                     json.dumps({h: e[h] for h in CALENDAR_HEADERS}, ensure_ascii=False), _hash(e), now)
+                    for e in events
+                ],
+            )
+            changed = self.conn.total_changes - before
+            self._adopt_legacy()
+            return changed
+
+    def pending(self, tab: str, countries: Optional[set]) -> tuple[list[dict], list[tuple[dict, dict]]]:
+        """
+        tab에 아직 기록하지 않은 이벤트
+        Returns: (새 이벤트, [(바뀐 이벤트, 마지막으로 기록한 내용)])
+        """
+        new, changed = [], []
+        for data, country, written in self.conn.execute(
+            "SELECT e.data, e.country, w.data FROM calendar_events e "
+            "LEFT JOIN calendar_written w ON w.tab = ? AND w.date = e.date AND w.time = e.time "
+            "AND w.country = e.country AND w.event = e.event "
+            "WHERE w.hash IS NULL OR w.hash != e.hash "
+            "ORDER BY e.date DESC, e.time DESC, e.event",
+            (tab,),
+        ):
+            if countries is not None and country not in countries:
+                continue
+            row = json.loads(data)
+            row["country"] = country
+            if written is None:
+                new.append(row)
+            else:
+                changed.append((row, json.loads(written)))
+        return new, changed
+
+    def mark_written(self, tab: str, rows: list[dict]):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO calendar_written (tab, date, time, country, event, hash, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(tab, r["날짜"], r["시각"], r["country"], r["이벤트명"], _hash(r),
+                  json.dumps({h: r[h] for h in CALENDAR_HEADERS}, ensure_ascii=False)) for r in rows],
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+# ---------------------------------------------------------------------------
+# 갱신
+# ---------------------------------------------------------------------------
+def ingest(store: CalendarStore, source: CalendarSource) -> int:
+    """소스 → 저장소. Returns: 새로 생기거나 바뀐 이벤트 수 (304면 0)"""
+    validators = store.validators(source.name)
+    raw = source.fetch(validators)
+    if raw is None:
+        log.info(f"경제일정: {source.name} 변경 없음 (304)")
+        return 0
+    changed = store.upsert(normalize(raw))
+    store.set_validators(source.name, validators)
+    log.info(f"경제일정: {source.name} 이벤트 {len(raw)}개 수신, 새로/변경 {changed}개")
+    return changed
+
+
+def write_tab(store: CalendarStore, sink, tab: str, countries: Optional[set]) -> int:
+    """새 이벤트는 상단에 삽입, 바뀐 이벤트는 바뀐 칸만 덮어씀. Returns: 기록한 이벤트 수"""
+    new, changed = store.pending(tab, countries)
+    if not new and not changed:
+        log.info(f"  {tab}: 변경 없음")
+        return 0
+    # 기록 표시는 모든 sink(특히 Sheets)가 성공한 행만 — MultiSink는 일부 sink 실패를 로그로만 남기므로
+    #   실패한 행은 다음 실행에서 다시 기록 (SQLite는 같은 키로 덮어쓰고, patch는 바뀐 칸만 씀)
+    done = []
+    if new:
+        try:
+            failed = sink.write(tab, CALENDAR_HEADERS, [[r[h] for h in CALENDAR_HEADERS] for r in new])
+        except Exception as e:
+            log.error(f"  {tab}: 새 이벤트 기록 실패: {e}")
+            failed = [sink]
+        if failed:
+            log.warning(f"  {tab}: 새 이벤트 {len(new)}개는 다음 실행에서 다시 기록")
+        else:
+            done += new
+    try:
+        for column in CALENDAR_HEADERS:
+            if column in KEY_HEADERS:
+                continue
+            values = {
+                _key(row): row[column]
+                for row, written in changed if row[column] != written.get(column)
+            }
+            if values:
+                sink.patch(tab, column, values, overwrite=True)
+        done += [row for row, _ in changed]
+    except Exception as e:
+        log.error(f"  {tab}: 변경 이벤트 기록 실패 (다음 실행에서 다시 기록): {e}")
+    store.mark_written(tab, done)
+    log.info(f"  {tab}: 새 이벤트 {len(new)}개, 변경 {len(changed)}개 (기록 완료 {len(done)}개)")
+    return len(done)
+
+
+def refresh(spreadsheet, worksheets: Optional[dict] = None, tabs: Optional[list[str]] = None,
+            source: Optional[CalendarSource] = None, path: str = CALENDAR_DB_PATH) -> int:
+    """
+    경제일정 수집 + 탭 기록 (analyzer / analyzer_us / daemon 공용)
+    tabs: 기록할 탭 (기본: 경제일정, US_경제일정)
+    """
+    tabs = tabs or list(CALENDAR_TABS)
+    store = CalendarStore(path)
+    try:
+        try:
+            ingest(store, source or calendar_source())
+        except Exception as e:
+            # 수집 실패해도 저장소에 남은 미기록 이벤트는 기록
+            log.warning(f"경제일정 수집 실패: {e}")
+        if spreadsheet is not None:
+            # 시각 컬럼이 없던 기존 탭은 헤더 확장 (바뀐 칸 덮어쓰기가 "이벤트명:시각"으로 행을 찾음)
+            existing = worksheets or {ws.title: ws for ws in spreadsheet.worksheets()}
+            for tab in tabs:
+                if tab in existing:
+                    ensure_headers(existing[tab], CALENDAR_HEADERS)
+        sink = build_sinks(spreadsheet, worksheets)
+        try:
+            return sum(write_tab(store, sink, tab, CALENDAR_TABS[tab]) for tab in tabs)
+        finally:
+            sink.close()
+    finally:
+        store.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    parser = argparse.ArgumentParser(description="경제일정 수집 / 탭 기록")
+    parser.add_argument("--tab", action="append", choices=list(CALENDAR_TABS),
+                        help="기록할 탭 (여러 번 지정 가능, 기본: 전부)")
+    parser.add_argument("--db", default=CALENDAR_DB_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="수집 / 저장소 갱신만, 기록할 이벤트 출력")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        store = CalendarStore(args.db)
+        try:
+            ingest(store, calendar_source())
+            for tab in args.tab or list(CALENDAR_TABS):
+                new, changed = store.pending(tab, CALENDAR_TABS[tab])
+                print(f"{tab}: 새 이벤트 {len(new)}개, 변경 {len(changed)}개")
+                for row in new + [row for row, _ in changed]:
+                    print("  " + " | ".join(row[h] for h in CALENDAR_HEADERS))
+        finally:
+            store.close()
+        return
+
+    # 시트 연결은 analyzer 설정(.env, credentials.json) 사용
+    import analyzer
+    refresh(analyzer.connect_sheets(), tabs=args.tab, path=args.db)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+메모리 내 가짜 Google Sheets (부하 테스트 / 로컬 실행용)
+- gspread Spreadsheet / Worksheet 중 이 프로젝트가 쓰는 메서드만 구현
+  (SheetsSink, ensure_worksheets, ensure_headers, seed_sample, 사유 patch)
+- API 호출 횟수를 메서드별로 집계 (calls) → 실제 Sheets 쓰기 한도 대비 확인
+- dump(dir): 탭별 CSV로 저장 (대시보드 파서 확인용)
+"""
+
+import csv
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+_A1_RE = re.compile(r"^([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?$")
+
+
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet: "FakeSpreadsheet", title: str, rows: int = 1000, cols: int = 26):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self.cells: list[list[str]] = []
+
+    def _call(self, name: str):
+        self.spreadsheet.calls[name] += 1
+
+    # -- 읽기 --------------------------------------------------------------
+    def get_all_values(self) -> list[list[str]]:
+        self._call("get_all_values")
+        width = max((len(r) for r in self.cells), default=0)
+        return [[str(v) for v in r] + [""] * (width - len(r)) for r in self.cells]
+
+    def get_values(self, range_name: str = "") -> list[list[str]]:
+        """A1 범위 읽기 (범위 안에서 끝쪽 빈 행/열은 잘라서 돌려줌 — gspread와 같음)"""
+        self._call("get_values")
+        m = _A1_RE.match(range_name.split("!")[-1]) if range_name else None
+        if range_name and not m:
+            raise ValueError(f"지원하지 않는 범위: {range_name}")
+        row0, col0 = (int(m.group(2)) - 1, _col_index(m.group(1)) - 1) if m else (0, 0)
+        row1 = int(m.group(4)) if m and m.group(4) else (row0 + 1 if m else len(self.cells))
+        col1 = _col_index(m.group(3)) if m and m.group(3) else (col0 + 1 if m else self.col_count)
+        values = []
+        for row in self.cells[row0:row1]:
+            cells = [str(v) for v in row[col0:col1]]
+            while cells and cells[-1] == "":
+                cells.pop()
+            values.append(cells)
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def row_values(self, row: int) -> list[str]:
+        self._call("row_values")
+        if row > len(self.cells):
+            return []
+        values = [str(v) for v in self.cells[row - 1]]
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    # -- 쓰기 --------------------------------------------------------------
+    def _set(self, range_name: str, values: list[list]):
+        m = _A1_RE.match(range_name.split("!")[-1])
+        if not m:
+            raise ValueError(f"지원하지 않는 범위: {range_name}")
+        row0, col0 = int(m.group(2)) - 1, _col_index(m.group(1)) - 1
+        if row0 + len(values) > self.row_count:
+            raise ValueError(f"'{self.title}' 범위 {range_name}이 그리드({self.row_count}행)를 넘음")
+        width = max((len(r) for r in values), default=0)
+        if col0 + width > self.col_count:
+            # 실제 Sheets도 "exceeds grid limits"로 거부
+            raise ValueError(f"'{self.title}' 범위 {range_name}이 그리드({self.col_count}열)를 넘음")
+        for i, values_row in enumerate(values):
+            r = row0 + i
+            while len(self.cells) <= r:
+                self.cells.append([])
+            row = self.cells[r]
+            if len(row) < col0 + len(values_row):
+                row.extend([""] * (col0 + len(values_row) - len(row)))
+            row[col0:col0 + len(values_row)] = ["" if v is None else v for v in values_row]
+        self._trim()
+
+    def _trim(self):
+        while self.cells and not any(str(v) for v in self.cells[-1]):
+            self.cells.pop()
+
+    def update(self, values=None, range_name: Optional[str] = None, **kwargs):
+        # gspread 5 스타일 update("A1", values)도 허용
+        if isinstance(values, str):
+            values, range_name = range_name, values
+        self._call("update")
+        self._set(range_name or "A1", values)
+
+    def batch_update(self, data: list[dict], **kwargs):
+        self._call("batch_update")
+        for item in data:
+            self._set(item["range"], item["values"])
+
+    def insert_rows(self, values: list[list], row: int = 1, **kwargs):
+        self._call("insert_rows")
+        while len(self.cells) < row - 1:
+            self.cells.append([])
+        self.cells[row - 1:row - 1] = [list(v) for v in values]
+        self.row_count += len(values)
+
+    def clear(self):
+        self._call("clear")
+        self.cells = []
+
+    def add_rows(self, n: int):
+        self._call("add_rows")
+        self.row_count += n
+
+    def add_cols(self, n: int):
+        self._call("add_cols")
+        self.col_count += n
+
+    def format(self, *args, **kwargs):
+        self._call("format")
+
+
+class FakeSpreadsheet:
+    def __init__(self, id: str = "fake"):
+        self.id = id
+        self.calls: Counter = Counter()
+        self._sheets: dict[str, FakeWorksheet] = {}
+
+    def worksheets(self) -> list[FakeWorksheet]:
+        self.calls["worksheets"] += 1
+        return list(self._sheets.values())
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        self.calls["worksheet"] += 1
+        return self._sheets[title]
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **kwargs) -> FakeWorksheet:
+        self.calls["add_worksheet"] += 1
+        if title in self._sheets:
+            raise ValueError(f"이미 있는 탭: {title}")
+        ws = FakeWorksheet(self, title, int(rows), int(cols))
+        self._sheets[title] = ws
+        return ws
+
+    def del_worksheet(self, ws: FakeWorksheet):
+        self.calls["del_worksheet"] += 1
+        self._sheets.pop(ws.title, None)
+
+    def dump(self, out_dir: Path):
+        """탭별 CSV (헤더 포함, 시트에 보이는 순서 그대로)"""
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for title, ws in self._sheets.items():
+            with open(out_dir / f"{title}.csv", "w", encoding="utf-8", newline="") as f:
+                csv.writer(f).writerows(ws.cells)
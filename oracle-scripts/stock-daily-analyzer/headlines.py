@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+AI 사유 분석용 뉴스 헤드라인 정리
+- 정규화: [단독]/(종합) 같은 꼬리표, 특수문자, 공백 정리
+- 유사 중복 감지: 글자 3-gram shingle → simhash로 후보 선별, Jaccard로 확인
+- 여러 종목에 걸린 헤드라인(같은 기사/유사 기사)은 공통 뉴스로 한 번만 싣고 [H번호]로 참조
+- 토큰 추정 + 입력 예산에 맞춰 뒤쪽(우선순위 낮은) 종목의 헤드라인부터 줄임
+"""
+
+import re
+import hashlib
+from typing import Optional
+
+SHINGLE_SIZE = 3
+SIMHASH_BITS = 64
+SIMHASH_MAX_DISTANCE = 16   # 후보 선별 (이 이하만 Jaccard 계산)
+JACCARD_MIN = 0.6           # 유사 중복 판정
+
+_TAG_RE = re.compile(r"[\[\(【<]\s*(단독|종합|속보|특징주|특징|포토|영상|마감|시황|상보|1보|2보|3보)[^\]\)】>]*[\]\)】>]")
+_NOISE_RE = re.compile(r"[^\w\s%.]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_headline(text: str) -> str:
+    text = _TAG_RE.sub(" ", text)
+    text = _NOISE_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip().lower()
+
+
+def shingles(text: str, n: int = SHINGLE_SIZE) -> set[str]:
+    compact = text.replace(" ", "")
+    if len(compact) <= n:
+        return {compact} if compact else set()
+    return {compact[i:i + n] for i in range(len(compact) - n + 1)}
+
+
+def simhash(features: set[str]) -> int:
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(SIMHASH_BITS) if weights[bit] > 0)
+
+
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수 (ASCII 4글자 ≈ 1토큰, 한글 등은 1.5글자 ≈ 1토큰)"""
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return int(ascii_chars / 4 + (len(text) - ascii_chars) / 1.5) + 1
+
+
+class HeadlineDigest:
+    """
+    종목별 헤드라인 목록 → 유사 중복을 묶은 클러스터 참조
+    refs[i]: i번째 종목이 참조하는 클러스터 id (순서 유지, 종목 내 중복 제거)
+    """
+
+    def __init__(self, per_item: list[list[str]]):
+        self.texts: list[str] = []       # 클러스터 대표 헤드라인 (원문)
+        self._shingles: list[set[str]] = []
+        self._hashes: list[int] = []
+        self._exact: dict[str, int] = {}
+        self.refs: list[list[int]] = []
+        self.input_count = sum(len(h) for h in per_item)
+        for headlines in per_item:
+            ids: list[int] = []
+            for text in headlines:
+                cid = self._cluster(text)
+                if cid is not None and cid not in ids:
+                    ids.append(cid)
+            self.refs.append(ids)
+
+    def _cluster(self, text: str) -> Optional[int]:
+        norm = normalize_headline(text)
+        if not norm:
+            return None
+        if norm in self._exact:
+            return self._exact[norm]
+        feats = shingles(norm)
+        h = simhash(feats)
+        for cid, (other_h, other) in enumerate(zip(self._hashes, self._shingles)):
+            if bin(h ^ other_h).count("1") > SIMHASH_MAX_DISTANCE:
+                continue
+            union = len(feats | other)
+            if union and len(feats & other) / union >= JACCARD_MIN:
+                self._exact[norm] = cid
+                return cid
+        cid = len(self.texts)
+        self.texts.append(_SPACE_RE.sub(" ", _TAG_RE.sub(" ", text)).strip())
+        self._shingles.append(feats)
+        self._hashes.append(h)
+        self._exact[norm] = cid
+        return cid
+
+    def render(self) -> tuple[list[str], list[list[str]]]:
+        """
+        Returns: (공통 뉴스 줄 목록 "[H1] ...", 종목별 뉴스 목록 — 공통이면 "[H1]", 아니면 원문)
+        2개 이상 종목이 참조하는 클러스터만 공통 뉴스로 올림 (번호는 처음 등장 순)
+        """
+        usage: dict[int, int] = {}
+        for ids in self.refs:
+            for cid in ids:
+                usage[cid] = usage.get(cid, 0) + 1
+        labels: dict[int, str] = {}
+        shared = []
+        for ids in self.refs:
+            for cid in ids:
+                if usage[cid] >= 2 and cid not in labels:
+                    labels[cid] = f"[H{len(labels) + 1}]"
+                    shared.append(f"{labels[cid]} {self.texts[cid]}")
+        news = [[labels.get(cid, self.texts[cid]) for cid in ids] for ids in self.refs]
+        return shared, news
+
+    def shrink(self) -> bool:
+        """헤드라인이 가장 많은 종목 중 가장 뒤쪽 종목의 마지막 헤드라인 하나 제거. 더 없으면 False"""
+        most = max((len(ids) for ids in self.refs), default=0)
+        if most == 0:
+            return False
+        for ids in reversed(self.refs):
+            if len(ids) == most:
+                ids.pop()
+                return True
+        return False
+
+    def drop_last(self):
+        """가장 뒤쪽 종목 제외 (헤드라인을 다 줄여도 예산 초과일 때)"""
+        self.refs.pop()
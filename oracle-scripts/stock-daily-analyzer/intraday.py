@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+장중 실시간 스크린 (intraday 모드)
+- 장중(09:00~15:30 KST) N분마다 KOSPI/KOSDAQ 전종목 스냅샷 조회
+- 직전 스냅샷의 종목별 상태(상한가/급등/보합/급락/하한가)를 메모리에 유지
+- 상태가 바뀐 종목만 이벤트로 기록 (상한가 진입/이탈, 급등락 기준 돌파 등)
+  → 기록 비용은 전체 종목 수가 아니라 변화 건수에 비례
+- 출력: live/YYYYMMDD.jsonl (기본) + 선택적으로 '실시간' 시트 탭
+
+사용법:
+  python3 intraday.py              # 장 마감까지 폴링
+  python3 intraday.py --once       # 1회만 조회 (테스트용)
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+import analyzer
+import krx
+from sinks import SheetsSink
+
+log = logging.getLogger(__name__)
+
+KST = ZoneInfo("Asia/Seoul")
+POLL_MINUTES = int(os.getenv("INTRADAY_POLL_MINUTES", "5"))
+SESSION_OPEN = (9, 0)
+SESSION_CLOSE = (15, 30)
+LIVE_DIR = Path(os.getenv("INTRADAY_LIVE_DIR", str(Path(__file__).parent / "live")))
+# 쉼표로 구분된 출력 대상 (file, sheets)
+LIVE_OUTPUT = os.getenv("INTRADAY_OUTPUT", "file")
+LIVE_TAB = "실시간"
+LIVE_HEADERS = ["날짜", "시각", "종목코드", "종목명", "시장", "이벤트", "종가", "등락률(%)", "거래량"]
+MARKETS = ("KOSPI", "KOSDAQ")
+
+# 종목 상태 코드
+LIMIT_DOWN, SURGE_DOWN, FLAT, SURGE_UP, LIMIT_UP = -2, -1, 0, 1, 2
+
+
+def classify(pct: pd.Series) -> pd.Series:
+    """등락률 → 상태 코드 (벡터 연산)"""
+    values = pct.fillna(0).to_numpy()
+    state = np.select(
+        [
+            values >= analyzer.LIMIT_UP_PCT,
+            values <= analyzer.LIMIT_DOWN_PCT,
+            values >= analyzer.SURGE_PCT,
+            values <= -analyzer.SURGE_PCT,
+        ],
+        [LIMIT_UP, LIMIT_DOWN, SURGE_UP, SURGE_DOWN],
+        default=FLAT,
+    ).astype(np.int8)
+    return pd.Series(state, index=pct.index)
+
+
+def transition_label(prev: int, curr: int) -> Optional[str]:
+    """이전/현재 상태 → 이벤트 이름 (변화 없으면 None)"""
+    if prev == curr:
+        return None
+    if curr == LIMIT_UP:
+        return "상한가 진입"
+    if curr == LIMIT_DOWN:
+        return "하한가 진입"
+    if prev == LIMIT_UP:
+        return "상한가 이탈"
+    if prev == LIMIT_DOWN:
+        return "하한가 이탈"
+    if curr == SURGE_UP:
+        return "급등 진입"
+    if curr == SURGE_DOWN:
+        return "급락 진입"
+    if prev == SURGE_UP:
+        return "급등 이탈"
+    return "급락 이탈"
+
+
+class IntradayScreen:
+    """시장별 직전 상태를 보관하고 변화분만 이벤트로 변환"""
+
+    def __init__(self):
+        self.prev: dict[str, pd.Series] = {}
+
+    def diff(self, market: str, df: pd.DataFrame) -> list[dict]:
+        if df.empty:
+            return []
+        prev = self.prev.get(market)
+        if prev is None:
+            prev = pd.Series(FLAT, index=df.index, dtype=np.int8)
+        prev = prev.reindex(df.index, fill_value=FLAT)
+
+        curr = classify(df["등락률"])
+        # 거래정지(거래량 0) 종목은 상태를 유지 → 허위 이탈 이벤트 방지
+        halted = df["거래량"].fillna(0).to_numpy() == 0
+        curr = curr.where(~halted, prev)
+        self.prev[market] = curr
+
+        changed = curr.index[curr.to_numpy() != prev.to_numpy()]
+        events = []
+        for ticker in changed:
+            label = transition_label(int(prev[ticker]), int(curr[ticker]))
+            row = df.loc[ticker]
+            events.append({
+                "종목코드": ticker,
+                "종목명": analyzer.get_ticker_name(ticker),
+                "시장": market,
+                "이벤트": label,
+                "종가": int(row["종가"]),
+                "등락률(%)": round(float(row["등락률"]), 2),
+                "거래량": int(row["거래량"]),
+            })
+        return events
+
+
+def emit(events: list[dict], now: datetime, sheet_sink: Optional[SheetsSink]):
+    """변화 이벤트만 JSONL 파일 / 시트에 추가"""
+    if not events:
+        return
+    date_str = now.strftime("%Y-%m-%d")
+    time_str = now.strftime("%H:%M")
+    outputs = {s.strip() for s in LIVE_OUTPUT.split(",")}
+
+    if "file" in outputs:
+        LIVE_DIR.mkdir(parents=True, exist_ok=True)
+        path = LIVE_DIR / f"{now.strftime('%Y%m%d')}.jsonl"
+        with open(path, "a", encoding="utf-8") as f:
+            for e in events:
+                f.write(json.dumps({"날짜": date_str, "시각": time_str, **e}, ensure_ascii=False) + "\n")
+
+    if sheet_sink is not None:
+        rows = [
+            [date_str, time_str, e["종목코드"], e["종목명"], e["시장"], e["이벤트"],
+             str(e["종가"]), str(e["등락률(%)"]), str(e["거래량"])]
+            for e in events
+        ]
+        sheet_sink.write(LIVE_TAB, LIVE_HEADERS, rows)
+
+
+def in_session(now: datetime) -> bool:
+    if now.weekday() >= 5:
+        return False
+    hm = (now.hour, now.minute)
+    return SESSION_OPEN <= hm <= SESSION_CLOSE
+
+
+def poll_once(screen: IntradayScreen, sheet_sink: Optional[SheetsSink]) -> int:
+    now = datetime.now(KST)
+    date = now.strftime("%Y%m%d")
+    total = 0
+    for market in MARKETS:
+        fetched = krx.market_ohlcv(date, market)
+        if fetched.failed:
+            log.error(f"{market} 장중 시세 조회 실패: {fetched.error}")
+            continue
+        if fetched.empty:
+            continue
+        events = screen.diff(market, fetched.data)
+        emit(events, now, sheet_sink)
+        total += len(events)
+    log.info(f"[intraday] {now.strftime('%H:%M')} 변화 {total}건")
+    return total
+
+
+def main(spreadsheet=None, once: bool = False):
+    sheet_sink = None
+    if "sheets" in {s.strip() for s in LIVE_OUTPUT.split(",")}:
+        if spreadsheet is None:
+            spreadsheet = analyzer.connect_sheets()
+        sheet_sink = SheetsSink(spreadsheet)
+
+    screen = IntradayScreen()
+    if once:
+        poll_once(screen, sheet_sink)
+        return
+
+    log.info(f"=== 장중 스크린 시작 ({POLL_MINUTES}분 간격) ===")
+    while True:
+        now = datetime.now(KST)
+        if now.weekday() >= 5 or (now.hour, now.minute) > SESSION_CLOSE:
+            break
+        if in_session(now):
+            poll_once(screen, sheet_sink)
+        # 마감 직후 한 번 더 조회되도록 대기 시간을 마감 시각에 맞춤
+        wait = POLL_MINUTES * 60
+        close_at = now.replace(hour=SESSION_CLOSE[0], minute=SESSION_CLOSE[1], second=30)
+        if now < close_at:
+            wait = min(wait, max((close_at - now).total_seconds(), 1))
+        time.sleep(wait)
+    log.info("=== 장중 스크린 종료 ===")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="장중 상태 변화 스크린")
+    parser.add_argument("--once", action="store_true", help="1회만 조회")
+    args = parser.parse_args()
+    main(once=args.once)
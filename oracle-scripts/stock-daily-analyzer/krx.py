@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+pykrx 호출 래퍼 (재시도 / 서킷 브레이커 / 빈 응답과 실패 구분)
+- 일시적 오류는 지수 백오프 + jitter로 재시도 (KRX_RETRIES회)
+- 연속 실패가 KRX_BREAKER_THRESHOLD회 넘으면 KRX_BREAKER_COOLDOWN초 동안 호출 차단
+  (KRX 장애 중에 종목 수천 개를 계속 두드리지 않도록)
+- 시세 조회 결과를 Fetched로 반환: ok(데이터 있음) / empty(휴장일) / failed(조회 실패)
+  거래일인데 빈 응답이면 실패로 보고 재시도 (pykrx는 KRX 오류 시 빈 DataFrame을 돌려주기도 함)
+"""
+
+import os
+import time
+import random
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+import pandas as pd
+from pykrx import stock
+
+log = logging.getLogger(__name__)
+
+KRX_RETRIES = int(os.getenv("KRX_RETRIES", "3"))
+KRX_BACKOFF_BASE = float(os.getenv("KRX_BACKOFF_BASE", "1.0"))   # 초
+KRX_BACKOFF_MAX = float(os.getenv("KRX_BACKOFF_MAX", "20.0"))
+KRX_BREAKER_THRESHOLD = int(os.getenv("KRX_BREAKER_THRESHOLD", "8"))
+KRX_BREAKER_COOLDOWN = float(os.getenv("KRX_BREAKER_COOLDOWN", "60"))
+
+
+class KRXError(Exception):
+    """재시도 후에도 실패했거나 서킷 브레이커가 열려 호출하지 않음"""
+
+
+class CircuitOpen(KRXError):
+    """서킷 브레이커 열림 (쿨다운 중)"""
+
+
+class CircuitBreaker:
+    """
+    연속 실패 threshold회 → open (cooldown초 동안 호출 차단)
+    cooldown이 지나면 한 번 시도(half-open): 성공하면 닫고, 실패하면 다시 open
+    """
+
+    def __init__(self, threshold: int = KRX_BREAKER_THRESHOLD, cooldown: float = KRX_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None and time.monotonic() - self.opened_at < self.cooldown
+
+    def allow(self) -> bool:
+        return not self.is_open
+
+    def remaining(self) -> float:
+        """쿨다운 남은 시간 (초, 닫혀 있으면 0)"""
+        if not self.is_open:
+            return 0.0
+        return self.cooldown - (time.monotonic() - self.opened_at)
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            if self.opened_at is None or not self.is_open:
+                log.warning(f"KRX 연속 실패 {self.failures}회 → {self.cooldown:.0f}초 동안 호출 중단")
+            self.opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker()
+
+
+def backoff_delay(attempt: int) -> float:
+    """attempt번째 재시도 대기 시간 (full jitter: 0 ~ base·2^attempt, 최대 KRX_BACKOFF_MAX)"""
+    return random.uniform(0, min(KRX_BACKOFF_MAX, KRX_BACKOFF_BASE * 2 ** attempt))
+
+
+def call(fn: Callable, *args, what: str = "", retries: int = KRX_RETRIES, **kwargs) -> Any:
+    """
+    pykrx 함수 호출 (실패 시 백오프 재시도)
+    Raises: CircuitOpen (브레이커 열림), KRXError (재시도 소진)
+    """
+    what = what or getattr(fn, "__name__", "pykrx")
+    last: Optional[Exception] = None
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            raise CircuitOpen(f"{what}: KRX 서킷 브레이커 열림")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            last = e
+            breaker.failure()
+            if attempt < retries:
+                delay = backoff_delay(attempt)
+                log.debug(f"{what} 실패 ({e}), {delay:.1f}초 후 재시도 {attempt + 1}/{retries}")
+                time.sleep(delay)
+            continue
+        breaker.success()
+        return result
+    raise KRXError(f"{what}: {retries + 1}회 시도 실패: {last}")
+
+
+# ---------------------------------------------------------------------------
+# 조회 결과
+# ---------------------------------------------------------------------------
+class Fetched:
+    """조회 결과: status = "ok" | "empty"(휴장일) | "failed"(조회 실패)"""
+
+    OK, EMPTY, FAILED = "ok", "empty", "failed"
+
+    def __init__(self, status: str, data: Any = None, error: str = ""):
+        self.status = status
+        self.data = data
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.status == self.OK
+
+    @property
+    def empty(self) -> bool:
+        return self.status == self.EMPTY
+
+    @property
+    def failed(self) -> bool:
+        return self.status == self.FAILED
+
+    def __repr__(self):
+        return f"Fetched({self.status}{', ' + self.error if self.error else ''})"
+
+
+class _EmptyOnTradingDay(Exception):
+    pass
+
+
+def business_days(start: str, end: str) -> list[str]:
+    """start~end 거래일 목록 (YYYYMMDD, 재시도 포함). Raises KRXError"""
+    days = call(stock.get_previous_business_days, fromdate=start, todate=end,
+                what="거래일 조회")
+    return [d.strftime("%Y%m%d") for d in days]
+
+
+def is_trading_day(date: str) -> Optional[bool]:
+    """date가 거래일인지 (조회 실패 시 None)"""
+    if datetime.strptime(date, "%Y%m%d").weekday() >= 5:
+        return False
+    start = (datetime.strptime(date, "%Y%m%d") - timedelta(days=7)).strftime("%Y%m%d")
+    try:
+        return date in business_days(start, date)
+    except KRXError as e:
+        log.warning(f"거래일 확인 실패 ({date}): {e}")
+        return None
+
+
+def market_ohlcv(date: str, market: str) -> Fetched:
+    """
+    전종목 OHLCV (get_market_ohlcv_by_ticker)
+    빈 응답이면 거래일 여부를 확인해 휴장일(empty)과 조회 실패(재시도 대상)를 구분
+    """
+    checked: dict[str, Optional[bool]] = {}
+
+    def fetch() -> pd.DataFrame:
+        df = stock.get_market_ohlcv_by_ticker(date, market=market)
+        if df is None or df.empty:
+            if "trading" not in checked:
+                checked["trading"] = is_trading_day(date)
+            if checked["trading"]:
+                raise _EmptyOnTradingDay(f"거래일({date})인데 빈 응답")
+        return df
+
+    try:
+        df = call(fetch, what=f"{market} 시세")
+    except KRXError as e:
+        return Fetched(Fetched.FAILED, error=str(e))
+    if df is None or df.empty:
+        return Fetched(Fetched.EMPTY, df)
+    return Fetched(Fetched.OK, df)
+
+
+def ticker_ohlcv(start: str, end: str, ticker: str, retries: int = KRX_RETRIES) -> pd.DataFrame:
+    """종목 일봉 (get_market_ohlcv). Raises KRXError"""
+    return call(stock.get_market_ohlcv, start, end, ticker, what=f"{ticker} 일봉", retries=retries)
+
+
+def ticker_list(date: str, market: str) -> list[str]:
+    """시장 종목코드 목록. Raises KRXError"""
+    return call(stock.get_market_ticker_list, date, market=market, what=f"{market} 종목 목록")
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+종목별 이동평균 증분 상태 (MA5 / MA20)
+- 종목마다 최근 MA_LONG개 종가를 고정 크기 ring buffer로 보관
+- 단기/장기 이동합을 함께 보관하여 하루치 종가로 전 종목 MA를 O(종목수)로 갱신
+- 직전 실행의 MA와 비교하여 골든/데드크로스 감지
+- numpy 배열로 보관하고 .npz 파일로 저장 (실행 간 유지)
+
+상장/상폐/거래정지 처리:
+- 새로 보이는 종목은 행을 추가 (호출 측에서 과거 종가로 seed)
+- 종목 목록에서 사라진 종목은 행 삭제
+- 당일 종가가 없는 종목(거래정지)은 갱신하지 않음 → 정지일은 MA 계산에서 제외
+- 시간 제한으로 seed하지 못한 종목은 last_date=0으로 남아 pending()으로 다음 실행에서 보충
+"""
+
+import os
+import logging
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+MA_STATE_DIR = Path(os.getenv("MA_STATE_DIR", str(Path(__file__).parent / "state")))
+
+
+class MAState:
+    """종목별 ring buffer + 이동합 (배열 기반)"""
+
+    def __init__(self, short: int = 5, long: int = 20):
+        self.short = short
+        self.long = long
+        self.as_of = 0  # 마지막 갱신 거래일 (YYYYMMDD)
+        self.codes = np.array([], dtype="U16")
+        self.closes = np.zeros((0, long), dtype=np.float64)
+        self.head = np.zeros(0, dtype=np.int16)      # 다음 기록 위치 (= 가장 오래된 값)
+        self.count = np.zeros(0, dtype=np.int16)     # 채워진 종가 수 (최대 long)
+        self.sum_s = np.zeros(0, dtype=np.float64)
+        self.sum_l = np.zeros(0, dtype=np.float64)
+        self.ma_s = np.zeros(0, dtype=np.float64)    # 마지막 갱신 후 MA (부족하면 NaN)
+        self.ma_l = np.zeros(0, dtype=np.float64)
+        self.prev_s = np.zeros(0, dtype=np.float64)  # 마지막 갱신 직전 MA
+        self.prev_l = np.zeros(0, dtype=np.float64)
+        self.last_date = np.zeros(0, dtype=np.int32)  # 종목별 마지막 갱신일
+        self._index: dict[str, int] = {}
+
+    # -- 저장 / 로드 -------------------------------------------------------
+    @classmethod
+    def load(cls, path: Path, short: int = 5, long: int = 20) -> "MAState":
+        state = cls(short, long)
+        if not path.exists():
+            return state
+        try:
+            with np.load(path) as data:
+                if int(data["short"]) != short or int(data["long"]) != long:
+                    log.info(f"MA 설정 변경으로 상태 재구성 ({path.name})")
+                    return state
+                state.as_of = int(data["as_of"])
+                for field in ("codes", "closes", "head", "count", "sum_s", "sum_l",
+                              "ma_s", "ma_l", "prev_s", "prev_l", "last_date"):
+                    setattr(state, field, data[field])
+        except Exception as e:
+            log.warning(f"MA 상태 로드 실패, 재구성 ({path.name}): {e}")
+            return cls(short, long)
+        state._reindex()
+        return state
+
+    def save(self, path: Path):
+        """임시 파일에 쓴 뒤 교체 (중간 실패 시 기존 상태 보존)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f, short=self.short, long=self.long, as_of=self.as_of,
+                codes=self.codes, closes=self.closes, head=self.head, count=self.count,
+                sum_s=self.sum_s, sum_l=self.sum_l, ma_s=self.ma_s, ma_l=self.ma_l,
+                prev_s=self.prev_s, prev_l=self.prev_l, last_date=self.last_date,
+            )
+        os.replace(tmp, path)
+
+    def _reindex(self):
+        self._index = {code: i for i, code in enumerate(self.codes.tolist())}
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._index
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    # -- 종목 구성 ---------------------------------------------------------
+    def sync_universe(self, codes: list[str]) -> list[str]:
+        """
+        오늘의 종목 목록에 맞춰 행 추가/삭제
+        Returns: 새로 추가된 종목코드 (과거 종가 seed 필요)
+        """
+        wanted = set(codes)
+        keep = np.array([c in wanted for c in self.codes.tolist()], dtype=bool)
+        dropped = len(self.codes) - int(keep.sum())
+        if dropped:
+            for field in ("codes", "closes", "head", "count", "sum_s", "sum_l",
+                          "ma_s", "ma_l", "prev_s", "prev_l", "last_date"):
+                setattr(self, field, getattr(self, field)[keep])
+            self._reindex()
+
+        new_codes = [c for c in codes if c not in self._index]
+        if new_codes:
+            n = len(new_codes)
+            nan = np.full(n, np.nan)
+            self.codes = np.concatenate([self.codes, np.array(new_codes, dtype="U16")])
+            self.closes = np.vstack([self.closes, np.zeros((n, self.long))])
+            self.head = np.concatenate([self.head, np.zeros(n, dtype=np.int16)])
+            self.count = np.concatenate([self.count, np.zeros(n, dtype=np.int16)])
+            self.sum_s = np.concatenate([self.sum_s, np.zeros(n)])
+            self.sum_l = np.concatenate([self.sum_l, np.zeros(n)])
+            self.ma_s = np.concatenate([self.ma_s, nan])
+            self.ma_l = np.concatenate([self.ma_l, nan])
+            self.prev_s = np.concatenate([self.prev_s, nan])
+            self.prev_l = np.concatenate([self.prev_l, nan])
+            self.last_date = np.concatenate([self.last_date, np.zeros(n, dtype=np.int32)])
+            self._reindex()
+
+        if dropped or new_codes:
+            log.info(f"  MA 상태: 신규 {len(new_codes)}개, 제외 {dropped}개")
+        return new_codes
+
+    def seed(self, code: str, closes: list[float], last_date: int):
+        """과거 종가(오래된 순)로 종목 행 초기화. 이미 있으면 덮어씀."""
+        if code not in self._index:
+            self.sync_universe(self.codes.tolist() + [code])
+        i = self._index[code]
+        window = np.asarray(closes[-self.long:], dtype=np.float64)
+        k = len(window)
+
+        self.closes[i] = 0.0
+        self.closes[i, :k] = window
+        self.head[i] = k % self.long
+        self.count[i] = k
+        self.sum_s[i] = window[-self.short:].sum() if k else 0.0
+        self.sum_l[i] = window.sum()
+        self.ma_s[i] = self.sum_s[i] / self.short if k >= self.short else np.nan
+        self.ma_l[i] = self.sum_l[i] / self.long if k >= self.long else np.nan
+        self.prev_s[i] = np.nan
+        self.prev_l[i] = np.nan
+        self.last_date[i] = last_date
+
+    def pending(self) -> list[str]:
+        """아직 seed/갱신된 적 없는 종목 (신규 추가 또는 이전 실행에서 시간 제한으로 남은 종목)"""
+        return self.codes[self.last_date == 0].tolist()
+
+    def last_update(self, code: str) -> int:
+        """종목의 마지막 갱신일 (YYYYMMDD, 없으면 0)"""
+        i = self._index.get(code)
+        return int(self.last_date[i]) if i is not None else 0
+
+    def last_close(self, code: str) -> Optional[float]:
+        i = self._index.get(code)
+        if i is None or self.count[i] == 0:
+            return None
+        return float(self.closes[i, (self.head[i] - 1) % self.long])
+
+    # -- 갱신 / 감지 -------------------------------------------------------
+    def update(self, date: int, closes: dict[str, float]) -> list[dict]:
+        """
+        당일 종가로 MA 갱신 후 크로스 반환
+        closes에 없는 종목(거래정지)은 갱신하지 않음.
+        이미 date로 갱신된 종목은 다시 갱신하지 않고 저장된 결과로 크로스 판정 (재실행 대비).
+        """
+        rows = np.array([self._index[c] for c in closes if c in self._index], dtype=np.int64)
+        values = np.array([closes[c] for c in closes if c in self._index], dtype=np.float64)
+        fresh = self.last_date[rows] != date
+        rows, values = rows[fresh], values[fresh]
+
+        if len(rows):
+            L, S = self.long, self.short
+            head = self.head[rows].astype(np.int64)
+            count = self.count[rows]
+            out_l = np.where(count >= L, self.closes[rows, head], 0.0)
+            out_s = np.where(count >= S, self.closes[rows, (head - S) % L], 0.0)
+
+            self.sum_l[rows] += values - out_l
+            self.sum_s[rows] += values - out_s
+            self.closes[rows, head] = values
+            self.head[rows] = (head + 1) % L
+            self.count[rows] = np.minimum(count + 1, L)
+
+            self.prev_s[rows] = self.ma_s[rows]
+            self.prev_l[rows] = self.ma_l[rows]
+            self.ma_s[rows] = np.where(self.count[rows] >= S, self.sum_s[rows] / S, np.nan)
+            self.ma_l[rows] = np.where(self.count[rows] >= L, self.sum_l[rows] / L, np.nan)
+            self.last_date[rows] = date
+
+        self.as_of = max(self.as_of, date)
+        return self.crosses(date)
+
+    def crosses(self, date: int) -> list[dict]:
+        """date에 갱신된 종목 중 MA 교차 종목"""
+        with np.errstate(invalid="ignore"):
+            today = self.last_date == date
+            golden = today & (self.prev_s <= self.prev_l) & (self.ma_s > self.ma_l)
+            dead = today & (self.prev_s >= self.prev_l) & (self.ma_s < self.ma_l)
+
+        results = []
+        for cross_type, mask in (("골든크로스", golden), ("데드크로스", dead)):
+            for i in np.nonzero(mask)[0]:
+                results.append({
+                    "종목코드": str(self.codes[i]),
+                    "유형": cross_type,
+                    "단기MA": float(self.ma_s[i]),
+                    "장기MA": float(self.ma_l[i]),
+                    "종가": float(self.closes[i, (self.head[i] - 1) % self.long]),
+                })
+        return results
@@ -0,0 +1,724 @@
+#!/usr/bin/env python3
+"""
+전종목 가격 패널 (날짜 × 종목) + 멀티코어 지표 / MA 크로스 계산
+- 패널은 메모리 매핑 파일(/dev/shm, 없으면 임시 디렉터리)에 한 번만 기록
+  → 작업 프로세스는 같은 파일을 매핑해 복사 없이 읽음
+- 지표 / 크로스는 종목(열) 구간으로 나눠 프로세스 풀에서 계산
+  지표 결과도 공유 출력 배열의 자기 열 구간에 직접 기록 (결과 배열 전송 없음)
+- 크로스 이벤트는 (날짜, 종목, MA쌍, 유형) 순으로 정렬해 합침 → 작업 수와 무관하게 같은 결과
+- MA는 ma_state와 같은 규칙: 거래정지일(NaN)은 건너뛰고 실제 거래일 종가 N개로 계산,
+  직전 거래일 MA와 비교해 골든/데드크로스 판정
+
+지표 (종목별, 거래일 기준):
+  ma{N}     : PANEL_MA_PAIRS에 나오는 모든 기간의 단순이동평균
+  rsi{N}    : N일 평균 상승폭 / (평균 상승폭 + 평균 하락폭) × 100 (단순평균 RSI)
+  vol_ratio : 거래량 / 직전 20거래일 평균 거래량
+
+저장 형식 (메모리 절약):
+  close  : int32 가격 × scale (KR 1원, US 1센트 = scale 100), 거래 없는 칸은 0
+  volume : float32, ret(등락률 %) : float32, 시장 : Categorical
+  가격이 정수라 이동합계가 float64에서 오차 없이 계산됨 → 날짜 구간을 나눠 계산해도 결과가 같음
+
+수년치 패널 (구간 처리, 메모리 상한):
+  날짜 PANEL_CHUNK_DAYS일씩 읽어 계산하고, 종목별 최근 거래일 값만 다음 구간으로 넘김
+  → 전체 패널을 메모리에 올리지 않음. 구간마다 RSS가 PANEL_MEMORY_LIMIT_MB를 넘으면 중단
+
+벤치마크 (1 → N 프로세스 확장성, 결과 동일성 확인):
+  python3 panel.py bench --synthetic 2600x2500 --workers 1,2,4
+  python3 panel.py bench --universe KR --from 2015-01-01 --workers 1,2,4   (research_cache 사용)
+  python3 panel.py chunked --synthetic 2600x5000 --chunk-days 250 --verify   (구간 처리 = 전체 처리 확인)
+  python3 panel.py chunked --universe KR --from 2010-01-01 --memory-limit 768
+"""
+
+import os
+import sys
+import time
+import shutil
+import hashlib
+import logging
+import resource
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+# 쉼표로 구분된 단기:장기 MA 쌍
+PANEL_MA_PAIRS = [
+    tuple(int(n) for n in pair.split(":"))
+    for pair in os.getenv("PANEL_MA_PAIRS", "5:20,20:60,60:120").split(",") if pair.strip()
+]
+PANEL_WORKERS = int(os.getenv("PANEL_WORKERS", str(os.cpu_count() or 1)))
+# 패널 파일 위치 (/dev/shm이면 디스크 I/O 없이 페이지 캐시에만 존재)
+PANEL_DIR = Path(os.getenv(
+    "PANEL_DIR", "/dev/shm" if Path("/dev/shm").is_dir() else tempfile.gettempdir()
+))
+RSI_PERIOD = 14
+VOLUME_WINDOW = 20
+# 작업 수 = 프로세스 수 × 이 값 (종목 구간을 잘게 나눠 프로세스 간 부하 균형)
+CHUNKS_PER_WORKER = 4
+# 구간 처리: 한 번에 읽는 거래일 수 / 프로세스 RSS 상한 (MB)
+PANEL_CHUNK_DAYS = int(os.getenv("PANEL_CHUNK_DAYS", "250"))
+PANEL_MEMORY_LIMIT_MB = float(os.getenv("PANEL_MEMORY_LIMIT_MB", "1024"))
+# 가격 배율 (int32 저장): KR 원 단위, US 센트 단위
+PRICE_SCALE = {"KR": 1, "US": 100}
+
+CROSS_TYPES = ("골든크로스", "데드크로스")
+
+
+# ---------------------------------------------------------------------------
+# 공유 패널
+# ---------------------------------------------------------------------------
+def _empty(dtype: str):
+    """빈 칸 값 — 정수 필드(가격)는 0 = 거래 없음"""
+    return 0 if np.issubdtype(np.dtype(dtype), np.integer) else np.nan
+
+
+def to_price(values: np.ndarray, scale: int = 1) -> np.ndarray:
+    """가격(NaN = 거래 없음) → int32 (가격 × scale, 거래 없음 = 0)"""
+    values = np.asarray(values, dtype=np.float64) * scale
+    return np.where(np.isfinite(values) & (values > 0), np.rint(values), 0).astype(np.int32)
+
+
+class SharedPanel:
+    """
+    필드별 (날짜 × 종목) 배열을 각각 메모리 매핑 파일로 보관
+    create()한 프로세스가 소유자 (close 시 파일 삭제), 작업 프로세스는 attach(spec)
+    """
+
+    def __init__(self, root: Path, shape: tuple[int, int], dtypes: dict[str, str],
+                 writable: tuple = (), owner: bool = False):
+        self.root = root
+        self.shape = shape
+        self.dtypes = dict(dtypes)
+        self.owner = owner
+        self.arrays: dict[str, np.memmap] = {}
+        for name, dtype in self.dtypes.items():
+            mode = "r+" if owner or name in writable else "r"
+            self.arrays[name] = np.memmap(root / f"{name}.bin", dtype=dtype, mode=mode, shape=shape)
+
+    @classmethod
+    def create(cls, shape: tuple[int, int], dtypes: dict[str, str],
+               root: Optional[Path] = None) -> "SharedPanel":
+        """빈 칸(float은 NaN, 정수는 0)으로 채운 새 패널"""
+        PANEL_DIR.mkdir(parents=True, exist_ok=True)
+        root = root or Path(tempfile.mkdtemp(prefix="panel-", dir=PANEL_DIR))
+        for name, dtype in dtypes.items():
+            arr = np.memmap(root / f"{name}.bin", dtype=dtype, mode="w+", shape=shape)
+            arr[:] = _empty(dtype)
+            arr.flush()
+            del arr
+        return cls(root, shape, dtypes, owner=True)
+
+    @classmethod
+    def attach(cls, spec: dict, writable: tuple = ()) -> "SharedPanel":
+        return cls(Path(spec["root"]), tuple(spec["shape"]), spec["dtypes"], writable)
+
+    def spec(self) -> dict:
+        """작업 프로세스에 넘기는 설명 (경로 / shape / dtype만, 데이터 없음)"""
+        return {"root": str(self.root), "shape": self.shape, "dtypes": self.dtypes}
+
+    def add(self, name: str, dtype: str = "float32"):
+        """출력 필드 추가 (NaN으로 채움)"""
+        arr = np.memmap(self.root / f"{name}.bin", dtype=dtype, mode="w+", shape=self.shape)
+        arr[:] = np.nan
+        self.arrays[name] = arr
+        self.dtypes[name] = dtype
+
+    def __getitem__(self, name: str) -> np.memmap:
+        return self.arrays[name]
+
+    def close(self):
+        for arr in self.arrays.values():
+            if arr.mode != "r":
+                arr.flush()
+        self.arrays = {}
+        if self.owner:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Panel:
+    """날짜 / 종목 라벨 + SharedPanel (close int32, volume / ret float32)"""
+
+    FIELDS = {"close": "int32", "volume": "float32", "ret": "float32"}
+
+    def __init__(self, dates: np.ndarray, codes: np.ndarray, data: SharedPanel,
+                 scale: int = 1, markets: Optional[pd.Categorical] = None):
+        self.dates = dates    # int32 YYYYMMDD
+        self.codes = codes
+        self.data = data
+        self.scale = scale    # close = 가격 × scale
+        self.markets = markets
+
+    @classmethod
+    def from_arrays(cls, dates, codes, close: np.ndarray, volume: Optional[np.ndarray] = None,
+                    ret: Optional[np.ndarray] = None, scale: int = 1,
+                    markets: Optional[pd.Categorical] = None) -> "Panel":
+        """close / volume / ret: (날짜 × 종목), 거래가 없는 칸은 NaN"""
+        data = SharedPanel.create(close.shape, cls.FIELDS)
+        data["close"][:] = to_price(close, scale)
+        if volume is not None:
+            data["volume"][:] = volume
+        if ret is not None:
+            data["ret"][:] = ret
+        return cls(np.asarray(dates, dtype=np.int32), np.asarray(codes), data, scale, markets)
+
+    @classmethod
+    def from_snapshots(cls, snapshots: dict[str, pd.DataFrame], scale: int = 1) -> "Panel":
+        """날짜별 스냅샷(research 캐시 형식, 종목코드 index + 종가/거래량/등락률/시장) → 패널"""
+        dates = sorted(d for d, snap in snapshots.items() if not snap.empty)
+        codes = sorted(set().union(*(snapshots[d].index for d in dates))) if dates else []
+        col = {c: i for i, c in enumerate(codes)}
+        data = SharedPanel.create((len(dates), len(codes)), cls.FIELDS)
+        markets = {}
+        for r, date in enumerate(dates):
+            snap = snapshots[date]
+            idx = np.fromiter((col[c] for c in snap.index), dtype=np.int64, count=len(snap))
+            data["close"][r, idx] = to_price(snap["종가"].to_numpy(), scale)
+            data["volume"][r, idx] = snap["거래량"].to_numpy(np.float32)
+            if "등락률" in snap.columns:
+                data["ret"][r, idx] = snap["등락률"].to_numpy(np.float32)
+            if "시장" in snap.columns:
+                markets.update(zip(snap.index, snap["시장"]))
+        return cls(np.array([int(d) for d in dates], dtype=np.int32), np.array(codes), data, scale,
+                   pd.Categorical([markets.get(c) for c in codes]) if markets else None)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.data.shape
+
+    def close(self):
+        self.data.close()
+
+
+# ---------------------------------------------------------------------------
+# 종목 구간 계산 (프로세스 풀 작업)
+# ---------------------------------------------------------------------------
+def _windows(pairs: list[tuple[int, int]]) -> list[int]:
+    return sorted({w for pair in pairs for w in pair})
+
+
+def _rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        cs = np.concatenate(([0.0], np.cumsum(x)))
+        out[window - 1:] = (cs[window:] - cs[:-window]) / window
+    return out
+
+
+def _keep(pairs: list[tuple[int, int]], rsi_period: int = RSI_PERIOD) -> int:
+    """구간 경계를 넘길 종목별 최근 거래일 수 (다음 구간 첫날 지표 / 크로스 판정에 필요한 만큼)"""
+    return max(max(_windows(pairs)), rsi_period, VOLUME_WINDOW) + 1
+
+
+def _column(x: np.ndarray, vol: np.ndarray, carried: int, seen: int,
+            pairs: list[tuple[int, int]], windows: list[int], rsi_period: int):
+    """
+    한 종목의 거래일 종가 x(가격 × scale, 정수값) / 거래량 vol로 지표 계산
+    앞의 carried개는 이전 구간에서 넘어온 값 (결과는 그 뒤부터), seen: x[0] 이전에 지나간 거래일 수
+    Returns: ({지표: 값}, [(MA쌍, 유형, x 인덱스)])
+    """
+    ma = {w: _rolling_mean(x, w) for w in windows}
+    out = {f"ma{w}": values[carried:] for w, values in ma.items()}
+
+    diff = np.diff(x, prepend=np.nan)
+    gain = _rolling_mean(np.nan_to_num(np.maximum(diff, 0)), rsi_period)
+    loss = _rolling_mean(np.nan_to_num(np.maximum(-diff, 0)), rsi_period)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = np.where(gain + loss > 0, 100 * gain / (gain + loss), 50.0)
+    rsi[:max(0, rsi_period - seen)] = np.nan   # 첫 거래일은 전일 대비 없음
+    out[f"rsi{rsi_period}"] = rsi[carried:]
+
+    avg = np.concatenate(([np.nan], _rolling_mean(vol, VOLUME_WINDOW)[:-1]))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out["vol_ratio"] = np.where(avg > 0, vol / avg, np.nan)[carried:]
+
+    events = []
+    for p, (short, long) in enumerate(pairs):
+        s, l = ma[short], ma[long]
+        with np.errstate(invalid="ignore"):
+            golden = (s[:-1] <= l[:-1]) & (s[1:] > l[1:])
+            dead = (s[:-1] >= l[:-1]) & (s[1:] < l[1:])
+        for t, mask in enumerate((golden, dead)):
+            k = np.flatnonzero(mask) + 1
+            k = k[k >= carried]
+            if len(k):
+                events.append((p, t, k))
+    return out, events
+
+
+def _merge_events(events: dict[str, list]) -> dict[str, np.ndarray]:
+    return {
+        k: np.concatenate(v) if v else np.zeros(0, dtype=np.float64 if k == "close" else np.int64)
+        for k, v in events.items()
+    }
+
+
+def compute_range(spec: dict, lo: int, hi: int, pairs: list[tuple[int, int]], scale: int = 1,
+                  rsi_period: int = RSI_PERIOD) -> tuple[int, dict[str, np.ndarray]]:
+    """
+    열 [lo, hi) 종목의 지표를 공유 출력 배열에 기록하고 크로스 이벤트 반환
+    Returns: (lo, {"row", "col", "pair", "type", "close"}) — 날짜 / 종목은 패널 인덱스
+    """
+    windows = _windows(pairs)
+    outputs = tuple(f"ma{w}" for w in windows) + (f"rsi{rsi_period}", "vol_ratio")
+    panel = SharedPanel.attach(spec, writable=outputs)
+    try:
+        close, volume = panel["close"], panel["volume"]
+        events = {k: [] for k in ("row", "col", "pair", "type", "close")}
+        for c in range(lo, hi):
+            col_close = np.asarray(close[:, c])
+            rows = np.flatnonzero(col_close > 0)
+            if len(rows) == 0:
+                continue
+            x = col_close[rows].astype(np.float64)
+            vol = np.nan_to_num(np.asarray(volume[rows, c], dtype=np.float64))
+            values, found = _column(x, vol, 0, 0, pairs, windows, rsi_period)
+            for name, v in values.items():
+                panel[name][rows, c] = v / scale if name.startswith("ma") else v
+            for p, t, k in found:
+                events["row"].append(rows[k])
+                events["col"].append(np.full(len(k), c))
+                events["pair"].append(np.full(len(k), p))
+                events["type"].append(np.full(len(k), t))
+                events["close"].append(x[k] / scale)
+        result = _merge_events(events)
+    finally:
+        panel.close()
+    return lo, result
+
+
+def column_ranges(n: int, chunks: int) -> list[tuple[int, int]]:
+    chunks = max(1, min(chunks, n))
+    bounds = np.linspace(0, n, chunks + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def compute_indicators(panel: Panel, pairs: list[tuple[int, int]] = PANEL_MA_PAIRS,
+                       workers: int = PANEL_WORKERS) -> pd.DataFrame:
+    """
+    지표를 panel.data에 추가하고 (ma{N}, rsi14, vol_ratio) MA 크로스 이벤트 반환
+    workers=1이면 현재 프로세스에서 순서대로 계산 (벤치마크 기준선)
+    """
+    for w in _windows(pairs):
+        panel.data.add(f"ma{w}")
+    panel.data.add(f"rsi{RSI_PERIOD}")
+    panel.data.add("vol_ratio")
+    for arr in panel.data.arrays.values():
+        arr.flush()
+
+    spec = panel.data.spec()
+    ranges = column_ranges(panel.shape[1], workers * CHUNKS_PER_WORKER)
+    if workers <= 1:
+        parts = [compute_range(spec, lo, hi, pairs, panel.scale) for lo, hi in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(compute_range, spec, lo, hi, pairs, panel.scale) for lo, hi in ranges]
+            parts = [f.result() for f in futures]
+
+    # 구간 순서대로 합친 뒤 정렬 → 작업 분할과 무관한 결과
+    parts.sort(key=lambda part: part[0])
+    merged = {k: np.concatenate([p[1][k] for p in parts]) for k in parts[0][1]} if parts else {}
+    if not merged or not len(merged["row"]):
+        return pd.DataFrame(columns=["date", "code", "pair", "유형", "close"])
+    order = np.lexsort((merged["type"], merged["pair"], merged["col"], merged["row"]))
+    labels = [f"{s}/{l}" for s, l in pairs]
+    return pd.DataFrame({
+        "date": panel.dates[merged["row"][order]],
+        "code": panel.codes[merged["col"][order]],
+        "pair": pd.Categorical.from_codes(merged["pair"][order], labels),
+        "유형": pd.Categorical.from_codes(merged["type"][order], list(CROSS_TYPES)),
+        "close": merged["close"][order],
+    })
+
+
+def digest(panel: Panel, events: pd.DataFrame) -> str:
+    """결과 동일성 확인용 해시 (이벤트 + 지표 배열)"""
+    h = hashlib.blake2b(digest_size=12)
+    h.update(pd.util.hash_pandas_object(events.astype(str), index=False).to_numpy().tobytes())
+    for name in sorted(panel.data.arrays):
+        if name not in Panel.FIELDS:
+            h.update(np.ascontiguousarray(panel.data[name]).tobytes())
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# 구간 처리 (수년치 패널, 메모리 상한)
+# ---------------------------------------------------------------------------
+class PanelMemoryError(MemoryError):
+    pass
+
+
+def rss_mb() -> float:
+    """현재 RSS (MB)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """프로세스 시작 이후 최대 RSS (MB, Linux ru_maxrss는 KB)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class PanelBlock:
+    """
+    연속 거래일 구간 (날짜 × 지금까지 나온 종목)
+    열은 종목이 처음 나온 순서 → 이전 구간의 열 번호가 그대로 유지됨 (codes는 전체 목록의 앞부분)
+    """
+
+    def __init__(self, dates: np.ndarray, codes: np.ndarray, close: np.ndarray,
+                 volume: np.ndarray, markets: Optional[pd.Categorical] = None):
+        self.dates = dates      # int32 YYYYMMDD
+        self.codes = codes
+        self.close = close      # int32 가격 × scale, 0 = 거래 없음
+        self.volume = volume    # float32
+        self.markets = markets
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.close.shape
+
+
+def array_blocks(dates, codes, close: np.ndarray, volume: np.ndarray,
+                 days: int = PANEL_CHUNK_DAYS, scale: int = 1) -> Iterator[PanelBlock]:
+    """메모리에 있는 (날짜 × 종목) 배열을 days일씩 (합성 데이터 / 검증용)"""
+    dates = np.asarray(dates, dtype=np.int32)
+    codes = np.asarray(codes)
+    for lo in range(0, len(dates), days):
+        hi = lo + days
+        yield PanelBlock(dates[lo:hi], codes, to_price(close[lo:hi], scale),
+                         np.asarray(volume[lo:hi], dtype=np.float32))
+
+
+def snapshot_blocks(dates: list[str], load: Callable[[str], pd.DataFrame],
+                    days: int = PANEL_CHUNK_DAYS, scale: int = 1) -> Iterator[PanelBlock]:
+    """
+    날짜별 스냅샷을 days일씩 읽어 구간으로 (load: research.load_kr_snapshot 등)
+    한 구간의 스냅샷만 메모리에 둠
+    """
+    codes: list[str] = []
+    col: dict[str, int] = {}
+    categories: list[str] = []
+    market_codes = np.zeros(0, dtype=np.int8)
+    for lo in range(0, len(dates), days):
+        snaps = [(d, load(d)) for d in dates[lo:lo + days]]
+        snaps = [(d, snap) for d, snap in snaps if not snap.empty]
+        if not snaps:
+            continue
+        for _, snap in snaps:
+            for code in snap.index:
+                if code not in col:
+                    col[code] = len(codes)
+                    codes.append(code)
+        market_codes = np.concatenate(
+            [market_codes, np.full(len(codes) - len(market_codes), -1, dtype=np.int8)]
+        )
+        close = np.zeros((len(snaps), len(codes)), dtype=np.int32)
+        volume = np.full((len(snaps), len(codes)), np.nan, dtype=np.float32)
+        for r, (_, snap) in enumerate(snaps):
+            idx = np.fromiter((col[c] for c in snap.index), dtype=np.int64, count=len(snap))
+            close[r, idx] = to_price(snap["종가"].to_numpy(), scale)
+            volume[r, idx] = snap["거래량"].to_numpy(np.float32)
+            if "시장" in snap.columns:
+                for market in snap["시장"].unique():
+                    if market not in categories:
+                        categories.append(market)
+                market_codes[idx] = pd.Categorical(snap["시장"], categories=categories).codes
+        block_dates = np.array([int(d) for d, _ in snaps], dtype=np.int32)
+        del snaps
+        yield PanelBlock(block_dates, np.array(codes), close, volume,
+                         pd.Categorical.from_codes(market_codes, categories) if categories else None)
+
+
+class RollingCarry:
+    """구간 경계를 넘기는 종목별 최근 keep개 거래일 종가 / 거래량 + 그 앞에 지나간 거래일 수"""
+
+    def __init__(self, keep: int):
+        self.keep = keep
+        self.close: list[np.ndarray] = []
+        self.volume: list[np.ndarray] = []
+        self.seen: list[int] = []
+
+    def grow(self, n: int):
+        empty = np.zeros(0)
+        while len(self.close) < n:
+            self.close.append(empty)
+            self.volume.append(empty)
+            self.seen.append(0)
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.close) + sum(a.nbytes for a in self.volume)
+
+
+def compute_block(block: PanelBlock, carry: RollingCarry, pairs: list[tuple[int, int]],
+                  scale: int = 1, rsi_period: int = RSI_PERIOD):
+    """
+    한 구간의 지표 / 크로스 (이전 구간 값은 carry에서 이어 받고, 끝에서 carry 갱신)
+    Returns: ({지표: (날짜 × 종목) float32}, {"date", "col", "pair", "type", "close"})
+    """
+    windows = _windows(pairs)
+    n_days, n_codes = block.shape
+    carry.grow(n_codes)
+    names = [f"ma{w}" for w in windows] + [f"rsi{rsi_period}", "vol_ratio"]
+    outputs = {name: np.full(block.shape, np.nan, dtype=np.float32) for name in names}
+    events = {k: [] for k in ("date", "col", "pair", "type", "close")}
+    for c in range(n_codes):
+        rows = np.flatnonzero(block.close[:, c] > 0)
+        if len(rows) == 0:
+            continue
+        prev_close, prev_vol = carry.close[c], carry.volume[c]
+        x = np.concatenate([prev_close, block.close[rows, c].astype(np.float64)])
+        vol = np.concatenate([prev_vol, np.nan_to_num(block.volume[rows, c].astype(np.float64))])
+        carried = len(prev_close)
+        values, found = _column(x, vol, carried, carry.seen[c], pairs, windows, rsi_period)
+        for name, v in values.items():
+            outputs[name][rows, c] = v / scale if name.startswith("ma") else v
+        for p, t, k in found:
+            events["date"].append(block.dates[rows[k - carried]])
+            events["col"].append(np.full(len(k), c))
+            events["pair"].append(np.full(len(k), p))
+            events["type"].append(np.full(len(k), t))
+            events["close"].append(x[k] / scale)
+        drop = max(0, len(x) - carry.keep)
+        carry.close[c], carry.volume[c] = x[drop:], vol[drop:]
+        carry.seen[c] += drop
+    return outputs, _merge_events(events)
+
+
+def check_memory(limit_mb: float, where: str):
+    if limit_mb and rss_mb() > limit_mb:
+        raise PanelMemoryError(
+            f"RSS {rss_mb():.0f}MB > 상한 {limit_mb:.0f}MB ({where}) — --chunk-days를 줄이세요"
+        )
+
+
+def compute_chunked(blocks: Iterable[PanelBlock], pairs: list[tuple[int, int]] = PANEL_MA_PAIRS,
+                    scale: int = 1, limit_mb: float = PANEL_MEMORY_LIMIT_MB,
+                    on_block: Optional[Callable[[PanelBlock, dict[str, np.ndarray]], None]] = None,
+                    ) -> pd.DataFrame:
+    """
+    구간 단위 지표 / 크로스 계산 — compute_indicators(전체 패널)와 같은 이벤트
+    on_block(block, 지표): 구간별 지표를 받아 저장 / 집계 (넘기지 않으면 버림)
+    구간마다 RSS를 확인해 limit_mb를 넘으면 PanelMemoryError
+    Returns: 크로스 이벤트 (date, code, pair, 유형, close) — 날짜 / 종목코드 / MA쌍 / 유형 순
+    """
+    carry = RollingCarry(_keep(pairs))
+    parts = []
+    codes = np.zeros(0, dtype=str)
+    n_blocks = 0
+    for block in blocks:
+        outputs, events = compute_block(block, carry, pairs, scale)
+        if on_block:
+            on_block(block, outputs)
+        del outputs
+        parts.append(events)
+        codes = block.codes
+        n_blocks += 1
+        check_memory(limit_mb, f"{n_blocks}번째 구간 {block.dates[0]}~{block.dates[-1]}")
+    log.info(f"구간 {n_blocks}개, 종목 {len(codes)}개, 넘긴 값 {carry.nbytes() / 2**20:.1f}MB, "
+             f"peak RSS {peak_rss_mb():.0f}MB")
+
+    merged = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]} if parts else {}
+    if not merged or not len(merged["date"]):
+        return pd.DataFrame(columns=["date", "code", "pair", "유형", "close"])
+    # 열 번호는 종목 첫 등장 순이므로 종목코드 순위로 바꿔 정렬
+    rank = np.empty(len(codes), dtype=np.int64)
+    rank[np.argsort(codes, kind="stable")] = np.arange(len(codes))
+    order = np.lexsort((merged["type"], merged["pair"], rank[merged["col"]], merged["date"]))
+    labels = [f"{s}/{l}" for s, l in pairs]
+    return pd.DataFrame({
+        "date": merged["date"][order].astype(np.int32),
+        "code": codes[merged["col"][order]],
+        "pair": pd.Categorical.from_codes(merged["pair"][order], labels),
+        "유형": pd.Categorical.from_codes(merged["type"][order], list(CROSS_TYPES)),
+        "close": merged["close"][order],
+    })
+
+
+def verify_chunked(panel: Panel, blocks: Iterable[PanelBlock],
+                   pairs: list[tuple[int, int]] = PANEL_MA_PAIRS,
+                   limit_mb: float = 0) -> tuple[pd.DataFrame, bool]:
+    """구간 처리 결과(이벤트 + 지표 전체)가 전체 패널 계산(compute_indicators)과 같은지 확인"""
+    expected = compute_indicators(panel, pairs, workers=1)
+    col = {code: i for i, code in enumerate(panel.codes)}
+    row = {date: i for i, date in enumerate(panel.dates)}
+    same = [True]
+
+    def compare(block: PanelBlock, outputs: dict[str, np.ndarray]):
+        rows = np.array([row[d] for d in block.dates])
+        cols = np.array([col[c] for c in block.codes])
+        for name, values in outputs.items():
+            want = np.asarray(panel.data[name][np.ix_(rows, cols)])
+            if not np.array_equal(want, values, equal_nan=True):
+                log.error(f"지표 불일치: {name} ({block.dates[0]}~{block.dates[-1]})")
+                same[0] = False
+
+    events = compute_chunked(blocks, pairs, panel.scale, limit_mb, compare)
+    expected = expected.sort_values(["date", "code", "pair", "유형"], kind="stable").reset_index(drop=True)
+    if not events.astype(str).equals(expected.astype(str)):
+        log.error(f"크로스 이벤트 불일치: 구간 처리 {len(events)}개, 전체 {len(expected)}개")
+        same[0] = False
+    return events, same[0]
+
+
+# ---------------------------------------------------------------------------
+# 벤치마크
+# ---------------------------------------------------------------------------
+def _synthetic(args):
+    from synthetic import SyntheticMarket
+    tickers, days = (int(n) for n in args.synthetic.lower().split("x"))
+    market = SyntheticMarket(args.universe, tickers=tickers, days=days, seed=args.seed)
+    close = np.where(market.halted, np.nan, market.closes)
+    return market, close
+
+
+def load_panel(args) -> Panel:
+    scale = PRICE_SCALE[args.universe]
+    if args.synthetic:
+        market, close = _synthetic(args)
+        return Panel.from_arrays([int(d) for d in market.dates], market.codes, close,
+                                 market.volume.astype(np.float32),
+                                 np.where(market.halted, np.nan, market.pct).astype(np.float32), scale)
+
+    import research
+    if args.universe == "KR":
+        dates = research.kr_trading_days(args.date_from, args.date_to)
+        snapshots = {d: research.load_kr_snapshot(d) for d in dates}
+    else:
+        snapshots = research.load_us_snapshots(args.date_from, args.date_to)
+    return Panel.from_snapshots(snapshots, scale)
+
+
+def load_blocks(args) -> Iterator[PanelBlock]:
+    """구간 단위 로드 (KR은 research_cache에서 chunk_days일씩 읽음)"""
+    scale = PRICE_SCALE[args.universe]
+    if args.synthetic:
+        market, close = _synthetic(args)
+        return array_blocks([int(d) for d in market.dates], market.codes, close,
+                            market.volume, args.chunk_days, scale)
+
+    import research
+    if args.universe == "KR":
+        dates = research.kr_trading_days(args.date_from, args.date_to)
+        return snapshot_blocks(dates, research.load_kr_snapshot, args.chunk_days, scale)
+    snapshots = research.load_us_snapshots(args.date_from, args.date_to)
+    return snapshot_blocks(sorted(snapshots), snapshots.get, args.chunk_days, scale)
+
+
+def bench(panel: Panel, workers_list: list[int], pairs: list[tuple[int, int]]) -> list[dict]:
+    results = []
+    base_hash = None
+    for workers in workers_list:
+        # 같은 패널에 매번 새 출력 필드 (이전 결과 재사용 방지)
+        for name in [n for n in panel.data.arrays if n not in Panel.FIELDS]:
+            del panel.data.arrays[name]
+            del panel.data.dtypes[name]
+        start = time.perf_counter()
+        events = compute_indicators(panel, pairs, workers)
+        elapsed = time.perf_counter() - start
+        h = digest(panel, events)
+        base_hash = base_hash or h
+        results.append({
+            "workers": workers, "seconds": round(elapsed, 3), "events": len(events),
+            "speedup": round(results[0]["seconds"] / elapsed, 2) if results else 1.0,
+            "same": h == base_hash,
+        })
+    return results
+
+
+def run_chunked(args):
+    start = time.perf_counter()
+    if args.verify:
+        panel = load_panel(args)
+        try:
+            events, same = verify_chunked(panel, load_blocks(args), PANEL_MA_PAIRS)
+        finally:
+            panel.close()
+    else:
+        try:
+            events = compute_chunked(load_blocks(args), PANEL_MA_PAIRS, PRICE_SCALE[args.universe],
+                                     args.memory_limit)
+        except PanelMemoryError as e:
+            log.error(str(e))
+            sys.exit(1)
+        same = True
+    log.info(f"크로스 {len(events)}개, {time.perf_counter() - start:.1f}s, "
+             f"구간 {args.chunk_days}일, peak RSS {peak_rss_mb():.0f}MB")
+    if args.verify:
+        print(f"same: {same}")
+        if not same:
+            log.error("구간 처리 결과가 전체 계산과 다름")
+            sys.exit(1)
+
+
+def _date_arg(value: str) -> str:
+    return value.replace("-", "")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    parser = argparse.ArgumentParser(description="가격 패널 지표 / 크로스 멀티코어 계산")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("bench", help="프로세스 수별 실행 시간 / 결과 동일성")
+    b.add_argument("--universe", choices=["KR", "US"], default="KR")
+    b.add_argument("--from", dest="date_from", type=_date_arg, default="20150101")
+    b.add_argument("--to", dest="date_to", type=_date_arg, default=time.strftime("%Y%m%d"))
+    b.add_argument("--synthetic", metavar="TICKERSxDAYS", help="합성 패널 (예: 2600x2500)")
+    b.add_argument("--seed", type=int, default=7)
+    b.add_argument("--workers", default=",".join(
+        str(n) for n in sorted({1, 2, 4, os.cpu_count() or 1})
+    ), help="쉼표 구분 프로세스 수")
+    c = sub.add_parser("chunked", help="날짜 구간 단위 계산 (메모리 상한, peak RSS)")
+    c.add_argument("--universe", choices=["KR", "US"], default="KR")
+    c.add_argument("--from", dest="date_from", type=_date_arg, default="20150101")
+    c.add_argument("--to", dest="date_to", type=_date_arg, default=time.strftime("%Y%m%d"))
+    c.add_argument("--synthetic", metavar="TICKERSxDAYS", help="합성 패널 (예: 2600x5000)")
+    c.add_argument("--seed", type=int, default=7)
+    c.add_argument("--chunk-days", type=int, default=PANEL_CHUNK_DAYS)
+    c.add_argument("--memory-limit", type=float, default=PANEL_MEMORY_LIMIT_MB,
+                   help="RSS 상한 (MB, 0 = 제한 없음)")
+    c.add_argument("--verify", action="store_true",
+                   help="전체 패널 계산과 결과 비교 (전체 패널을 만들므로 상한 확인은 생략)")
+    args = parser.parse_args()
+
+    if args.command == "chunked":
+        run_chunked(args)
+        return
+
+    workers_list = [int(n) for n in args.workers.split(",") if n.strip()]
+    start = time.perf_counter()
+    panel = load_panel(args)
+    try:
+        log.info(f"패널 {panel.shape[0]}일 × {panel.shape[1]}종목 ({panel.data.root}), "
+                 f"로드 {time.perf_counter() - start:.1f}s, CPU {os.cpu_count()}개, MA 쌍 {PANEL_MA_PAIRS}")
+        if panel.shape[1] == 0:
+            log.error("패널이 비어 있음")
+            sys.exit(1)
+        results = bench(panel, workers_list, PANEL_MA_PAIRS)
+    finally:
+        panel.close()
+
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8} {'events':>9}  same")
+    for r in results:
+        print(f"{r['workers']:>8} {r['seconds']:>9.3f} {r['speedup']:>8.2f} {r['events']:>9}  {r['same']}")
+    if not all(r["same"] for r in results):
+        log.error("프로세스 수에 따라 결과가 다름")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
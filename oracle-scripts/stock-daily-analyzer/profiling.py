@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+단계별 프로파일링 (--profile)
+- 단계마다 cProfile(결정적) → {단계}.prof (pstats / snakeviz로 확인)
+  cProfile은 단계를 연 스레드(메인)만 봄 → 스레드 풀 작업(사유 단계의 헤드라인 수집 /
+  Claude 호출, 시트 쓰기 스레드)은 아래 스택 샘플에서 확인
+- 스택 샘플링(PROFILE_INTERVAL_MS 간격, 모든 스레드) → profile.folded
+  (flamegraph.pl / speedscope / inferno용 collapsed stack, 최상위 프레임은 단계명,
+   메인 외 스레드는 그 아래에 "[스레드명]" 프레임. 작업을 기다리는 풀 스레드는 제외)
+- tracemalloc → 단계별 peak 메모리, 벽시계/CPU 시간 → stages.json + 로그 표
+- 꺼져 있으면 stage()는 아무것도 하지 않는 context manager (오버헤드 거의 없음)
+"""
+
+import os
+import sys
+import json
+import time
+import cProfile
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from checkpoints import RUNS_DIR
+
+log = logging.getLogger(__name__)
+
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+
+def profile_dir(tag: str) -> Path:
+    """프로파일 출력 디렉터리 runs/profiles/{tag}-{시각}"""
+    return RUNS_DIR / "profiles" / f"{tag}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+
+def _idle(frame) -> bool:
+    """작업 대기 중인 풀 스레드 (ThreadPoolExecutor 작업 큐 대기)"""
+    code = frame.f_code
+    return (code.co_name == "_worker"
+            and code.co_filename.endswith(os.path.join("concurrent", "futures", "thread.py")))
+
+
+class _Sampler(threading.Thread):
+    """모든 스레드의 스택을 주기적으로 샘플링해 collapsed stack 카운트로 누적"""
+
+    def __init__(self, main_id: int, interval: float):
+        super().__init__(daemon=True, name="profile-sampler")
+        self.main_id = main_id
+        self.interval = interval
+        self.stage: Optional[str] = None
+        self.counts: dict[str, int] = {}
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            stage = self.stage
+            if stage is None:
+                continue
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                if thread_id != self.main_id and _idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                prefix = [stage] if thread_id == self.main_id else [stage, f"[{names.get(thread_id, thread_id)}]"]
+                key = ";".join(prefix + stack[::-1])
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+
+class StageProfiler:
+    """
+    with profiler.stage("crosses"): ... 로 단계 구분
+    enabled=False면 stage()가 nullcontext를 돌려줌
+    """
+
+    def __init__(self, enabled: bool = False, out_dir: Optional[Path] = None):
+        self.enabled = enabled
+        self.out_dir = out_dir
+        self.stats: list[dict] = []
+        self._sampler: Optional[_Sampler] = None
+        if enabled:
+            tracemalloc.start()
+            self._sampler = _Sampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+            self._sampler.start()
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return nullcontext()
+        return self._profile(name)
+
+    @contextmanager
+    def _profile(self, name: str):
+        outer = self._sampler.stage
+        # cProfile은 동시에 하나만 켤 수 있으므로 중첩 단계는 샘플링 / 메모리만 기록
+        # (켜도 현재 스레드만 봄 — 작업 스레드는 샘플러가 스레드별로 기록)
+        profiler = cProfile.Profile() if outer is None else None
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        wall, cpu = time.perf_counter(), time.process_time()
+        self._sampler.stage = name if outer is None else f"{outer};{name}"
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            self._sampler.stage = outer
+            current, peak = tracemalloc.get_traced_memory()
+            self.stats.append({
+                "stage": name,
+                "wall_s": round(time.perf_counter() - wall, 3),
+                "cpu_s": round(time.process_time() - cpu, 3),
+                "peak_mb": round((peak - base) / 2**20, 2),
+                "retained_mb": round((current - base) / 2**20, 2),
+            })
+            if profiler:
+                self.out_dir.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(str(self.out_dir / f"{name}.prof"))
+
+    def close(self):
+        """샘플러 중지 후 profile.folded / stages.json 기록"""
+        if not self.enabled:
+            return
+        self._sampler.stop()
+        tracemalloc.stop()
+        self.enabled = False
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.out_dir / "profile.folded", "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._sampler.counts.items()):
+                f.write(f"{stack} {count}\n")
+        with open(self.out_dir / "stages.json", "w", encoding="utf-8") as f:
+            json.dump(self.stats, f, ensure_ascii=False, indent=2)
+
+        log.info(f"프로파일 저장: {self.out_dir}")
+        log.info(f"  {'단계':<12} {'wall(s)':>9} {'cpu(s)':>9} {'peak(MB)':>9}")
+        for s in self.stats:
+            log.info(f"  {s['stage']:<12} {s['wall_s']:>9.2f} {s['cpu_s']:>9.2f} {s['peak_mb']:>9.1f}")
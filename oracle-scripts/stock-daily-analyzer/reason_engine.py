@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+"""
+AI 사유 분석 엔진 (한국 / 미국 공용)
+- 헤드라인 소스는 교체 가능: 네이버 금융(KR), Yahoo Finance RSS(US), 로컬 JSON(오프라인 / 테스트)
+- 헤드라인 수집은 스레드 풀에서 병렬로, 소스별 최소 요청 간격은 지킴 (크롤링 예의)
+- 수집한 헤드라인은 (소스, 종목)별로 HEADLINE_CACHE_TTL초 동안 재사용 (daemon 모드에서 실행 간 유지)
+- prefetch(): 수집을 백그라운드로 먼저 시작 → 크로스 분석 등 다른 단계와 겹쳐 진행
+- Claude 요청은 REASON_BATCH_ITEMS개씩 나눠 병렬로, 배치마다 헤드라인 중복 제거 + 입력 토큰 예산 적용
+- 모델 2단계: 단순한 항목(헤드라인 1개 / 공시성 뉴스 / 뉴스 없음)은 빠른 모델(REASON_FAST_MODEL),
+  애매한 항목(헤드라인 여러 개, 업종 묶음)과 빠른 모델이 답하지 못한 항목만 큰 모델(REASON_MODEL)
+- analyze 호출마다 시간(REASON_LATENCY_BUDGET) / 토큰(REASON_TOKEN_BUDGET) 예산,
+  예산 안에 끝나지 않은 항목은 정해진 형식의 템플릿 사유로 채움
+- 단계별 항목 수 / 배치 수 / 소요 시간 / 입력·출력 토큰을 로그로 남김
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Optional
+
+import requests
+import anthropic
+from bs4 import BeautifulSoup
+
+from headlines import HeadlineDigest, estimate_tokens
+
+log = logging.getLogger(__name__)
+
+REASON_MODEL = os.getenv("REASON_MODEL", "claude-sonnet-4-5-20250929")
+# 단순 항목용 모델 ("" = 라우팅 없이 전부 REASON_MODEL)
+REASON_FAST_MODEL = os.getenv("REASON_FAST_MODEL", "claude-haiku-4-5-20251001")
+# analyze 호출당 예산: 시간(초, timeout을 넘기지 않은 경우) / 입력+출력 토큰 (0 = 제한 없음)
+REASON_LATENCY_BUDGET = float(os.getenv("REASON_LATENCY_BUDGET", "300"))
+REASON_TOKEN_BUDGET = int(os.getenv("REASON_TOKEN_BUDGET", "200000"))
+# AI 사유 분석 프롬프트 입력 토큰 예산 (추정치 기준, 배치마다)
+REASON_INPUT_TOKEN_BUDGET = int(os.getenv("REASON_INPUT_TOKEN_BUDGET", "6000"))
+# Claude 한 번에 보낼 최대 항목 수
+REASON_BATCH_ITEMS = int(os.getenv("REASON_BATCH_ITEMS", "25"))
+# 헤드라인 수집 / Claude 요청 동시 실행 수
+REASON_WORKERS = int(os.getenv("REASON_WORKERS", "4"))
+HEADLINE_CACHE_TTL = float(os.getenv("HEADLINE_CACHE_TTL", "1800"))
+# 종목별 최대 헤드라인 수
+HEADLINES_PER_ITEM = 3
+
+MARKET_NAMES = {"KR": "한국", "US": "미국"}
+# 응답 토큰 추정 (항목당, 예산 예약용)
+OUTPUT_TOKENS_PER_ITEM = 40
+# 첫 헤드라인이 공시 / 이벤트성이면 사유가 분명한 것으로 보고 빠른 모델로
+DISCLOSURE_RE = re.compile(
+    r"공시|유상증자|무상증자|감자|자사주|최대주주|합병|분할|상장폐지|거래정지|관리종목|"
+    r"공급계약|단일판매|수주|잠정실적|영업이익|배당|"
+    r"8-K|10-Q|10-K|earnings|guidance|dividend|buyback|merger|acqui|FDA|stock split|downgrade|upgrade",
+    re.IGNORECASE,
+)
+
+
+# ---------------------------------------------------------------------------
+# 헤드라인 소스
+# ---------------------------------------------------------------------------
+class HeadlineSource:
+    """종목코드 → 최근 헤드라인. 실패는 예외로 알림 (빈 목록은 '뉴스 없음'으로 캐시됨)"""
+
+    name = "base"
+    min_interval = 0.0  # 같은 소스 요청 시작 간 최소 간격 (초)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = 0.0
+
+    def throttle(self):
+        with self._lock:
+            wait_s = self.min_interval - (time.monotonic() - self._last)
+            if wait_s > 0:
+                time.sleep(wait_s)
+            self._last = time.monotonic()
+
+    def fetch(self, code: str) -> list[str]:
+        raise NotImplementedError
+
+
+class NaverNewsSource(HeadlineSource):
+    """네이버 금융 종목 뉴스 (한국)"""
+
+    name = "naver"
+    min_interval = 0.3
+    URL = "https://finance.naver.com/item/news_news.naver?code={code}&page=1"
+
+    def __init__(self):
+        super().__init__()
+        self.session = requests.Session()
+        self.session.headers.update({
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        })
+
+    def fetch(self, code: str) -> list[str]:
+        resp = self.session.get(self.URL.format(code=code), timeout=10)
+        resp.raise_for_status()
+        resp.encoding = "euc-kr"
+        soup = BeautifulSoup(resp.text, "html.parser")
+        titles = []
+        for a_tag in soup.select("td.title a"):
+            title = a_tag.get_text(strip=True)
+            if title:
+                titles.append(title)
+            if len(titles) >= HEADLINES_PER_ITEM:
+                break
+        return titles
+
+
+class YahooRSSSource(HeadlineSource):
+    """Yahoo Finance 종목 헤드라인 RSS (미국, API 키 불필요)"""
+
+    name = "yahoo"
+    min_interval = 0.2
+    URL = "https://feeds.finance.yahoo.com/rss/2.0/headline"
+
+    def __init__(self):
+        super().__init__()
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "Mozilla/5.0"})
+
+    def fetch(self, code: str) -> list[str]:
+        resp = self.session.get(
+            self.URL, params={"s": code.replace(".", "-"), "region": "US", "lang": "en-US"}, timeout=10
+        )
+        resp.raise_for_status()
+        root = ET.fromstring(resp.content)
+        titles = [t.text.strip() for t in root.iter("title") if t.text and t.text.strip()]
+        # 첫 title은 채널 제목
+        return titles[1:HEADLINES_PER_ITEM + 1]
+
+
+class LocalHeadlineSource(HeadlineSource):
+    """로컬 JSON {종목코드: [헤드라인]} (오프라인 실행 / 외부 소스 대체)"""
+
+    name = "local"
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        with open(path, encoding="utf-8") as f:
+            self.data = json.load(f)
+
+    def fetch(self, code: str) -> list[str]:
+        return list(self.data.get(code, []))[:HEADLINES_PER_ITEM]
+
+
+def headline_source(market: str) -> HeadlineSource:
+    """시장별 기본 소스. {KR,US}_HEADLINES_FILE이 있으면 로컬 JSON 사용"""
+    local = os.getenv(f"{market}_HEADLINES_FILE", "")
+    if local:
+        return LocalHeadlineSource(local)
+    return NaverNewsSource() if market == "KR" else YahooRSSSource()
+
+
+# ---------------------------------------------------------------------------
+# 공유 리소스 (스레드 풀, 헤드라인 캐시, Anthropic 클라이언트)
+# ---------------------------------------------------------------------------
+_executor: Optional[ThreadPoolExecutor] = None
+_cache: dict[tuple[str, str], tuple[float, list[str]]] = {}
+_inflight: dict[tuple[str, str], Future] = {}
+_cache_lock = threading.Lock()
+_anthropic_client: Optional[anthropic.Anthropic] = None
+
+
+def executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=REASON_WORKERS, thread_name_prefix="reason")
+    return _executor
+
+
+def api_key() -> str:
+    # 호출 시점에 읽음 (실행 스크립트가 import 뒤에 load_dotenv 호출)
+    return os.getenv("ANTHROPIC_API_KEY", "")
+
+
+def get_anthropic_client() -> anthropic.Anthropic:
+    """Anthropic 클라이언트 (연결 풀 재사용을 위해 한 번만 생성)"""
+    global _anthropic_client
+    if _anthropic_client is None:
+        _anthropic_client = anthropic.Anthropic(api_key=api_key())
+    return _anthropic_client
+
+
+# ---------------------------------------------------------------------------
+# 프롬프트
+# ---------------------------------------------------------------------------
+def build_reason_prompt(items: list[dict], shared: list[str], news: list[list[str]],
+                        market: str = "KR") -> str:
+    """사유 분석 프롬프트 (shared: 공통 뉴스 "[H1] ...", news: 종목별 헤드라인 또는 [H번호])"""
+    entries = []
+    for i, item in enumerate(items):
+        code = item["종목코드"]
+        name = item["종목명"]
+        pct = item.get("등락률(%)", 0)
+        news_text = " / ".join(news[i]) if news[i] else "뉴스 없음"
+        if "members" in item:
+            entries.append(
+                f"{i+1}. [업종 {item['업종']}] {len(item['members'])}종목 평균 등락률:{pct}% "
+                f"종목:{name} 뉴스:[{news_text}]"
+            )
+        else:
+            entries.append(f"{i+1}. {name}({code}) 등락률:{pct}% 뉴스:[{news_text}]")
+
+    shared_text = ""
+    if shared:
+        shared_text = (
+            "\n공통 뉴스 (여러 종목에 해당, 종목 목록에서 [H번호]로 참조):\n"
+            + "\n".join(shared) + "\n"
+        )
+
+    return f"""아래는 오늘 {MARKET_NAMES.get(market, market)} 주식 시장에서 주목할 종목 {len(items)}개의 정보입니다.
+각 종목에 대해 등락 사유를 한국어 한 줄(30자 이내)로 요약해주세요.
+[업종 ...] 항목은 같은 업종 종목 묶음이므로 공통 사유(테마)를 한 줄로 요약해주세요.
+뉴스가 없으면 등락률과 시장 상황을 기반으로 추정해주세요.
+
+반드시 아래 JSON 배열 형식으로만 응답하세요:
+["1번 사유", "2번 사유", ...]
+{shared_text}
+종목 목록:
+{chr(10).join(entries)}"""
+
+
+def _news_codes(item: dict) -> list[str]:
+    return item.get("news_codes", [item["종목코드"]])
+
+
+def _item_headlines(item: dict, news_data: dict[str, list[str]]) -> list[str]:
+    """종목별 헤드라인 (업종 묶음 항목은 여러 종목 뉴스 합침)"""
+    headlines = []
+    for c in _news_codes(item):
+        headlines += [h for h in news_data.get(c, []) if h not in headlines]
+    return headlines
+
+
+# ---------------------------------------------------------------------------
+# 모델 라우팅 / 예산 / 템플릿
+# ---------------------------------------------------------------------------
+def route(item: dict, headlines: list[str]) -> str:
+    """
+    "fast": 헤드라인 0~1개이거나 첫 헤드라인이 공시 / 이벤트성 → 사유가 분명하거나 추정뿐
+    "large": 헤드라인이 여러 개라 골라야 하는 항목, 업종 묶음 (공통 테마 요약)
+    """
+    if "members" in item:
+        return "large"
+    if len(headlines) <= 1 or DISCLOSURE_RE.search(headlines[0]):
+        return "fast"
+    return "large"
+
+
+def tier_model(tier: str) -> str:
+    return REASON_FAST_MODEL if tier == "fast" and REASON_FAST_MODEL else REASON_MODEL
+
+
+def _shorten(text: str, limit: int = 30) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def template_reason(item: dict, headlines: list[str]) -> str:
+    """예산 안에 분석하지 못한 항목의 사유 (같은 입력이면 항상 같은 결과)"""
+    pct = float(item.get("등락률(%)", 0) or 0)
+    move = "급등" if pct > 0 else "급락"
+    if "members" in item:
+        return f"{item['업종']} 업종 동반 {move} ({len(item['members'])}종목 평균 {pct:+.1f}%)"
+    if headlines:
+        return _shorten(headlines[0])
+    return f"{move} {pct:+.1f}% (관련 뉴스 없음)"
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class RunBudget:
+    """analyze 한 번의 시간 / 토큰 예산 (배치 스레드들이 공유)"""
+
+    def __init__(self, seconds: Optional[float], tokens: int = REASON_TOKEN_BUDGET):
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.tokens = tokens
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def remaining(self) -> Optional[float]:
+        return max(0.0, self.deadline - time.monotonic()) if self.deadline else None
+
+    def reserve(self, estimate: int):
+        """배치 요청 전 추정 토큰 예약. 시간 / 토큰이 모자라면 BudgetExceeded"""
+        with self._lock:
+            if self.deadline and time.monotonic() >= self.deadline:
+                raise BudgetExceeded("시간 예산 소진")
+            if self.tokens and self.used + estimate > self.tokens:
+                raise BudgetExceeded(f"토큰 예산 소진 ({self.used}/{self.tokens})")
+            self.used += estimate
+
+    def settle(self, estimate: int, actual: int):
+        with self._lock:
+            self.used += actual - estimate
+
+
+class TierStats:
+    """모델 단계별 항목 / 배치 / 소요 시간 / 토큰"""
+
+    def __init__(self):
+        self.counts: dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    def add(self, tier: str, **values):
+        with self._lock:
+            self.counts.setdefault(tier, Counter()).update(values)
+
+    def summary(self) -> str:
+        parts = []
+        for tier, c in self.counts.items():
+            if tier == "template":
+                parts.append(f"템플릿 {c['items']}개")
+                continue
+            parts.append(
+                f"{tier}({tier_model(tier)}) {c['items']}개/{c['batches']}배치 {c['seconds']:.1f}s "
+                f"입력 {c['input_tokens']}·출력 {c['output_tokens']} 토큰"
+                + (f", 실패 {c['failed']}배치" if c["failed"] else "")
+                + (f", 승격 {c['escalated']}개" if c["escalated"] else "")
+            )
+        return ", ".join(parts)
+
+
+# ---------------------------------------------------------------------------
+# 엔진
+# ---------------------------------------------------------------------------
+class ReasonEngine:
+    """
+    engine = ReasonEngine("US", YahooRSSSource())
+    engine.prefetch(items)          # 헤드라인 수집 시작 (즉시 반환)
+    reasons = engine.analyze(items, timeout=120)   # {종목코드: 사유}
+    """
+
+    def __init__(self, market: str, source: Optional[HeadlineSource] = None):
+        self.market = market
+        self.source = source or headline_source(market)
+
+    # -- 헤드라인 ------------------------------------------------------------
+    def _fetch(self, code: str) -> list[str]:
+        key = (self.source.name, code)
+        try:
+            self.source.throttle()
+            headlines = self.source.fetch(code)
+        except Exception as e:
+            log.debug(f"헤드라인 수집 실패 ({self.source.name}, {code}): {e}")
+            with _cache_lock:
+                _inflight.pop(key, None)
+            return []
+        with _cache_lock:
+            _cache[key] = (time.monotonic(), headlines)
+            _inflight.pop(key, None)
+        return headlines
+
+    def _future(self, code: str) -> Future:
+        """캐시에 있으면 완료된 Future, 수집 중이면 그 Future, 아니면 새로 제출"""
+        key = (self.source.name, code)
+        with _cache_lock:
+            cached = _cache.get(key)
+            if cached and time.monotonic() - cached[0] < HEADLINE_CACHE_TTL:
+                done: Future = Future()
+                done.set_result(cached[1])
+                return done
+            future = _inflight.get(key)
+            if future is None:
+                future = executor().submit(self._fetch, code)
+                _inflight[key] = future
+            return future
+
+    def prefetch(self, items: list[dict]) -> dict[str, Future]:
+        futures = {}
+        for item in items:
+            for code in _news_codes(item):
+                if code not in futures:
+                    futures[code] = self._future(code)
+        return futures
+
+    def headlines(self, items: list[dict], timeout: Optional[float] = None) -> dict[str, list[str]]:
+        """{종목코드: [헤드라인]} (timeout 안에 못 받은 종목은 빈 목록)"""
+        futures = self.prefetch(items)
+        wait(futures.values(), timeout=timeout)
+        return {code: f.result() if f.done() else [] for code, f in futures.items()}
+
+    # -- Claude --------------------------------------------------------------
+    def _analyze_batch(self, items: list[dict], news_data: dict[str, list[str]], tier: str = "large",
+                       budget: Optional[RunBudget] = None, stats: Optional[TierStats] = None) -> dict[str, str]:
+        per_item = [_item_headlines(item, news_data) for item in items]
+        before = estimate_tokens(build_reason_prompt(items, [], per_item, self.market))
+
+        # 유사 중복 헤드라인은 공통 뉴스로 한 번만, 예산 초과 시 뒤쪽 종목 헤드라인부터 줄임
+        digest = HeadlineDigest(per_item)
+        shared, news = digest.render()
+        prompt = build_reason_prompt(items, shared, news, self.market)
+        while estimate_tokens(prompt) > REASON_INPUT_TOKEN_BUDGET:
+            if not digest.shrink():
+                if len(items) <= 1:
+                    break
+                items = items[:-1]
+                digest.drop_last()
+            shared, news = digest.render()
+            prompt = build_reason_prompt(items, shared, news, self.market)
+        after = estimate_tokens(prompt)
+        log.info(
+            f"사유 프롬프트({self.market}, {tier}): 헤드라인 {digest.input_count}개 → 고유 {len(digest.texts)}개 "
+            f"(공통 {len(shared)}개), 입력 토큰(추정) {before} → {after}, 종목 {len(items)}개"
+        )
+
+        budget = budget or RunBudget(None, 0)
+        stats = stats or TierStats()
+        estimate = after + OUTPUT_TOKENS_PER_ITEM * len(items)
+        budget.reserve(estimate)
+        # 요청 timeout도 남은 시간으로 (None을 넘기면 클라이언트 기본 timeout이 꺼짐)
+        remaining = budget.remaining()
+        options = {"timeout": max(1.0, remaining)} if remaining is not None else {}
+        start = time.monotonic()
+        try:
+            response = get_anthropic_client().messages.create(
+                model=tier_model(tier),
+                max_tokens=2048,
+                messages=[{"role": "user", "content": prompt}],
+                **options,
+            )
+        except Exception:
+            budget.settle(estimate, 0)
+            stats.add(tier, failed=1, seconds=time.monotonic() - start)
+            raise
+        usage = response.usage
+        budget.settle(estimate, usage.input_tokens + usage.output_tokens)
+        stats.add(tier, batches=1, items=len(items), seconds=time.monotonic() - start,
+                  input_tokens=usage.input_tokens, output_tokens=usage.output_tokens)
+        text = response.content[0].text.strip()
+        # JSON 추출
+        if "```" in text:
+            m = re.search(r"```(?:json)?\s*([\s\S]*?)```", text)
+            if m:
+                text = m.group(1).strip()
+        reasons = json.loads(text)
+
+        result = {}
+        for i, item in enumerate(items):
+            if i < len(reasons):
+                for code in item.get("members", [item["종목코드"]]):
+                    result[code] = reasons[i]
+        return result
+
+    def _run_batches(self, routed: dict[str, list[dict]], news_data: dict[str, list[str]],
+                     budget: RunBudget, stats: TierStats) -> tuple[dict[str, str], dict[str, list[dict]]]:
+        """단계별 배치를 병렬 요청. Returns: (결과, {단계: 결과가 없는 항목})"""
+        jobs = []
+        for tier, tier_items in routed.items():
+            for i in range(0, len(tier_items), REASON_BATCH_ITEMS):
+                batch = tier_items[i:i + REASON_BATCH_ITEMS]
+                jobs.append((tier, batch, executor().submit(
+                    self._analyze_batch, batch, news_data, tier, budget, stats
+                )))
+        wait([f for _, _, f in jobs], timeout=budget.remaining())
+
+        result, missing = {}, {}
+        for tier, batch, future in jobs:
+            if not future.done():
+                log.warning(f"AI 사유 분석 시간 초과 ({self.market}, {tier}, {len(batch)}개 종목)")
+            else:
+                try:
+                    result.update(future.result())
+                except BudgetExceeded as e:
+                    log.warning(f"AI 사유 분석 예산 초과 ({self.market}, {tier}): {e}")
+                except Exception as e:
+                    log.error(f"AI 사유 분석 실패 ({self.market}, {tier}): {e}")
+            missing.setdefault(tier, []).extend(item for item in batch if item["종목코드"] not in result)
+        return result, missing
+
+    def fallback_reason(self, item: dict) -> str:
+        """템플릿 사유 (캐시에 남은 헤드라인 사용, 수집은 하지 않음)"""
+        with _cache_lock:
+            news_data = {
+                code: _cache[(self.source.name, code)][1]
+                for code in _news_codes(item) if (self.source.name, code) in _cache
+            }
+        return template_reason(item, _item_headlines(item, news_data))
+
+    def analyze(self, items: list[dict], news_data: Optional[dict[str, list[str]]] = None,
+                timeout: Optional[float] = None, fallback: bool = True) -> dict[str, str]:
+        """
+        Claude API로 종목별 사유 분석 (단계별로 REASON_BATCH_ITEMS개씩 병렬 요청)
+        news_data: 수집된 헤드라인 (없으면 여기서 수집 — prefetch해 둔 결과 재사용)
+        timeout: 전체 제한 (초, 없으면 REASON_LATENCY_BUDGET). 헤드라인 수집 시간 포함
+        fallback: 예산 안에 못 끝낸 항목을 템플릿 사유로 채움 (False면 결과에서 빠짐 — 작업 큐 재시도용)
+        Returns: {종목코드: 사유 한줄 요약}
+        """
+        if not items:
+            return {}
+        budget = RunBudget(timeout or REASON_LATENCY_BUDGET)
+        stats = TierStats()
+        if news_data is None:
+            news_data = self.headlines(items, budget.remaining())
+
+        result = {}
+        left = list(items)
+        if api_key():
+            routed = {"fast": [], "large": []}
+            for item in items:
+                tier = route(item, _item_headlines(item, news_data)) if REASON_FAST_MODEL else "large"
+                routed[tier].append(item)
+            result, missing = self._run_batches(routed, news_data, budget, stats)
+            # 빠른 모델이 답하지 못한 항목만 큰 모델로 (예산이 남아 있으면)
+            escalate = missing.get("fast", [])
+            if escalate and REASON_FAST_MODEL and (budget.remaining() is None or budget.remaining() > 0):
+                stats.add("large", escalated=len(escalate))
+                more, again = self._run_batches({"large": escalate}, news_data, budget, stats)
+                result.update(more)
+                missing = {"large": missing.get("large", []) + again["large"]}
+            left = [item for tier_items in missing.values() for item in tier_items]
+
+        if fallback and left:
+            for item in left:
+                reason = template_reason(item, _item_headlines(item, news_data))
+                for code in item.get("members", [item["종목코드"]]):
+                    result[code] = reason
+            stats.add("template", items=len(left))
+        if stats.counts:
+            log.info(f"사유 모델({self.market}): {stats.summary()}, 토큰 합계 {budget.used}")
+        return result
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+AI 사유 작업 큐 (publish first, enrich later)
+- 분석 실행은 스크린 행을 사유 없이 먼저 기록하고, 사유 분석 항목을 이 큐(SQLite)에 넣음
+- 워커(drain)가 날짜별로 작업을 모아 뉴스 수집 + Claude 분석 후
+  시트 / DB의 '사유' 칸만 채움 (sink.patch)
+- 실패한 작업은 지수 백오프 후 재시도, REASON_MAX_ATTEMPTS회 실패하면 failed로 남김
+  (fallback을 넘기면 마지막 시도에서는 템플릿 사유로 채우고 완료 처리)
+- 분석은 됐지만 기록에 실패한 작업은 사유를 보관해 두고 기록만 다시 시도 (Claude 재호출 없음)
+- 같은 (날짜, 항목) 작업은 한 번만 들어감 → 재실행해도 중복 분석 없음
+
+CLI:
+  python3 reason_queue.py status
+  python3 reason_queue.py work --budget 600
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import argparse
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Optional
+
+log = logging.getLogger(__name__)
+
+REASON_QUEUE_PATH = os.getenv(
+    "REASON_QUEUE_PATH", str(Path(__file__).parent / "reason_queue.db")
+)
+# Claude 한 번에 보낼 작업 수 (같은 날짜끼리만 묶음)
+REASON_BATCH_SIZE = int(os.getenv("REASON_BATCH_SIZE", "40"))
+REASON_MAX_ATTEMPTS = int(os.getenv("REASON_MAX_ATTEMPTS", "5"))
+# 재시도 간격 (초, 시도마다 2배)
+REASON_RETRY_BASE = float(os.getenv("REASON_RETRY_BASE", "300"))
+# running 상태로 이 시간(초)이 지난 작업은 워커가 죽은 것으로 보고 다시 가져감
+REASON_LEASE = float(os.getenv("REASON_LEASE", "900"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reason_jobs (
+    id       INTEGER PRIMARY KEY,
+    date     TEXT NOT NULL,
+    key      TEXT NOT NULL,
+    item     TEXT NOT NULL,
+    tabs     TEXT NOT NULL,
+    status   TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_at  REAL NOT NULL DEFAULT 0,
+    reason   TEXT NOT NULL DEFAULT '',
+    error    TEXT NOT NULL DEFAULT '',
+    updated  REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_reason_jobs_key ON reason_jobs (date, key);
+CREATE INDEX IF NOT EXISTS idx_reason_jobs_status ON reason_jobs (status, next_at);
+"""
+
+
+def item_codes(item: dict) -> list[str]:
+    """사유를 받을 종목코드 (업종 묶음 항목은 members 전체)"""
+    return list(item.get("members", [item["종목코드"]]))
+
+
+class ReasonJob:
+    def __init__(self, id: int, date: str, item: dict, tabs: list[str], attempts: int, reason: str):
+        self.id = id
+        self.date = date
+        self.item = item
+        self.tabs = tabs
+        self.attempts = attempts
+        self.reason = reason
+
+
+class ReasonQueue:
+    """
+    작업 상태: pending → running → done
+                          ↘ pending (next_at 이후 재시도) → … → failed
+    date는 시트 날짜 컬럼 값(YYYY-MM-DD), item은 ReasonEngine.analyze 입력 항목
+    """
+
+    def __init__(self, path: str = REASON_QUEUE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def enqueue(self, date: str, jobs: list[tuple[dict, list[str]]]) -> int:
+        """[(item, 사유를 채울 탭 목록)] 추가. Returns: 새로 들어간 작업 수"""
+        now = time.time()
+        records = [
+            (date, ",".join(item_codes(item)), json.dumps(item, ensure_ascii=False),
+             json.dumps(tabs, ensure_ascii=False), now)
+            for item, tabs in jobs if tabs
+        ]
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO reason_jobs (date, key, item, tabs, updated) "
+                "VALUES (?, ?, ?, ?, ?)",
+                records,
+            )
+            return self.conn.total_changes - before
+
+    def claim(self, limit: int = REASON_BATCH_SIZE) -> list[ReasonJob]:
+        """처리할 작업을 running으로 표시하고 반환 (최근 날짜 우선, 한 번에 한 날짜만)"""
+        now = time.time()
+        ready = (
+            "(status = 'pending' AND next_at <= ?) OR (status = 'running' AND updated <= ?)"
+        )
+        with self.conn:
+            row = self.conn.execute(
+                f"SELECT date FROM reason_jobs WHERE {ready} ORDER BY date DESC LIMIT 1",
+                (now, now - REASON_LEASE),
+            ).fetchone()
+            if row is None:
+                return []
+            rows = self.conn.execute(
+                f"SELECT id, date, item, tabs, attempts, reason FROM reason_jobs "
+                f"WHERE date = ? AND ({ready}) ORDER BY id LIMIT ?",
+                (row[0], now, now - REASON_LEASE, limit),
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE reason_jobs SET status = 'running', updated = ? WHERE id = ?",
+                [(now, r[0]) for r in rows],
+            )
+        return [
+            ReasonJob(id, date, json.loads(item), json.loads(tabs), attempts, reason)
+            for id, date, item, tabs, attempts, reason in rows
+        ]
+
+    def finish(self, jobs: list[ReasonJob]):
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE reason_jobs SET status = 'done', reason = ?, error = '', updated = ? "
+                "WHERE id = ?",
+                [(job.reason, time.time(), job.id) for job in jobs],
+            )
+
+    def retry(self, jobs: list[ReasonJob], error: str):
+        """실패 기록 → 백오프 후 재시도, 시도 횟수를 넘으면 failed (분석된 사유는 보관)"""
+        now = time.time()
+        records = []
+        for job in jobs:
+            attempts = job.attempts + 1
+            status = "failed" if attempts >= REASON_MAX_ATTEMPTS else "pending"
+            next_at = now + REASON_RETRY_BASE * 2 ** (attempts - 1)
+            records.append((status, attempts, next_at, job.reason, error[:500], now, job.id))
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE reason_jobs SET status = ?, attempts = ?, next_at = ?, reason = ?, "
+                "error = ?, updated = ? WHERE id = ?",
+                records,
+            )
+
+    def reasons(self, date: str) -> dict[str, str]:
+        """date에 분석이 끝난 사유 {종목코드: 사유} (재기록 시 빈 칸 대신 사용)"""
+        result = {}
+        for item, reason in self.conn.execute(
+            "SELECT item, reason FROM reason_jobs WHERE date = ? AND reason != ''", (date,)
+        ):
+            for code in item_codes(json.loads(item)):
+                result[code] = reason
+        return result
+
+    def pending(self) -> int:
+        """아직 처리되지 않은 작업 수 (재시도 대기 포함)"""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM reason_jobs WHERE status IN ('pending', 'running')"
+        ).fetchone()[0]
+
+    def stats(self) -> dict[str, int]:
+        return dict(self.conn.execute(
+            "SELECT status, COUNT(*) FROM reason_jobs GROUP BY status"
+        ).fetchall())
+
+    def failures(self, limit: int = 20) -> list[tuple]:
+        return self.conn.execute(
+            "SELECT date, key, attempts, error FROM reason_jobs WHERE status = 'failed' "
+            "ORDER BY updated DESC LIMIT ?", (limit,)
+        ).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+# ---------------------------------------------------------------------------
+# 워커
+# ---------------------------------------------------------------------------
+def patch_reasons(sink, jobs: list[ReasonJob]) -> int:
+    """작업별 사유를 탭마다 한 번의 patch로 기록. Returns: 채운 칸 수 (sink 중 최대)"""
+    per_tab: dict[str, dict[tuple[str, str], str]] = {}
+    for job in jobs:
+        for tab in job.tabs:
+            values = per_tab.setdefault(tab, {})
+            for code in item_codes(job.item):
+                values[(job.date, code)] = job.reason
+    return sum(sink.patch(tab, "사유", values) for tab, values in per_tab.items())
+
+
+def drain(queue: ReasonQueue, analyze: Callable[[list[dict]], dict[str, str]], sink,
+          deadline: Optional[float] = None, batch_size: int = REASON_BATCH_SIZE,
+          fallback: Optional[Callable[[dict], str]] = None) -> Counter:
+    """
+    큐가 빌 때까지(또는 deadline까지) 작업 처리
+    analyze: 항목 목록 → {종목코드: 사유} (reason_engine.ReasonEngine.analyze)
+    sink: patch(tab, column, {(날짜, 종목코드): 값})를 지원하는 RowSink
+    fallback: 항목 → 템플릿 사유. 마지막 시도에서도 분석 결과가 없으면 사용
+    """
+    stats = Counter()
+    while deadline is None or time.monotonic() < deadline:
+        jobs = queue.claim(batch_size)
+        if not jobs:
+            break
+        date = jobs[0].date
+
+        todo = [job for job in jobs if not job.reason]
+        if todo:
+            log.info(f"사유 분석 중 ({date}, {len(todo)}개 항목)...")
+            try:
+                result = analyze([job.item for job in todo])
+            except Exception as e:
+                log.error(f"사유 분석 실패 ({date}): {e}")
+                result = {}
+            for job in todo:
+                job.reason = result.get(job.item["종목코드"], "")
+                if not job.reason and fallback and job.attempts + 1 >= REASON_MAX_ATTEMPTS:
+                    job.reason = fallback(job.item)
+                    stats["template"] += 1
+
+        missing = [job for job in jobs if not job.reason]
+        ready = [job for job in jobs if job.reason]
+        if missing:
+            queue.retry(missing, "사유 분석 결과 없음")
+            stats["retry"] += len(missing)
+        if not ready:
+            continue
+        try:
+            cells = patch_reasons(sink, ready)
+        except Exception as e:
+            log.error(f"사유 기록 실패 ({date}): {e}")
+            queue.retry(ready, f"사유 기록 실패: {e}")
+            stats["retry"] += len(ready)
+            continue
+        queue.finish(ready)
+        stats["done"] += len(ready)
+        stats["cells"] += cells
+        log.info(f"사유 기록 ({date}): {len(ready)}개 항목, {cells}칸")
+
+    left = queue.pending()
+    if left:
+        log.info(f"사유 작업 {left}개 대기 중 (재시도 예약 포함)")
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="AI 사유 작업 큐")
+    parser.add_argument("--db", default=REASON_QUEUE_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="상태별 작업 수 / 최근 실패")
+    w = sub.add_parser("work", help="대기 중인 작업 처리 (한국 시트 / DB의 사유 칸 채움)")
+    w.add_argument("--budget", type=float, default=0, help="처리 시간 제한 (초, 0 = 제한 없음)")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        if not Path(args.db).exists():
+            print(f"큐 없음: {args.db}", file=sys.stderr)
+            sys.exit(1)
+        queue = ReasonQueue(args.db)
+        try:
+            print(json.dumps(queue.stats(), ensure_ascii=False))
+            for date, key, attempts, error in queue.failures():
+                print(f"failed {date} {key} ({attempts}회): {error}")
+        finally:
+            queue.close()
+        return
+
+    # 분석 / 시트 연결은 analyzer 설정(.env, credentials.json)을 그대로 사용
+    import analyzer
+    stats = analyzer.drain_reasons(budget=args.budget, path=args.db)
+    print(json.dumps(dict(stats), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
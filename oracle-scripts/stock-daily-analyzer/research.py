@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+시그널 연구 모드: 과거 수년치에 스크린/크로스를 재생하여 이후 수익률 통계 산출
+- 일간 분석과 같은 screens.json 스크린 + ma_state 크로스 로직을 그대로 사용
+- 거래일을 구간(shard)으로 나눠 프로세스 풀에서 병렬 처리
+- 시그널별/시장별 1/5/20일 후 수익률 평균·중앙값·적중률
+- 시그널 원본은 열 지향 파일(parquet, pyarrow 없으면 npz)로 저장
+
+적중률: 시그널 방향(상한가/급등/골든크로스 = 상승, 하한가/급락/데드크로스 = 하락)으로
+        h일 후 수익률이 움직인 비율
+
+사용:
+  python3 research.py KR --from 2015-01-01 --to 2025-12-31 --workers 4
+  python3 research.py US --from 2010-01-01 --horizons 1,5,20,60
+
+KR 일별 시세는 research_cache/KR/에 보관 → 재실행 시 조회 없이 수분 내 처리
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ma_state import MAState
+from screens import load_screens, snapshot_frame, run_screens
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+log = logging.getLogger(__name__)
+# 날짜마다 신규 종목 로그가 찍히지 않도록
+logging.getLogger("ma_state").setLevel(logging.WARNING)
+
+RESEARCH_CACHE_DIR = Path(os.getenv(
+    "RESEARCH_CACHE_DIR", str(Path(__file__).parent / "research_cache")
+))
+RESEARCH_OUT_DIR = Path(__file__).parent / "research_out"
+
+MA_SHORT = 5
+MA_LONG = 20
+DEFAULT_HORIZONS = (1, 5, 20)
+SHARD_DAYS = 120            # shard당 거래일 수
+WARMUP_DAYS = MA_LONG * 2   # shard 앞에 붙이는 MA 준비 구간 (거래일)
+
+SNAPSHOT_COLUMNS = ["시장", "종가", "거래량", "거래대금", "등락률"]
+KR_MARKETS = ("KOSPI", "KOSDAQ")
+
+
+# ---------------------------------------------------------------------------
+# 시세 (KR: pykrx 일별 전종목 + 디스크 캐시 / US: TwelveData 일봉)
+# ---------------------------------------------------------------------------
+def kr_trading_days(start: str, end: str) -> list[str]:
+    import krx
+    return sorted(krx.business_days(start, end))
+
+
+def load_kr_snapshot(date: str) -> pd.DataFrame:
+    """date의 KOSPI+KOSDAQ 스냅샷 (캐시 우선, 조회 실패 시 빈 DataFrame + 캐시 안 함)"""
+    path = RESEARCH_CACHE_DIR / "KR" / f"{date}.pkl"
+    if path.exists():
+        return pd.read_pickle(path)
+
+    import krx
+    frames = []
+    for market in KR_MARKETS:
+        # 재시도 / 서킷 브레이커는 krx 계층에서 (shard 프로세스마다 브레이커 따로)
+        fetched = krx.market_ohlcv(date, market)
+        if fetched.failed:
+            log.error(f"  {market} {date} 시세 수집 실패: {fetched.error}")
+            return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+        if fetched.empty:
+            continue
+        snap = snapshot_frame(fetched.data, market)
+        if not snap.empty:
+            frames.append(snap[[c for c in SNAPSHOT_COLUMNS if c in snap.columns]])
+    snapshot = pd.concat(frames) if frames else pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    snapshot.to_pickle(tmp)
+    os.replace(tmp, path)
+    return snapshot
+
+
+def load_us_snapshots(start: str, end: str) -> dict[str, pd.DataFrame]:
+    """US_TICKERS 일봉 → 날짜별 스냅샷 (등락률은 전일 종가 대비)"""
+    import analyzer_us
+
+    closes, volumes = {}, {}
+    for ticker in analyzer_us.US_TICKERS:
+        values = analyzer_us.fetch_time_series(ticker, outputsize=5000)
+        time.sleep(0.15)  # Rate limit
+        if not values:
+            continue
+        df = pd.DataFrame(values)
+        df.index = df["datetime"].str[:10].str.replace("-", "")
+        closes[ticker] = df["close"].astype(float)
+        volumes[ticker] = df["volume"].astype(float)
+    if not closes:
+        return {}
+
+    close = pd.DataFrame(closes).sort_index()
+    volume = pd.DataFrame(volumes).sort_index()
+    change = (close / close.ffill().shift(1) - 1) * 100
+    exchange = {t: analyzer_us.get_exchange(t) for t in close.columns}
+
+    snapshots = {}
+    for date in close.index[(close.index >= start) & (close.index <= end)]:
+        snap = pd.DataFrame({
+            "종가": close.loc[date], "거래량": volume.loc[date], "등락률": change.loc[date].round(2),
+        }).dropna()
+        snap["거래대금"] = snap["종가"] * snap["거래량"]
+        snap["시장"] = [exchange[t] for t in snap.index]
+        snapshots[date] = snap[SNAPSHOT_COLUMNS]
+    return snapshots
+
+
+# ---------------------------------------------------------------------------
+# shard 처리 (프로세스 풀 작업)
+# ---------------------------------------------------------------------------
+def run_shard(universe: str, dates: list[str], warmup: int, signal_until: str,
+              snapshots: Optional[dict[str, pd.DataFrame]] = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    dates[:warmup]은 MA 준비용, dates[warmup:]에서 시그널 산출
+    Returns: (시그널 DataFrame, 종가 패널 — dates[warmup:] × 종목)
+    """
+    screens = load_screens(universe)
+    state = MAState(MA_SHORT, MA_LONG)
+    events, closes = [], {}
+
+    for n, date in enumerate(dates):
+        snap = snapshots[date] if snapshots is not None else load_kr_snapshot(date)
+        if snap.empty:
+            continue
+        date_i = int(date)
+        new_codes = snap.index.difference(state.codes)
+        if len(new_codes):
+            # 연구에서는 상장폐지 종목 행도 유지 (seed 없이 첫 거래일부터 누적)
+            state.sync_universe(state.codes.tolist() + new_codes.tolist())
+        crosses = state.update(date_i, snap["종가"].astype(float).to_dict())
+        if n < warmup:
+            continue
+        closes[date_i] = snap["종가"].astype(np.float32)
+        if date > signal_until:
+            continue
+
+        for name, hits in run_screens(screens, snap).items():
+            if len(hits):
+                events.append(pd.DataFrame({
+                    "date": date_i, "market": hits["시장"].to_numpy(), "code": hits.index,
+                    "signal": name, "direction": np.sign(hits["등락률"].to_numpy()).astype(np.int8),
+                    "close": hits["종가"].to_numpy(np.float32),
+                }))
+        if crosses:
+            markets = snap["시장"]
+            events.append(pd.DataFrame({
+                "date": date_i,
+                "market": [markets.get(c["종목코드"], "") for c in crosses],
+                "code": [c["종목코드"] for c in crosses],
+                "signal": [c["유형"] for c in crosses],
+                "direction": np.array([1 if c["유형"] == "골든크로스" else -1 for c in crosses], dtype=np.int8),
+                "close": np.array([c["종가"] for c in crosses], dtype=np.float32),
+            }))
+
+    events_df = pd.concat(events, ignore_index=True) if events else pd.DataFrame(
+        columns=["date", "market", "code", "signal", "direction", "close"]
+    )
+    panel = pd.DataFrame(closes).T if closes else pd.DataFrame()
+    log.info(f"  shard {dates[warmup] if len(dates) > warmup else '-'}~{dates[-1]}: 시그널 {len(events_df)}개")
+    return events_df, panel
+
+
+def make_shards(dates: list[str], shard_days: int) -> list[tuple[list[str], int]]:
+    """[(shard 날짜 목록(준비 구간 포함), 준비 구간 길이)]"""
+    shards = []
+    for start in range(0, len(dates), shard_days):
+        warm_start = max(0, start - WARMUP_DAYS)
+        shards.append((dates[warm_start:start + shard_days], start - warm_start))
+    return shards
+
+
+# ---------------------------------------------------------------------------
+# 수익률 / 통계
+# ---------------------------------------------------------------------------
+def forward_returns(events: pd.DataFrame, panel: pd.DataFrame, horizons: list[int]) -> pd.DataFrame:
+    """
+    events에 ret_{h} 컬럼 추가 (h 거래일 후 종가 / 시그널일 종가 - 1)
+    거래정지일은 직전 종가로 채우고, 상장폐지 이후와 기간 밖은 NaN
+    """
+    panel = panel.sort_index()
+    listed = panel.notna()[::-1].cummax()[::-1]   # 마지막 거래일 이전까지
+    values = panel.ffill().where(listed).to_numpy(np.float64)
+
+    ri = panel.index.get_indexer(events["date"])
+    ci = panel.columns.get_indexer(events["code"])
+    base = events["close"].to_numpy(np.float64)
+    valid = (ri >= 0) & (ci >= 0)
+    for h in horizons:
+        j = ri + h
+        ok = valid & (j < len(panel))
+        ret = np.full(len(events), np.nan)
+        ret[ok] = values[j[ok], ci[ok]] / base[ok] - 1
+        events[f"ret_{h}"] = ret.astype(np.float32)
+    return events
+
+
+def summarize(events: pd.DataFrame, horizons: list[int]) -> pd.DataFrame:
+    """시그널 × 시장(+ 전체)별 건수, h일 수익률 평균/중앙값(%), 적중률(%)"""
+    frames = [events, events.assign(market="ALL")]
+    rows = []
+    for (signal, direction, market), g in pd.concat(frames).groupby(
+        ["signal", "direction", "market"], observed=True, sort=True
+    ):
+        row = {"signal": signal, "direction": int(direction), "market": market, "count": len(g)}
+        for h in horizons:
+            r = g[f"ret_{h}"].dropna().astype(np.float64)
+            row[f"n_{h}d"] = len(r)
+            row[f"mean_{h}d"] = round(r.mean() * 100, 3) if len(r) else np.nan
+            row[f"median_{h}d"] = round(r.median() * 100, 3) if len(r) else np.nan
+            row[f"hit_{h}d"] = round(((r * direction) > 0).mean() * 100, 1) if len(r) else np.nan
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def write_columnar(df: pd.DataFrame, path: Path) -> Path:
+    """parquet (pyarrow 있으면) 또는 압축 npz"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        path = path.with_suffix(".npz")
+        np.savez_compressed(path, **{
+            c: df[c].astype(str).to_numpy() if df[c].dtype.name in ("object", "category") else df[c].to_numpy()
+            for c in df.columns
+        })
+        return path
+    path = path.with_suffix(".parquet")
+    df.to_parquet(path, index=False, compression="zstd")
+    return path
+
+
+# ---------------------------------------------------------------------------
+# 메인
+# ---------------------------------------------------------------------------
+def _date_arg(value: str) -> str:
+    return datetime.strptime(value.replace("-", ""), "%Y%m%d").strftime("%Y%m%d")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시그널 이후 수익률 연구 (스크린/크로스 재생)")
+    parser.add_argument("universe", choices=["KR", "US"])
+    parser.add_argument("--from", dest="date_from", type=_date_arg, required=True, help="YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", type=_date_arg,
+                        default=datetime.now().strftime("%Y%m%d"), help="YYYY-MM-DD (기본: 오늘)")
+    parser.add_argument("--horizons", default=",".join(map(str, DEFAULT_HORIZONS)),
+                        help="이후 수익률 기간 (거래일, 쉼표 구분)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-days", type=int, default=SHARD_DAYS)
+    parser.add_argument("--out", type=Path, default=RESEARCH_OUT_DIR)
+    args = parser.parse_args()
+
+    horizons = sorted({int(h) for h in args.horizons.split(",") if h.strip()})
+    # 마지막 시그널의 이후 수익률을 위해 --to 이후 거래일까지 포함
+    extend_to = min(
+        datetime.now(),
+        datetime.strptime(args.date_to, "%Y%m%d") + timedelta(days=max(horizons) * 2 + 10),
+    ).strftime("%Y%m%d")
+    warm_from = (
+        datetime.strptime(args.date_from, "%Y%m%d") - timedelta(days=WARMUP_DAYS * 2)
+    ).strftime("%Y%m%d")
+
+    log.info(f"=== 시그널 연구: {args.universe} {args.date_from}~{args.date_to}, 기간 {horizons} ===")
+    snapshots = None
+    if args.universe == "KR":
+        dates = kr_trading_days(warm_from, extend_to)
+    else:
+        snapshots = load_us_snapshots(warm_from, extend_to)
+        dates = sorted(snapshots)
+    if not dates:
+        log.error("거래일 없음")
+        sys.exit(1)
+
+    # 시그널 시작일 이전은 전체 MA 준비 구간으로만 사용
+    first = next((i for i, d in enumerate(dates) if d >= args.date_from), len(dates))
+    dates = dates[max(0, first - WARMUP_DAYS):]
+    shards = make_shards(dates, args.shard_days)
+    log.info(f"거래일 {len(dates)}일, shard {len(shards)}개, 프로세스 {args.workers}개")
+
+    events, panels = [], []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = []
+        for shard_dates, warmup in shards:
+            shard_snaps = {d: snapshots[d] for d in shard_dates} if snapshots is not None else None
+            futures.append(pool.submit(run_shard, args.universe, shard_dates, warmup,
+                                       args.date_to, shard_snaps))
+        for future in futures:
+            shard_events, panel = future.result()
+            events.append(shard_events)
+            panels.append(panel)
+
+    events = pd.concat(events, ignore_index=True)
+    events = events[events["date"] >= int(args.date_from)].reset_index(drop=True)
+    panel = pd.concat([p for p in panels if not p.empty]).sort_index()
+    panel = panel[~panel.index.duplicated()]
+    log.info(f"시그널 {len(events)}개, 종가 패널 {panel.shape[0]}일 × {panel.shape[1]}종목")
+
+    events = forward_returns(events, panel, horizons)
+    events = events.astype({"date": np.int32, "direction": np.int8, "close": np.float32})
+    for col in ("market", "code", "signal"):
+        events[col] = events[col].astype("category")
+    summary = summarize(events, horizons)
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    stem = f"{args.universe}_{args.date_from}_{args.date_to}"
+    events_path = write_columnar(events, args.out / f"{stem}_events")
+    summary_path = args.out / f"{stem}_summary.csv"
+    summary.to_csv(summary_path, index=False, encoding="utf-8-sig")
+
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(summary.to_string(index=False))
+    log.info(f"=== 완료: {events_path.name}, {summary_path.name} ===")
+
+
+if __name__ == "__main__":
+    main()
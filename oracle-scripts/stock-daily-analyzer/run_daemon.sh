@@ -0,0 +1,26 @@
+#!/bin/bash
+# Stock Daily Analyzer - 상주 스케줄러 (KR 16:30 / US 06:00 KST)
+# systemd 또는 nohup으로 실행:
+#   nohup /home/ubuntu/stock-daily-analyzer/run_daemon.sh >> /home/ubuntu/stock-daily-analyzer/daemon.log 2>&1 &
+# daemon을 쓰지 않을 때는 기존 cron(run.sh / run_us.sh)을 그대로 사용
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+cd "$SCRIPT_DIR"
+
+# Activate virtual environment
+if [ ! -d "venv" ]; then
+    echo "$(date): venv not found, creating..."
+    python3 -m venv venv
+    source venv/bin/activate
+    pip install -r requirements.txt
+else
+    source venv/bin/activate
+fi
+
+echo "$(date): Starting stock analyzer daemon..."
+python3 daemon.py
+EXIT_CODE=$?
+
+echo "$(date): Daemon exited with code $EXIT_CODE"
+deactivate
+exit $EXIT_CODE
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+선언형 스크린 정의 (screens.json) → 벡터화된 조건식
+- 스크린마다 조건(등락률/거래량/종가/MA/시장), 정렬 기준, 상위 N개, 출력 탭/컬럼을 설정
+- 모든 스크린을 스냅샷 DataFrame 한 번에 평가 (필드 배열은 스크린 간 공유)
+- 새 스크린 추가 = screens.json에 항목 추가 (추가 조회/코드 없음)
+
+연속 기록: "streak": true (스크린 단위) 또는 "streak": "방향" (급등/급락 따로)
+  → 연속일 / 연속시작 / 누적등락률(%) 컬럼 사용 가능 (streaks.py)
+
+조건 형식: [필드, 연산자, 값]
+  필드: 종가, 거래량, 거래대금, 등락률, 시장, 단기MA, 장기MA, 정배열, abs(필드)
+  연산자: >=, <=, >, <, ==, !=, in, not in
+  값: 숫자/문자열/목록, 또는 "$이름" (thresholds 참조)
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+SCREENS_FILE = Path(os.getenv("SCREENS_FILE", str(Path(__file__).parent / "screens.json")))
+
+OPERATORS = {
+    ">=": np.greater_equal,
+    "<=": np.less_equal,
+    ">": np.greater,
+    "<": np.less,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+# 출력 헤더 → 스냅샷 컬럼
+HEADER_FIELDS = {"등락률(%)": "등락률"}
+CODE_HEADERS = ("종목코드", "Ticker")
+
+
+class Screen:
+    """screens.json의 스크린 하나"""
+
+    def __init__(self, spec: dict, thresholds: dict):
+        self.name = spec["name"]
+        self.tab = spec.get("tab", self.name)
+        self.where = [self._resolve(cond, thresholds) for cond in spec.get("where", [])]
+        self.sort = spec.get("sort")
+        self.descending = spec.get("order", "desc") == "desc"
+        self.top = spec.get("top")
+        self.reasons = spec.get("reasons", False)
+        self.columns = spec["columns"]
+        self.format = spec.get("format", {})
+        # 연속 기록: true = 스크린 이름으로, 문자열 = 해당 필드 값(예: 방향)으로 유형 구분
+        self.streak = spec.get("streak", False)
+
+    @staticmethod
+    def _resolve(cond: list, thresholds: dict) -> tuple:
+        field, op, value = cond
+        if op not in OPERATORS and op not in ("in", "not in"):
+            raise ValueError(f"지원하지 않는 연산자: {op}")
+        if isinstance(value, str) and value.startswith("$"):
+            value = thresholds[value[1:]]
+        return field, op, value
+
+    def fields(self) -> set[str]:
+        names = {field for field, _, _ in self.where}
+        if self.sort:
+            names.add(self.sort)
+        return names
+
+    def streak_kind(self, record: dict) -> str:
+        return self.name if self.streak is True else str(record[self.streak])
+
+    def reason_limit(self) -> int:
+        """AI 사유 분석에 보낼 상위 종목 수 (true = 전부)"""
+        if self.reasons is True:
+            return -1
+        return int(self.reasons or 0)
+
+
+def load_config(path: Path = SCREENS_FILE) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_thresholds(path: Path = SCREENS_FILE) -> dict:
+    return load_config(path).get("thresholds", {})
+
+
+def load_screens(universe: str, path: Path = SCREENS_FILE) -> list[Screen]:
+    config = load_config(path)
+    thresholds = config.get("thresholds", {})
+    return [Screen(spec, thresholds) for spec in config["universes"].get(universe, [])]
+
+
+# ---------------------------------------------------------------------------
+# 스냅샷
+# ---------------------------------------------------------------------------
+def snapshot_frame(df: pd.DataFrame, market: str) -> pd.DataFrame:
+    """
+    pykrx 전종목 시세(get_market_ohlcv_by_ticker) → 스크린 입력 형태
+    종가/거래량 0(거래정지) 종목 제외, 등락률 소수 2자리
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=["시장", "종가", "거래량", "등락률"])
+    out = df[(df["종가"] != 0) & (df["거래량"] != 0)].copy()
+    out["등락률"] = out["등락률"].astype(float).round(2)
+    out["시장"] = market
+    return out
+
+
+def _field(snapshot: pd.DataFrame, expr: str, cache: dict) -> np.ndarray:
+    """필드 식 → 값 배열 (스크린 간 공유 캐시)"""
+    if expr in cache:
+        return cache[expr]
+    if expr.startswith("abs(") and expr.endswith(")"):
+        values = np.abs(_field(snapshot, expr[4:-1], cache))
+    elif expr == "정배열":
+        values = _field(snapshot, "단기MA", cache) > _field(snapshot, "장기MA", cache)
+    elif expr in snapshot.columns:
+        values = snapshot[expr].to_numpy()
+    else:
+        raise KeyError(f"스냅샷에 없는 필드: {expr}")
+    cache[expr] = values
+    return values
+
+
+def run_screens(screens: list[Screen], snapshot: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """모든 스크린을 한 번에 평가. Returns: {스크린 이름: 해당 종목 DataFrame}"""
+    cache: dict[str, np.ndarray] = {}
+    results = {}
+    n = len(snapshot)
+    for screen in screens:
+        mask = np.ones(n, dtype=bool)
+        for field, op, value in screen.where:
+            values = _field(snapshot, field, cache)
+            if op == "in":
+                mask &= np.isin(values, value)
+            elif op == "not in":
+                mask &= ~np.isin(values, value)
+            else:
+                with np.errstate(invalid="ignore"):
+                    mask &= OPERATORS[op](values, value)
+
+        hits = snapshot[mask]
+        if screen.sort and len(hits):
+            key = _field(snapshot, screen.sort, cache)[mask]
+            order = np.argsort(-key if screen.descending else key, kind="stable")
+            hits = hits.iloc[order]
+        if screen.top:
+            hits = hits.head(screen.top)
+        results[screen.name] = hits
+    return results
+
+
+# ---------------------------------------------------------------------------
+# 출력
+# ---------------------------------------------------------------------------
+def to_records(hits: pd.DataFrame, name_fn: Optional[Callable[[str], str]] = None) -> list[dict]:
+    """스크린 결과 → 기존 필터 함수와 같은 형태의 dict 목록"""
+    records = []
+    for ticker, row in hits.iterrows():
+        pct = float(row["등락률"])
+        name = row["종목명"] if "종목명" in hits.columns else (name_fn(ticker) if name_fn else ticker)
+        records.append({
+            "종목코드": ticker,
+            "종목명": name,
+            "시장": row["시장"],
+            "종가": row["종가"],
+            "등락률(%)": pct,
+            "방향": "급등" if pct > 0 else "급락",
+            "거래량": row["거래량"],
+        })
+    return records
+
+
+def _format(value, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt.format(float(value))
+    if isinstance(value, np.integer):
+        return str(int(value))
+    if isinstance(value, np.floating):
+        return str(float(value))
+    return str(value)
+
+
+def build_rows(screen: Screen, records: list[dict], date_str: str,
+               reasons: Optional[dict[str, str]] = None) -> list[list[str]]:
+    """screen.columns 순서대로 시트 행 구성"""
+    reasons = reasons or {}
+    rows = []
+    for item in records:
+        row = []
+        for header in screen.columns:
+            if header == "날짜":
+                row.append(date_str)
+            elif header == "사유":
+                row.append(reasons.get(item["종목코드"], ""))
+            elif header in CODE_HEADERS:
+                row.append(item["종목코드"])
+            else:
+                value = item.get(header, item.get(HEADER_FIELDS.get(header, header)))
+                # 연속일 등 선택 컬럼은 값이 없으면 빈칸 (예: 백필 첫날)
+                row.append("" if value is None else _format(value, screen.format.get(header)))
+        rows.append(row)
+    return rows
+
+
+def reason_items(screens: list[Screen], records: dict[str, list[dict]]) -> list[dict]:
+    """AI 사유 분석 대상 (스크린 순서, 스크린별 reasons 개수만큼)"""
+    items = []
+    for screen in screens:
+        limit = screen.reason_limit()
+        if limit == 0:
+            continue
+        hits = records.get(screen.name, [])
+        items += hits if limit < 0 else hits[:limit]
+    return items
+
+
+def reason_tabs(screens: list[Screen], records: dict[str, list[dict]], codes: list[str]) -> list[str]:
+    """codes 중 하나라도 기록된 스크린 탭 (사유 컬럼이 있는 탭만) — 사유 작업 큐의 patch 대상"""
+    wanted = set(codes)
+    return [
+        screen.tab for screen in screens
+        if "사유" in screen.columns
+        and any(r["종목코드"] in wanted for r in records.get(screen.name, []))
+    ]
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+업종(섹터) 집계
+- KRX 업종 분류(pykrx get_market_sector_classifications)를 종목코드 → 업종명 맵으로 캐시
+  (SECTOR_MAP_MAX_AGE_DAYS일마다 갱신, 조회 실패 시 이전 캐시 사용)
+- 당일 스냅샷을 업종별로 group-by → 종목수, 상승/하락 종목수(breadth), 평균 등락률, 급등/급락 수
+- AI 사유 분석 대상을 업종 단위로 묶음 (테마 장세에서 같은 이야기를 하는 종목을 한 항목으로)
+"""
+
+import os
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+from pykrx import stock
+
+import krx
+from ma_state import MA_STATE_DIR
+
+log = logging.getLogger(__name__)
+
+SECTOR_MAP_PATH = MA_STATE_DIR / "sectors_KR.json"
+SECTOR_MAP_MAX_AGE_DAYS = int(os.getenv("SECTOR_MAP_MAX_AGE_DAYS", "7"))
+# 같은 업종·방향 종목이 이 수 이상이면 AI 사유 분석을 한 항목으로 묶음
+SECTOR_GROUP_MIN = int(os.getenv("SECTOR_GROUP_MIN", "3"))
+UNCLASSIFIED = "미분류"
+
+SECTOR_HEADERS = [
+    "날짜", "시장", "업종", "종목수", "상승", "하락", "상승비율(%)", "평균등락률(%)",
+    "급등", "급락", "대표종목",
+]
+
+
+class SectorMap:
+    """종목코드 → 업종명 / 종목명 (KRX 업종 분류)"""
+
+    def __init__(self, as_of: str = "", sectors: Optional[dict] = None, names: Optional[dict] = None):
+        self.as_of = as_of
+        self.sectors: dict[str, str] = sectors or {}
+        self.names: dict[str, str] = names or {}
+
+    @classmethod
+    def load(cls, path: Path = SECTOR_MAP_PATH) -> "SectorMap":
+        if not path.exists():
+            return cls()
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(data["as_of"], data["sectors"], data["names"])
+        except Exception as e:
+            log.warning(f"업종 맵 로드 실패 ({path.name}): {e}")
+            return cls()
+
+    def save(self, path: Path = SECTOR_MAP_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"as_of": self.as_of, "sectors": self.sectors, "names": self.names},
+                      f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def stale(self, date: str) -> bool:
+        if not self.as_of:
+            return True
+        age = datetime.strptime(date, "%Y%m%d") - datetime.strptime(self.as_of, "%Y%m%d")
+        return age.days >= SECTOR_MAP_MAX_AGE_DAYS or age.days < 0
+
+    def get(self, code: str) -> str:
+        return self.sectors.get(code, UNCLASSIFIED)
+
+
+def load_sector_map(date: str, markets: tuple = ("KOSPI", "KOSDAQ"),
+                    path: Path = SECTOR_MAP_PATH) -> SectorMap:
+    """캐시된 업종 맵 (오래됐으면 KRX에서 다시 받아 저장)"""
+    cached = SectorMap.load(path)
+    if not cached.stale(date):
+        return cached
+
+    sectors, names = {}, {}
+    try:
+        for market in markets:
+            df = krx.call(stock.get_market_sector_classifications, date, market,
+                          what=f"{market} 업종 분류")
+            sectors.update(df["업종명"].astype(str).to_dict())
+            names.update(df["종목명"].astype(str).to_dict())
+    except Exception as e:
+        log.warning(f"업종 분류 조회 실패, 캐시 사용 ({cached.as_of or '없음'}): {e}")
+        return cached
+    if not sectors:
+        return cached
+
+    fresh = SectorMap(date, sectors, names)
+    fresh.save(path)
+    log.info(f"업종 맵 갱신: {len(sectors)}개 종목, {len(set(sectors.values()))}개 업종")
+    return fresh
+
+
+# ---------------------------------------------------------------------------
+# 업종 집계
+# ---------------------------------------------------------------------------
+def sector_summary(snapshot: pd.DataFrame, sector_map: SectorMap, surge_pct: float) -> pd.DataFrame:
+    """
+    스냅샷 → (시장, 업종)별 집계 (평균 등락률 내림차순)
+    컬럼: 시장, 업종, 종목수, 상승, 하락, 상승비율, 평균등락률, 급등, 급락, 대표종목코드
+    """
+    if snapshot.empty:
+        return pd.DataFrame()
+    pct = snapshot["등락률"].astype(float)
+    df = pd.DataFrame({
+        "시장": snapshot["시장"],
+        "업종": snapshot.index.map(sector_map.sectors).fillna(UNCLASSIFIED),
+        "등락률": pct,
+        "절대등락률": pct.abs(),
+        "상승": pct > 0,
+        "하락": pct < 0,
+        "급등": pct >= surge_pct,
+        "급락": pct <= -surge_pct,
+    }, index=snapshot.index)
+
+    grouped = df.groupby(["시장", "업종"], sort=False)
+    out = grouped.agg(
+        종목수=("등락률", "size"),
+        상승=("상승", "sum"),
+        하락=("하락", "sum"),
+        평균등락률=("등락률", "mean"),
+        급등=("급등", "sum"),
+        급락=("급락", "sum"),
+        대표종목코드=("절대등락률", "idxmax"),
+    )
+    out["상승비율"] = out["상승"] / out["종목수"] * 100
+    return out.reset_index().sort_values("평균등락률", ascending=False, kind="stable")
+
+
+def sector_rows(summary: pd.DataFrame, snapshot: pd.DataFrame, sector_map: SectorMap,
+                date_str: str, name_fn=None) -> list[list[str]]:
+    """업종 탭 행 (SECTOR_HEADERS 순서)"""
+    rows = []
+    for r in summary.itertuples(index=False):
+        code = r.대표종목코드
+        name = sector_map.names.get(code) or (name_fn(code) if name_fn else code)
+        leader_pct = float(snapshot.loc[code, "등락률"])
+        rows.append([
+            date_str, r.시장, r.업종, str(int(r.종목수)), str(int(r.상승)), str(int(r.하락)),
+            f"{r.상승비율:.1f}", f"{r.평균등락률:.2f}", str(int(r.급등)), str(int(r.급락)),
+            f"{name}({leader_pct:+.2f}%)",
+        ])
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# AI 사유 분석 묶음
+# ---------------------------------------------------------------------------
+def group_reason_items(items: list[dict], sector_map: SectorMap,
+                       min_size: int = SECTOR_GROUP_MIN) -> list[dict]:
+    """
+    같은 업종·같은 방향 종목이 min_size개 이상이면 한 항목으로 묶음
+    묶음 항목: 업종, members(사유를 나눠 받을 종목코드), news_codes(뉴스 조회용 상위 종목)
+    """
+    def key(item: dict) -> tuple:
+        direction = "급등" if float(item["등락률(%)"]) > 0 else "급락"
+        return sector_map.get(item["종목코드"]), direction
+
+    # 같은 종목이 여러 스크린에 있을 수 있으므로 종목코드 기준으로 묶음
+    groups: dict[tuple, dict[str, dict]] = {}
+    for item in items:
+        groups.setdefault(key(item), {}).setdefault(item["종목코드"], item)
+
+    result, seen = [], set()
+    for item in items:
+        k = key(item)
+        members = list(groups[k].values())
+        if k[0] == UNCLASSIFIED or len(members) < min_size:
+            result.append(item)
+            continue
+        if k in seen:
+            continue
+        seen.add(k)
+        codes = [m["종목코드"] for m in members]
+        avg = sum(float(m["등락률(%)"]) for m in members) / len(members)
+        result.append({
+            "종목코드": codes[0],
+            "종목명": ", ".join(m["종목명"] for m in members),
+            "등락률(%)": round(avg, 2),
+            "업종": k[0],
+            "members": codes,
+            "news_codes": codes[:3],
+        })
+    return result
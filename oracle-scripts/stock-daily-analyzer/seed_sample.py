@@ -2,8 +2,21 @@
 """
 Google Sheets에 샘플 데이터 시딩 (UI 확인용)
 실제 데이터는 평일 장 마감 후 analyzer.py가 수집
+
+합성 데이터 (부하 테스트, synthetic.py):
+  python3 seed_sample.py --synthetic KR --tickers 2700 --days 250 --out synthetic_out
+      → synthetic_out/tabs/*.csv (시트 탭 내용), synthetic_out/KR/*.pkl (research.py 캐시 형식)
+  python3 seed_sample.py --synthetic KR --days 60 --fake --out synthetic_out
+      → 가짜 Sheets(fake_sheets)에 날짜별로 실제 SheetsSink로 기록, API 호출 수 집계 + 탭 CSV
+  python3 seed_sample.py --synthetic US --sheet-id <테스트 시트 ID>
+      → 테스트용 시트에 탭 내용 기록 (운영 시트 ID는 거부)
 """
 
+import sys
+import json
+import argparse
+from pathlib import Path
+
 import gspread
 from google.oauth2.service_account import Credentials
 
@@ -11,18 +24,28 @@ GOOGLE_SHEETS_ID = "17NC0KpHBCF9ZSx3ca32jaH1kmFIo3OuETbAa9_c_hQE"
 CREDENTIALS_FILE = "/Users/jangbookeun/Downloads/stock-daily-analyzer-0af664b5b37f.json"
 
 
-def connect():
+def connect(sheet_id: str = GOOGLE_SHEETS_ID):
     scopes = [
         "https://www.googleapis.com/auth/spreadsheets",
         "https://www.googleapis.com/auth/drive",
     ]
     creds = Credentials.from_service_account_file(CREDENTIALS_FILE, scopes=scopes)
     gc = gspread.authorize(creds)
-    return gc.open_by_key(GOOGLE_SHEETS_ID)
+    return gc.open_by_key(sheet_id)
 
 
-def main():
-    sp = connect()
+def replace_tab(sp, existing: dict, tab: str, data: list[list]):
+    """탭 내용을 data(헤더 포함)로 교체 (없으면 생성)"""
+    if tab in existing:
+        existing[tab].clear()
+        existing[tab].update(values=data, range_name="A1")
+    else:
+        ws = sp.add_worksheet(tab, max(1000, len(data) + 1), len(data[0]))
+        ws.update(values=data, range_name="A1")
+        existing[tab] = ws
+
+
+def seed_samples(sp):
     existing = {ws.title: ws for ws in sp.worksheets()}
 
     # ── 상한가 ──
@@ -37,12 +60,7 @@ def main():
         ["2026-02-24", "950200", "PSK", "KOSDAQ", "10050", "29.68", "28345612", "반도체 장비 대형 수주"],
         ["2026-02-23", "215600", "신라젠", "KOSDAQ", "1520", "29.91", "67234123", "바이오 임상 3상 긍정 결과"],
     ]
-    if "상한가" in existing:
-        existing["상한가"].clear()
-        existing["상한가"].update(values=data, range_name="A1")
-    else:
-        ws = sp.add_worksheet("상한가", 1000, len(headers))
-        ws.update(values=data, range_name="A1")
+    replace_tab(sp, existing, "상한가", data)
     print("✅ 상한가 완료")
 
     # ── 하한가 ──
@@ -54,12 +72,7 @@ def main():
         ["2026-02-25", "214370", "케어젠", "KOSDAQ", "32100", "-29.56", "5432100", "임상 실험 실패 공시"],
         ["2026-02-24", "091990", "셀트리온헬스케어", "KOSDAQ", "52000", "-29.73", "15234567", "바이오시밀러 FDA 반려"],
     ]
-    if "하한가" in existing:
-        existing["하한가"].clear()
-        existing["하한가"].update(values=data, range_name="A1")
-    else:
-        ws = sp.add_worksheet("하한가", 1000, len(headers))
-        ws.update(values=data, range_name="A1")
+    replace_tab(sp, existing, "하한가", data)
     print("✅ 하한가 완료")
 
     # ── 급등락 ──
@@ -91,12 +104,7 @@ def main():
         ["2026-02-23", "105560", "KB금융", "KOSPI", "78000", "-5.45", "급락", "4567890", "대출 부실 우려"],
         ["2026-02-23", "012330", "현대모비스", "KOSPI", "265000", "6.85", "급등", "3456789", "자율주행 부품 수주 확대"],
     ]
-    if "급등락" in existing:
-        existing["급등락"].clear()
-        existing["급등락"].update(values=data, range_name="A1")
-    else:
-        ws = sp.add_worksheet("급등락", 1000, len(headers))
-        ws.update(values=data, range_name="A1")
+    replace_tab(sp, existing, "급등락", data)
     print("✅ 급등락 완료")
 
     # ── 크로스 ──
@@ -115,12 +123,7 @@ def main():
         ["2026-02-23", "066570", "LG전자", "KOSPI", "골든크로스", "105000", "102000", "108000"],
         ["2026-02-23", "012330", "현대모비스", "KOSPI", "골든크로스", "260000", "255000", "265000"],
     ]
-    if "크로스" in existing:
-        existing["크로스"].clear()
-        existing["크로스"].update(values=data, range_name="A1")
-    else:
-        ws = sp.add_worksheet("크로스", 1000, len(headers))
-        ws.update(values=data, range_name="A1")
+    replace_tab(sp, existing, "크로스", data)
     print("✅ 크로스 완료")
 
     # ── 경제일정 ──
@@ -137,12 +140,7 @@ def main():
         ["2026-02-23", "미국 FOMC 의사록 공개", "상", "금리 인하 시점 힌트. 3월 인하 가능성에 대한 시장 반응", "https://www.federalreserve.gov"],
         ["2026-02-23", "한국 1월 산업생산지수", "하", "산업 활동 동향 확인. 시장 영향 제한적", "https://kostat.go.kr"],
     ]
-    if "경제일정" in existing:
-        existing["경제일정"].clear()
-        existing["경제일정"].update(values=data, range_name="A1")
-    else:
-        ws = sp.add_worksheet("경제일정", 1000, len(headers))
-        ws.update(values=data, range_name="A1")
+    replace_tab(sp, existing, "경제일정", data)
     print("✅ 경제일정 완료")
 
     # ── US_급등락 ──
@@ -162,12 +160,7 @@ def main():
         ["2026-02-24", "BA", "Boeing Co", "NYSE", "198.50", "-5.12", "급락", "23456789", "FAA audit concerns + delivery delays"],
         ["2026-02-23", "V", "Visa Inc", "NYSE", "295.40", "3.15", "급등", "15678901", "Cross-border transaction volume surge"],
     ]
-    if "US_급등락" in existing:
-        existing["US_급등락"].clear()
-        existing["US_급등락"].update(values=data, range_name="A1")
-    else:
-        ws = sp.add_worksheet("US_급등락", 1000, len(headers))
-        ws.update(values=data, range_name="A1")
+    replace_tab(sp, existing, "US_급등락", data)
     print("✅ US_급등락 완료")
 
     # ── US_크로스 ──
@@ -185,12 +178,7 @@ def main():
         ["2026-02-23", "V", "Visa Inc", "NYSE", "골든크로스", "290.10", "285.40", "295.40"],
         ["2026-02-23", "JPM", "JPMorgan Chase", "NYSE", "골든크로스", "210.50", "205.20", "215.80"],
     ]
-    if "US_크로스" in existing:
-        existing["US_크로스"].clear()
-        existing["US_크로스"].update(values=data, range_name="A1")
-    else:
-        ws = sp.add_worksheet("US_크로스", 1000, len(headers))
-        ws.update(values=data, range_name="A1")
+    replace_tab(sp, existing, "US_크로스", data)
     print("✅ US_크로스 완료")
 
     # ── US_경제일정 ──
@@ -206,12 +194,7 @@ def main():
         ["2026-02-23", "FOMC Minutes Release", "상", "Rate cut timing hints. Dovish tone → tech stock rally expected", "https://www.federalreserve.gov"],
         ["2026-02-23", "US Existing Home Sales", "하", "Secondary housing market trends. Limited market impact", "https://www.nar.realtor"],
     ]
-    if "US_경제일정" in existing:
-        existing["US_경제일정"].clear()
-        existing["US_경제일정"].update(values=data, range_name="A1")
-    else:
-        ws = sp.add_worksheet("US_경제일정", 1000, len(headers))
-        ws.update(values=data, range_name="A1")
+    replace_tab(sp, existing, "US_경제일정", data)
     print("✅ US_경제일정 완료")
 
     # 기본 시트1 삭제
@@ -222,5 +205,77 @@ def main():
     print("\n🎉 모든 샘플 데이터 시딩 완료! (한국 5탭 + 미국 3탭)")
 
 
+# ---------------------------------------------------------------------------
+# 합성 데이터
+# ---------------------------------------------------------------------------
+def seed_synthetic(args):
+    from synthetic import SyntheticMarket, write_tabs
+
+    market = SyntheticMarket(
+        args.synthetic, tickers=args.tickers, days=args.days, start=args.start, seed=args.seed,
+        limit_up_rate=args.limit_up_rate, themes=args.themes,
+        theme_shock_rate=args.theme_shock_rate, halt_rate=args.halt_rate,
+    )
+    print(f"생성: {json.dumps(market.summary(), ensure_ascii=False)}")
+    out = Path(args.out)
+
+    if args.fake:
+        # 운영과 같은 경로로 기록: KR은 날짜마다 2행 삽입, US는 날짜마다 내용 교체(diff)
+        from fake_sheets import FakeSpreadsheet
+        from sinks import SheetsSink, SheetMirror
+
+        sp = FakeSpreadsheet()
+        mode = "insert" if args.synthetic == "KR" else "replace"
+        sink = SheetsSink(sp, mode=mode, mirror=SheetMirror(out / "sheet_mirror.json"))
+        for _, tabs in market.daily_tabs():
+            for tab, (headers, rows) in tabs.items():
+                sink.write(tab, headers, rows)
+        sp.dump(out / "tabs")
+        print(f"가짜 Sheets API 호출: {dict(sp.calls)} (총 {sum(sp.calls.values())}회)")
+        return
+
+    tabs = market.tab_contents()
+    if args.sheet_id:
+        if args.sheet_id == GOOGLE_SHEETS_ID:
+            sys.exit("운영 시트에는 합성 데이터를 쓰지 않습니다 (--sheet-id에 테스트 시트 지정)")
+        sp = connect(args.sheet_id)
+        existing = {ws.title: ws for ws in sp.worksheets()}
+        for tab, (headers, rows) in tabs.items():
+            replace_tab(sp, existing, tab, [headers] + rows)
+            print(f"✅ {tab}: {len(rows)}행")
+        return
+
+    write_tabs(tabs, out / "tabs")
+    if args.synthetic == "KR":
+        market.write_snapshots(out)
+    print(f"저장: {out} " + ", ".join(f"{tab} {len(rows)}행" for tab, (_, rows) in tabs.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="샘플 / 합성 데이터 시딩")
+    parser.add_argument("--synthetic", choices=["KR", "US"],
+                        help="합성 데이터 생성 (없으면 운영 시트에 손으로 쓴 샘플 시딩)")
+    parser.add_argument("--tickers", type=int, default=2700)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--start", default="20250102", help="첫 거래일 (YYYYMMDD)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--limit-up-rate", type=float, default=0.002,
+                        help="종목·일당 개별 상한가 확률")
+    parser.add_argument("--themes", type=int, default=40)
+    parser.add_argument("--theme-shock-rate", type=float, default=0.02,
+                        help="테마·일당 쇼크(테마 전체 급등락) 확률")
+    parser.add_argument("--halt-rate", type=float, default=0.001,
+                        help="종목·일당 거래정지 시작 확률")
+    parser.add_argument("--out", default="synthetic_out", help="출력 디렉터리")
+    parser.add_argument("--fake", action="store_true", help="가짜 Sheets 백엔드에 기록")
+    parser.add_argument("--sheet-id", help="합성 탭을 기록할 테스트 시트 ID")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        seed_synthetic(args)
+    else:
+        seed_samples(connect())
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Sheets 쓰기 지연 큐 (write-behind)
+- write()는 행을 큐에 넣고 즉시 반환 → 호출 측은 다음 날짜 수집을 계속 진행
+- 백그라운드 스레드가 탭별로 여러 날짜의 행을 모아 한 번의 insert로 기록
+- 분당 쓰기 한도(기본 50회, Sheets 한도 60회)를 지키도록 간격 조절
+- 429 / 5xx 응답은 지수 백오프 후 재시도, 끝내 실패한 행은 파일로 남김
+
+삽입 순서: 2행 삽입은 나중에 넣은 행이 위로 오므로, 모은 배치를
+역순으로 이어 붙여 날짜별로 순서대로 삽입한 것과 같은 결과가 되도록 함.
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+from gspread.exceptions import APIError
+
+from sinks import RowSink, SheetsSink
+
+log = logging.getLogger(__name__)
+
+SHEETS_WRITES_PER_MINUTE = int(os.getenv("SHEETS_WRITES_PER_MINUTE", "50"))
+FAILED_WRITES_FILE = Path(__file__).parent / "failed_writes.jsonl"
+MAX_RETRIES = 6
+
+
+class RateLimiter:
+    """분당 호출 횟수 제한 (토큰 버킷)"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = max(1, per_minute)
+        self.tokens = float(self.capacity)
+        self.rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+
+    def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            time.sleep((1 - self.tokens) / self.rate)
+
+
+def _retryable(e: Exception) -> bool:
+    """429(한도 초과) / 5xx만 재시도"""
+    if not isinstance(e, APIError):
+        return False
+    status = getattr(e.response, "status_code", None)
+    return status == 429 or (status is not None and status >= 500)
+
+
+class QueuedSheetsSink(RowSink):
+    """SheetsSink 앞단의 쓰기 지연 큐"""
+
+    def __init__(self, sheets: SheetsSink, writes_per_minute: int = SHEETS_WRITES_PER_MINUTE,
+                 flush_interval: float = 30.0, max_batch_rows: int = 5000):
+        self.sheets = sheets
+        self.limiter = RateLimiter(writes_per_minute)
+        self.flush_interval = flush_interval
+        self.max_batch_rows = max_batch_rows
+        self._pending: dict[str, list[tuple[int, list[list[str]]]]] = {}
+        self._headers: dict[str, list[str]] = {}
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._closing = False
+        self.writes = 0
+        self.rows_written = 0
+        self._thread = threading.Thread(target=self._run, name="sheets-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, tab: str, headers: list[str], rows: list[list[str]]):
+        if not rows:
+            return
+        with self._cond:
+            self._seq += 1
+            self._pending.setdefault(tab, []).append((self._seq, rows))
+            self._headers[tab] = headers
+            pending_rows = sum(len(r) for _, r in self._pending[tab])
+            if pending_rows >= self.max_batch_rows:
+                self._cond.notify()
+        log.info(f"  → '{tab}' {len(rows)}행 쓰기 대기열 추가")
+
+    def _take_oldest(self) -> Optional[tuple[str, list[tuple[int, list]]]]:
+        """가장 오래된 대기 행이 있는 탭의 배치를 꺼냄 (최대 max_batch_rows)"""
+        if not self._pending:
+            return None
+        tab = min(self._pending, key=lambda t: self._pending[t][0][0])
+        batches, taken, total = self._pending[tab], [], 0
+        while batches and (not taken or total + len(batches[0][1]) <= self.max_batch_rows):
+            seq, rows = batches.pop(0)
+            taken.append((seq, rows))
+            total += len(rows)
+        if not batches:
+            del self._pending[tab]
+        return tab, taken
+
+    def _flush_batch(self, tab: str, batches: list[tuple[int, list]]):
+        # 최신 배치가 위로 오도록 역순으로 이어 붙임
+        rows = [row for _, batch in reversed(batches) for row in batch]
+        headers = self._headers[tab]
+        for attempt in range(MAX_RETRIES):
+            self.limiter.acquire()
+            try:
+                self.sheets.write(tab, headers, rows)
+                self.writes += 1
+                self.rows_written += len(rows)
+                return
+            except Exception as e:
+                if not _retryable(e) or attempt == MAX_RETRIES - 1:
+                    log.error(f"  '{tab}' {len(rows)}행 기록 실패: {e}")
+                    self._spill(tab, headers, rows)
+                    return
+                delay = min(64, 2 ** attempt) + random.uniform(0, 1)
+                log.warning(f"  Sheets 한도/서버 오류, {delay:.1f}초 후 재시도: {e}")
+                time.sleep(delay)
+
+    def _spill(self, tab: str, headers: list[str], rows: list[list[str]]):
+        """기록 실패 행 보존 (수동 재처리용)"""
+        with open(FAILED_WRITES_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"tab": tab, "headers": headers, "rows": rows}, ensure_ascii=False) + "\n")
+        log.error(f"  실패 행을 {FAILED_WRITES_FILE.name}에 저장")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closing:
+                    # flush_interval 동안 더 모아서 보냄 (배치가 크면 즉시 깨어남)
+                    self._cond.wait(timeout=self.flush_interval)
+                item = self._take_oldest()
+                if item is None and self._closing:
+                    return
+            if item is not None:
+                self._flush_batch(*item)
+
+    def close(self):
+        """남은 행을 모두 기록할 때까지 대기"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+        log.info(f"  Sheets 쓰기 완료: {self.writes}회, {self.rows_written}행")
+        self.sheets.close()
+
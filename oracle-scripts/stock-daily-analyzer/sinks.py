@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+분석 결과 저장소 (Sink)
+- SheetsSink: Google Sheets 탭에 기록 (상단 삽입 / 전체 교체 — 교체는 변경된 행만 기록)
+- SqliteSink: 로컬 SQLite DB에 기록, (date, market, code, tab) 인덱스로 조회
+- MultiSink: 여러 sink에 동시 기록
+- patch(): 이미 기록된 행의 한 컬럼만 채움 (사유 작업 큐 → reason_queue.py)
+
+조회 CLI:
+  python3 sinks.py query --tab 상한가 --code 005930 --from 2026-01-01
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import logging
+import argparse
+from pathlib import Path
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+SCREEN_DB_PATH = os.getenv(
+    "SCREEN_DB_PATH", str(Path(__file__).parent / "screens.db")
+)
+# replace 모드 탭의 마지막 기록 내용 (다음 실행에서 diff 기준)
+SHEET_MIRROR_PATH = Path(os.getenv(
+    "SHEET_MIRROR_PATH", str(Path(__file__).parent / "state" / "sheet_mirror.json")
+))
+# 사유 채우기(patch) 시 시트에서 찾아볼 상단 행 수 (insert 모드는 최신 행이 위)
+REASON_PATCH_SCAN_ROWS = int(os.getenv("REASON_PATCH_SCAN_ROWS", "2000"))
+# 쉼표로 구분된 활성 sink 목록 (sheets, sqlite)
+SINKS = os.getenv("SINKS", "sheets,sqlite")
+
+# 행에서 날짜/종목코드(경제일정은 이벤트명)/시장 컬럼을 찾을 때 사용하는 헤더 이름
+DATE_COLUMNS = ("날짜",)
+CODE_COLUMNS = ("종목코드", "Ticker", "업종", "이벤트명")
+MARKET_COLUMNS = ("시장",)
+# 한 종목이 같은 날 여러 행인 탭: 이 컬럼 값을 행 키 code에 붙임 ("005930:상한가")
+# (연속 탭은 상한가 종목이 급등에도 걸려 (날짜, 시장, 종목, 탭)이 겹침,
+#  경제일정 탭은 같은 날 같은 제목의 이벤트가 시각만 다름 → "[USD] Fed Chair Speaks:14:00")
+KEY_SUFFIX_COLUMNS = {"연속": "유형", "경제일정": "시각", "US_경제일정": "시각"}
+
+
+class RowSink:
+    """탭 단위로 행을 기록하는 저장소 인터페이스"""
+
+    def write(self, tab: str, headers: list[str], rows: list[list[str]]):
+        raise NotImplementedError
+
+    def patch(self, tab: str, column: str, values: dict[tuple[str, str], str],
+              overwrite: bool = False) -> int:
+        """
+        (날짜, 종목코드)가 같은 기존 행의 column 칸이 비어 있으면 값으로 채움
+        (KEY_SUFFIX_COLUMNS 탭은 종목코드 자리에 "종목코드:접미 컬럼 값")
+        overwrite=True면 값이 다른 칸은 모두 덮어씀 (경제일정 변경분)
+        Returns: 채운 칸 수
+        """
+        return 0
+
+    def close(self):
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Google Sheets
+# ---------------------------------------------------------------------------
+def _col_letter(n: int) -> str:
+    """1-based 열 번호 → A1 표기 열 문자"""
+    letters = ""
+    while n > 0:
+        n, r = divmod(n - 1, 26)
+        letters = chr(65 + r) + letters
+    return letters
+
+
+def _cells(row: list) -> list[str]:
+    """비교용 정규화 (문자열, 끝쪽 빈 칸 제거 — get_all_values는 빈 칸을 채워 돌려줌)"""
+    cells = ["" if v is None else str(v) for v in row]
+    while cells and cells[-1] == "":
+        cells.pop()
+    return cells
+
+
+def diff_ranges(old: list[list], new: list[list]) -> list[dict]:
+    """
+    old → new로 바꾸는 최소 행 범위 목록 ([{"range": "A2:F4", "values": [...]}])
+    바뀐 행이 연속이면 한 범위로 묶고, new가 짧아 남는 행은 빈 값으로 덮어씀
+    """
+    n = max(len(old), len(new))
+    changed = [
+        i for i in range(n)
+        if _cells(old[i] if i < len(old) else []) != _cells(new[i] if i < len(new) else [])
+    ]
+    updates = []
+    start = 0
+    while start < len(changed):
+        end = start
+        while end + 1 < len(changed) and changed[end + 1] == changed[end] + 1:
+            end += 1
+        first, last = changed[start], changed[end]
+        rows = []
+        for i in range(first, last + 1):
+            if i < len(new):
+                rows.append(list(new[i]))
+            else:
+                rows.append([])
+        width = max(
+            max((len(old[i]) for i in range(first, min(last + 1, len(old)))), default=0),
+            max((len(r) for r in rows), default=0),
+            1,
+        )
+        values = [r + [""] * (width - len(r)) for r in rows]
+        updates.append({
+            "range": f"A{first + 1}:{_col_letter(width)}{last + 1}",
+            "values": values,
+        })
+        start = end + 1
+    return updates
+
+
+class SheetMirror:
+    """replace 모드 탭의 마지막 기록 내용 (스프레드시트 id + 탭 → 헤더 포함 행 목록)"""
+
+    def __init__(self, path: Path = SHEET_MIRROR_PATH):
+        self.path = path
+        self.tabs: dict[str, list[list]] = {}
+        if path.exists():
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.tabs = json.load(f)
+            except Exception as e:
+                log.warning(f"시트 미러 로드 실패, 시트에서 다시 읽음: {e}")
+
+    def get(self, key: str) -> Optional[list[list]]:
+        return self.tabs.get(key)
+
+    def set(self, key: str, values: list[list]):
+        self.tabs[key] = values
+        self._save()
+
+    def drop(self, key: str):
+        if self.tabs.pop(key, None) is not None:
+            self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.tabs, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+class SheetsSink(RowSink):
+    """
+    Google Sheets 탭에 기록
+    mode="insert": 2행(헤더 아래)에 삽입 → 최신 데이터가 위로 (한국 탭)
+    mode="replace": 탭 내용을 헤더 + 행으로 교체 (미국 탭)
+        clear 후 전체 재기록 대신, 마지막 기록 내용(SheetMirror)과 비교해 바뀐 행 범위만
+        batch_update 한 번으로 기록 → 읽는 쪽에서 빈 탭이 보이는 순간이 없음.
+        미러가 없으면(첫 실행 등) 시트를 한 번 읽어 기준으로 삼음.
+    """
+
+    def __init__(self, spreadsheet, worksheets: Optional[dict] = None, mode: str = "insert",
+                 mirror: Optional[SheetMirror] = None):
+        if mode not in ("insert", "replace"):
+            raise ValueError(f"지원하지 않는 mode: {mode}")
+        self.spreadsheet = spreadsheet
+        self.mode = mode
+        self._worksheets = dict(worksheets or {})
+        self.mirror = mirror if mirror is not None else (SheetMirror() if mode == "replace" else None)
+
+    def _worksheet(self, tab: str, headers: list[str]):
+        ws = self._worksheets.get(tab)
+        if ws is not None:
+            return ws
+        if not self._worksheets:
+            self._worksheets = {w.title: w for w in self.spreadsheet.worksheets()}
+            ws = self._worksheets.get(tab)
+        if ws is None:
+            ws = self.spreadsheet.add_worksheet(title=tab, rows=1000, cols=len(headers))
+            if self.mode == "insert":
+                ws.update(values=[headers], range_name="A1")
+            self._worksheets[tab] = ws
+        return ws
+
+    def _existing(self, tab: str):
+        """있는 탭만 (patch는 탭을 새로 만들지 않음)"""
+        if tab not in self._worksheets:
+            self._worksheets = {w.title: w for w in self.spreadsheet.worksheets()}
+        return self._worksheets.get(tab)
+
+    def write(self, tab: str, headers: list[str], rows: list[list[str]]):
+        if self.mode == "insert":
+            if not rows:
+                return
+            ws = self._worksheet(tab, headers)
+            ws.insert_rows(rows, row=2)
+            log.info(f"  → '{tab}'에 {len(rows)}행 기록")
+        else:
+            self._replace(tab, headers, rows)
+
+    def _replace(self, tab: str, headers: list[str], rows: list[list[str]]):
+        ws = self._worksheet(tab, headers)
+        key = f"{getattr(self.spreadsheet, 'id', '')}/{tab}"
+        new = [list(headers)] + [list(r) for r in rows]
+        old = self.mirror.get(key)
+        if old is None:
+            old = ws.get_all_values()
+
+        updates = diff_ranges(old, new)
+        if not updates:
+            log.info(f"✅ {tab}: {len(rows)} rows, no changes")
+            return
+
+        # 그리드보다 긴 범위는 API 오류 → 필요한 만큼 행/열 추가
+        width = max(len(r) for u in updates for r in u["values"])
+        if len(new) > ws.row_count:
+            ws.add_rows(len(new) - ws.row_count)
+        if width > ws.col_count:
+            ws.add_cols(width - ws.col_count)
+        try:
+            ws.batch_update(updates)
+        except Exception:
+            # 일부만 반영됐을 수 있으므로 다음 실행은 시트를 다시 읽어 비교
+            self.mirror.drop(key)
+            raise
+        self.mirror.set(key, new)
+        changed = sum(len(u["values"]) for u in updates)
+        log.info(f"✅ {tab}: {len(rows)} rows, {changed} changed in {len(updates)} range(s)")
+
+    def patch(self, tab: str, column: str, values: dict[tuple[str, str], str],
+              overwrite: bool = False) -> int:
+        """상단 REASON_PATCH_SCAN_ROWS행을 한 번 읽어 대상 칸을 찾고, batch_update 한 번으로 기록"""
+        ws = self._existing(tab)
+        if ws is None or not values:
+            return 0
+        grid = ws.get_values(f"A1:{_col_letter(ws.col_count)}{REASON_PATCH_SCAN_ROWS}")
+        if not grid:
+            return 0
+        headers = grid[0]
+        date_i = _column(headers, DATE_COLUMNS)
+        code_i = _column(headers, CODE_COLUMNS)
+        col_i = _column(headers, (column,))
+        suffix_i = _column(headers, (KEY_SUFFIX_COLUMNS[tab],)) if tab in KEY_SUFFIX_COLUMNS else None
+        if date_i is None or code_i is None or col_i is None:
+            log.warning(f"  '{tab}' 탭에 날짜/종목/{column} 컬럼이 없어 patch 건너뜀")
+            return 0
+
+        updates = []
+        for r, row in enumerate(grid[1:], start=2):
+            row = row + [""] * (len(headers) - len(row))
+            code = f"{row[code_i]}:{row[suffix_i]}" if suffix_i is not None else row[code_i]
+            value = values.get((row[date_i], code))
+            # 사람이 직접 고친 칸은 덮어쓰지 않음 (overwrite 제외)
+            if value and (not row[col_i] if not overwrite else row[col_i] != value):
+                updates.append({"range": f"{_col_letter(col_i + 1)}{r}", "values": [[value]]})
+        if not updates:
+            return 0
+        ws.batch_update(updates)
+        if self.mirror is not None:
+            self.mirror.drop(f"{getattr(self.spreadsheet, 'id', '')}/{tab}")
+        log.info(f"  → '{tab}' {column} {len(updates)}칸 기록")
+        return len(updates)
+
+
+def ensure_headers(ws, headers: list[str]) -> bool:
+    """
+    기존 탭의 헤더 행이 headers의 앞부분이면 뒤에 새 컬럼 헤더를 덧붙임
+    (컬럼은 끝에만 추가하므로 기존 행 위치는 그대로)
+    """
+    current = ws.row_values(1)
+    if current == headers or headers[:len(current)] != current:
+        return False
+    # 기존 탭은 cols=len(기존 헤더)로 만들어져 있음 → 그리드를 먼저 넓혀야 update가 거부되지 않음
+    if len(headers) > ws.col_count:
+        ws.add_cols(len(headers) - ws.col_count)
+    ws.update(values=[headers], range_name="A1")
+    log.info(f"'{ws.title}' 헤더에 컬럼 추가: {headers[len(current):]}")
+    return True
+
+
+# ---------------------------------------------------------------------------
+# SQLite
+# ---------------------------------------------------------------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS screen_rows (
+    date   TEXT NOT NULL,
+    market TEXT NOT NULL,
+    code   TEXT NOT NULL,
+    tab    TEXT NOT NULL,
+    data   TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_screen_rows_key
+    ON screen_rows (date, market, code, tab);
+CREATE INDEX IF NOT EXISTS idx_screen_rows_code
+    ON screen_rows (code, tab, date);
+"""
+
+
+def _column(headers: list[str], candidates: tuple) -> Optional[int]:
+    for name in candidates:
+        if name in headers:
+            return headers.index(name)
+    return None
+
+
+class SqliteSink(RowSink):
+    """
+    로컬 SQLite에 기록
+    행은 헤더를 키로 하는 JSON으로 저장하고, (date, market, code, tab)은
+    별도 컬럼 + 인덱스로 두어 기간/종목 조회가 인덱스 탐색이 되도록 함.
+    같은 키로 다시 기록하면 덮어씀 (재실행 시 중복 방지).
+    """
+
+    def __init__(self, path: str = SCREEN_DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def write(self, tab: str, headers: list[str], rows: list[list[str]]):
+        if not rows:
+            return
+        date_i = _column(headers, DATE_COLUMNS)
+        code_i = _column(headers, CODE_COLUMNS)
+        market_i = _column(headers, MARKET_COLUMNS)
+        if date_i is None or code_i is None:
+            log.warning(f"  SQLite: '{tab}' 탭에 날짜/종목 컬럼이 없어 건너뜀")
+            return
+        suffix_i = _column(headers, (KEY_SUFFIX_COLUMNS[tab],)) if tab in KEY_SUFFIX_COLUMNS else None
+
+        records = []
+        for row in rows:
+            records.append((
+                row[date_i],
+                row[market_i] if market_i is not None else "",
+                f"{row[code_i]}:{row[suffix_i]}" if suffix_i is not None else row[code_i],
+                tab,
+                json.dumps(dict(zip(headers, row)), ensure_ascii=False),
+            ))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO screen_rows (date, market, code, tab, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                records,
+            )
+        log.info(f"  → SQLite '{tab}'에 {len(records)}행 기록")
+
+    def patch(self, tab: str, column: str, values: dict[tuple[str, str], str],
+              overwrite: bool = False) -> int:
+        path = f'$."{column}"'
+        condition = "COALESCE(json_extract(data, ?), '') != ?" if overwrite else \
+            "COALESCE(json_extract(data, ?), '') = '' AND ? != ''"
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "UPDATE screen_rows SET data = json_set(data, ?, ?) "
+                f"WHERE date = ? AND code = ? AND tab = ? AND {condition}",
+                [(path, value, date, code, tab, path, value)
+                 for (date, code), value in values.items() if value],
+            )
+            changed = self.conn.total_changes - before
+        if changed:
+            log.info(f"  → SQLite '{tab}' {column} {changed}칸 기록")
+        return changed
+
+    def query(
+        self,
+        tab: Optional[str] = None,
+        code: Optional[str] = None,
+        market: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[dict]:
+        """조건에 맞는 행을 날짜 내림차순으로 반환 (날짜는 YYYY-MM-DD)"""
+        clauses, params = [], []
+        for column, value in (("tab", tab), ("market", market)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if code:
+            # KEY_SUFFIX_COLUMNS 탭의 "종목코드:유형" 키도 포함
+            clauses.append("(code = ? OR code GLOB ?)")
+            params += [code, f"{code}:*"]
+        if date_from:
+            clauses.append("date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("date <= ?")
+            params.append(date_to)
+
+        sql = "SELECT tab, data FROM screen_rows"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY date DESC, tab, code"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        results = []
+        for tab_name, data in self.conn.execute(sql, params):
+            row = json.loads(data)
+            row["탭"] = tab_name
+            results.append(row)
+        return results
+
+    def close(self):
+        self.conn.close()
+
+
+# ---------------------------------------------------------------------------
+# 여러 sink 묶음
+# ---------------------------------------------------------------------------
+class MultiSink(RowSink):
+    """
+    여러 sink에 순서대로 기록. 한 sink 실패가 나머지 기록을 막지 않음.
+    write는 일부 sink만 실패하면 예외 없이 실패 목록을 돌려주므로, 호출 측에서 목록을 확인해
+    기록 완료 표시를 미루거나 비정상 종료해야 함 (Sheets 429 + SQLite 성공 등)
+    """
+
+    def __init__(self, sinks: list[RowSink]):
+        self.sinks = sinks
+
+    def write(self, tab: str, headers: list[str], rows: list[list[str]]) -> list[RowSink]:
+        """Returns: 기록에 실패한 sink 목록 (전부 실패하면 예외)"""
+        errors, failed = [], []
+        for sink in self.sinks:
+            try:
+                sink.write(tab, headers, rows)
+            except Exception as e:
+                log.error(f"  {type(sink).__name__} '{tab}' 기록 실패: {e}")
+                errors.append(e)
+                failed.append(sink)
+        if errors and len(errors) == len(self.sinks):
+            raise errors[0]
+        return failed
+
+    def patch(self, tab: str, column: str, values: dict[tuple[str, str], str],
+              overwrite: bool = False) -> int:
+        counts, errors = [], []
+        for sink in self.sinks:
+            try:
+                counts.append(sink.patch(tab, column, values, overwrite))
+            except Exception as e:
+                log.error(f"  {type(sink).__name__} '{tab}' {column} 기록 실패: {e}")
+                errors.append(e)
+        # patch는 빈 칸만 채우므로 다시 해도 안전 → 하나라도 실패하면 호출 측에서 재시도
+        if errors:
+            raise errors[0]
+        return max(counts, default=0)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+def build_sinks(spreadsheet=None, worksheets: Optional[dict] = None, mode: str = "insert",
+                queued: bool = False) -> MultiSink:
+    """
+    SINKS 환경변수에 따라 sink 구성
+    queued=True면 Sheets 기록을 쓰기 지연 큐(sheet_queue)로 보냄 → close()에서 마저 기록
+    """
+    enabled = {s.strip() for s in SINKS.split(",") if s.strip()}
+    sinks: list[RowSink] = []
+    if "sheets" in enabled and spreadsheet is not None:
+        sheets = SheetsSink(spreadsheet, worksheets, mode=mode)
+        if queued:
+            from sheet_queue import QueuedSheetsSink
+            sheets = QueuedSheetsSink(sheets)
+        sinks.append(sheets)
+    if "sqlite" in enabled:
+        sinks.append(SqliteSink(SCREEN_DB_PATH))
+    if not sinks:
+        log.warning("활성화된 sink 없음 (SINKS 환경변수 확인)")
+    return MultiSink(sinks)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="분석 결과 DB 조회")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    q = sub.add_parser("query", help="탭/종목/기간 조건으로 조회")
+    q.add_argument("--db", default=SCREEN_DB_PATH)
+    q.add_argument("--tab", help="예: 상한가, 급등락, US_크로스")
+    q.add_argument("--code", help="종목코드 또는 Ticker")
+    q.add_argument("--market", help="KOSPI, KOSDAQ, NASDAQ, NYSE")
+    q.add_argument("--from", dest="date_from", help="시작일 (YYYY-MM-DD)")
+    q.add_argument("--to", dest="date_to", help="종료일 (YYYY-MM-DD)")
+    q.add_argument("--limit", type=int)
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"DB 없음: {args.db}", file=sys.stderr)
+        sys.exit(1)
+
+    sink = SqliteSink(args.db)
+    try:
+        rows = sink.query(
+            tab=args.tab, code=args.code, market=args.market,
+            date_from=args.date_from, date_to=args.date_to, limit=args.limit,
+        )
+    finally:
+        sink.close()
+
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+연속 기록 인덱스 (연속 상한가 / 연속 급등·급락)
+- 스크린별 종목의 현재 연속일수, 시작일, 시작 전일 종가(누적 등락률 기준)를 보관
+- 당일 스크린 결과(hits)만 보고 갱신 → O(당일 종목수)
+- 직전 거래일에 기록이 있으면 연속 +1, 아니면 새로 시작
+- 당일 갱신되지 않은 기록은 저장 시 삭제 (연속 끊김)
+- JSON 파일로 저장 (실행 간 유지, 분석을 건너뛴 날이 있으면 연속이 끊긴 것으로 봄)
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+from ma_state import MA_STATE_DIR
+
+log = logging.getLogger(__name__)
+
+STREAK_PATH = MA_STATE_DIR / "streaks_KR.json"
+# 연속 탭에 올리는 최소 연속일수
+STREAK_MIN_DAYS = int(os.getenv("STREAK_MIN_DAYS", "2"))
+
+
+STREAK_HEADERS = ["날짜", "종목코드", "종목명", "시장", "유형", "연속일", "시작일", "누적등락률(%)", "종가"]
+
+
+def _iso(date: int) -> str:
+    s = str(date)
+    return f"{s[:4]}-{s[4:6]}-{s[6:]}"
+
+
+class StreakIndex:
+    """(유형, 종목코드) → {days, start, base, close, pct, last, name, market}"""
+
+    def __init__(self):
+        self.as_of = 0
+        self.entries: dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, path: Path = STREAK_PATH) -> "StreakIndex":
+        index = cls()
+        if not path.exists():
+            return index
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            index.as_of = int(data.get("as_of", 0))
+            index.entries = data.get("entries", {})
+        except Exception as e:
+            log.warning(f"연속 기록 로드 실패, 새로 시작 ({path.name}): {e}")
+            return cls()
+        return index
+
+    def save(self, path: Path = STREAK_PATH):
+        """당일 기록만 남기고 저장 (임시 파일 → 교체)"""
+        self.entries = {k: e for k, e in self.entries.items() if e["last"] >= self.as_of}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"as_of": self.as_of, "entries": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def update(self, date: int, prev_date: Optional[int], kind: str, records: list[dict]):
+        """
+        kind 유형의 당일 종목(records)으로 연속 기록 갱신
+        records에 연속일 / 연속시작 / 누적등락률(%) 추가
+        """
+        for item in records:
+            key = f"{kind}:{item['종목코드']}"
+            close = float(item["종가"])
+            entry = self.entries.get(key)
+            if entry is None or entry["last"] != date:
+                if entry is not None and prev_date is not None and entry["last"] == prev_date:
+                    entry["days"] += 1
+                else:
+                    entry = {
+                        "days": 1, "start": date,
+                        "base": close / (1 + float(item["등락률(%)"]) / 100),
+                    }
+                    self.entries[key] = entry
+                entry["close"] = close
+                entry["name"] = item["종목명"]
+                entry["market"] = item["시장"]
+                entry["pct"] = round((close / entry["base"] - 1) * 100, 2) if entry["base"] else 0.0
+                entry["last"] = date
+            item["연속일"] = entry["days"]
+            item["연속시작"] = _iso(entry["start"])
+            item["누적등락률(%)"] = entry["pct"]
+        self.as_of = max(self.as_of, date)
+
+    def update_screens(self, date: int, prev_date: Optional[int], screens: list,
+                       records: dict[str, list[dict]]):
+        """streak 설정된 스크린 결과로 갱신 (screen.streak_kind로 유형 구분)"""
+        for screen in screens:
+            if not screen.streak:
+                continue
+            by_kind: dict[str, list[dict]] = {}
+            for item in records[screen.name]:
+                by_kind.setdefault(screen.streak_kind(item), []).append(item)
+            for kind, items in by_kind.items():
+                self.update(date, prev_date, kind, items)
+
+    def active(self, date: int, min_days: int = STREAK_MIN_DAYS) -> list[tuple[str, str, dict]]:
+        """date에 이어지고 있는 min_days일 이상 연속 기록 (연속일 내림차순)"""
+        result = []
+        for key, entry in self.entries.items():
+            if entry["last"] == date and entry["days"] >= min_days:
+                kind, code = key.split(":", 1)
+                result.append((kind, code, entry))
+        result.sort(key=lambda x: (-x[2]["days"], -x[2]["pct"]))
+        return result
+
+
+def streak_rows(index: StreakIndex, date: int) -> list[list[str]]:
+    """연속 탭 행 (STREAK_HEADERS 순서)"""
+    return [
+        [
+            _iso(date), code, entry["name"], entry["market"], kind, str(entry["days"]),
+            _iso(entry["start"]), f"{entry['pct']:.2f}", str(int(entry["close"])),
+        ]
+        for kind, code, entry in index.active(date)
+    ]
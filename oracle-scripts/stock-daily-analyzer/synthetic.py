@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+합성 시장 데이터 생성기 (부하 테스트용)
+- N종목 × M거래일 가격 패널: 시장 팩터 + 테마(업종) 팩터 + 종목 고유 변동(두꺼운 꼬리)
+- 테마 쇼크: 하루에 테마 전체가 크게 움직이고, 소속 종목 일부는 상한가/하한가 (테마 장세)
+- 개별 상한가/하한가, 거래정지 구간(종가/거래량 0 → snapshot_frame에서 제외)
+- KR: pykrx get_market_ohlcv_by_ticker와 같은 형태 (ohlcv), US: TwelveData quote 형태 (quotes)
+- 실제 스크린(screens.json) / MA 상태(ma_state)로 시트 탭 내용 생성 (tab_contents)
+
+사용 예는 seed_sample.py --synthetic 참고
+"""
+
+import os
+import csv
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from ma_state import MAState
+from screens import load_screens, snapshot_frame, run_screens, to_records, build_rows
+
+KR_LIMIT = 0.30          # 가격제한폭
+MA_SHORT, MA_LONG = 5, 20
+
+KR_MARKETS = ("KOSPI", "KOSDAQ")
+US_MARKETS = ("NASDAQ", "NYSE")
+CROSS_HEADERS = {
+    "KR": ["날짜", "종목코드", "종목명", "시장", "유형", "단기MA", "장기MA", "종가"],
+    "US": ["날짜", "Ticker", "종목명", "시장", "유형", "단기MA", "장기MA", "종가"],
+}
+
+
+def weekdays(start: str, n: int) -> list[str]:
+    """start(YYYYMMDD)부터 평일 n일"""
+    day = datetime.strptime(start, "%Y%m%d")
+    days = []
+    while len(days) < n:
+        if day.weekday() < 5:
+            days.append(day.strftime("%Y%m%d"))
+        day += timedelta(days=1)
+    return days
+
+
+class SyntheticMarket:
+    """
+    universe: "KR" | "US"
+    limit_up_rate: 종목·일당 개별 상한가 확률 (하한가는 1/3)
+    themes: 테마 수, theme_shock_rate: 테마·일당 쇼크 확률, theme_hit_rate: 쇼크 시 소속 종목의 상/하한가 확률
+    halt_rate: 종목·일당 거래정지 시작 확률 (평균 halt_days일 지속)
+    """
+
+    def __init__(self, universe: str = "KR", tickers: int = 2500, days: int = 60,
+                 start: str = "20250102", seed: int = 0,
+                 limit_up_rate: float = 0.002, themes: int = 40,
+                 theme_shock_rate: float = 0.02, theme_hit_rate: float = 0.15,
+                 halt_rate: float = 0.001, halt_days: float = 3.0):
+        if universe not in ("KR", "US"):
+            raise ValueError(f"지원하지 않는 universe: {universe}")
+        self.universe = universe
+        self.dates = weekdays(start, days)
+        rng = np.random.default_rng(seed)
+        n, m = tickers, days
+
+        # 종목 구성
+        if universe == "KR":
+            self.codes = [f"{i:06d}" for i in rng.choice(999_999, size=n, replace=False)]
+            self.markets = np.where(rng.random(n) < 0.35, KR_MARKETS[0], KR_MARKETS[1])
+        else:
+            self.codes = [f"S{i:04d}" for i in range(n)]
+            self.markets = np.where(rng.random(n) < 0.6, US_MARKETS[0], US_MARKETS[1])
+        self.theme_names = [f"테마{t:02d}" for t in range(themes)]
+        # 테마 크기는 한쪽으로 쏠리게 (큰 테마 몇 개 + 작은 테마 다수)
+        weights = rng.pareto(1.2, themes) + 1
+        theme = rng.choice(themes, size=n, p=weights / weights.sum())
+        self.sectors = {c: self.theme_names[t] for c, t in zip(self.codes, theme)}
+        self.names = {
+            c: (f"합성{self.theme_names[t][2:]}-{i:04d}" if universe == "KR" else f"Synthetic {c}")
+            for i, (c, t) in enumerate(zip(self.codes, theme))
+        }
+
+        # 수익률: 시장 + 테마 + 고유 (t 분포)
+        mkt = rng.normal(0, 0.01, m)
+        theme_ret = rng.normal(0, 0.012, (m, themes))
+        shock = rng.random((m, themes)) < theme_shock_rate
+        shock_sign = np.where(rng.random((m, themes)) < 0.75, 1.0, -1.0)
+        theme_ret = np.where(shock, shock_sign * rng.uniform(0.06, 0.15, (m, themes)), theme_ret)
+        beta = rng.uniform(0.5, 1.5, n)
+        # 종목 고유 변동성: KR 소형주가 많아 US보다 큼
+        vol_range = (0.01, 0.03) if universe == "KR" else (0.006, 0.015)
+        idio = rng.standard_t(3, (m, n)) * rng.uniform(*vol_range, n)
+        ret = mkt[:, None] * beta + theme_ret[:, theme] + idio
+
+        # 상/하한가 (KR) · 급등락 점프 (US)
+        limit_up = rng.random((m, n)) < limit_up_rate
+        limit_down = rng.random((m, n)) < limit_up_rate / 3
+        hit = shock[:, theme] & (rng.random((m, n)) < theme_hit_rate)
+        limit_up |= hit & (shock_sign[:, theme] > 0)
+        limit_down |= hit & (shock_sign[:, theme] < 0)
+        if universe == "KR":
+            ret = np.clip(ret, -KR_LIMIT + 0.001, KR_LIMIT - 0.001)
+            ret = np.where(limit_up, KR_LIMIT - 0.0005, np.where(limit_down, -KR_LIMIT + 0.0005, ret))
+        else:
+            ret = np.where(limit_up, rng.uniform(0.08, 0.25, (m, n)),
+                           np.where(limit_down, -rng.uniform(0.08, 0.25, (m, n)), ret))
+            ret = np.maximum(ret, -0.9)
+
+        # 거래정지 구간 (정지일 수익률 0, 종가 유지)
+        halted = np.zeros((m, n), dtype=bool)
+        starts = np.argwhere(rng.random((m, n)) < halt_rate)
+        lengths = rng.geometric(1 / max(halt_days, 1.0), len(starts))
+        for (d, i), length in zip(starts, lengths):
+            halted[d:d + length, i] = True
+        ret = np.where(halted, 0.0, ret)
+
+        # 가격 / 거래량
+        if universe == "KR":
+            base = np.exp(rng.uniform(np.log(1_000), np.log(500_000), n))
+        else:
+            base = np.exp(rng.uniform(np.log(5), np.log(800), n))
+        self.closes = base * np.cumprod(1 + ret, axis=0)
+        if universe == "KR":
+            self.closes = np.maximum(np.round(self.closes), 1)
+        else:
+            self.closes = np.round(self.closes, 2)
+        self.prev_closes = np.vstack([base[None, :], self.closes[:-1]])
+        self.pct = (self.closes / self.prev_closes - 1) * 100
+        volume = np.exp(rng.normal(np.log(200_000), 1.2, (m, n))) * (1 + 20 * np.abs(ret))
+        self.volume = np.where(halted, 0, np.round(volume)).astype(np.int64)
+        self.halted = halted
+        self.limit_up = limit_up & ~halted
+        self.limit_down = limit_down & ~halted
+        self._day = {d: i for i, d in enumerate(self.dates)}
+
+    # -- 시세 --------------------------------------------------------------
+    def ohlcv(self, date: str, market: str) -> pd.DataFrame:
+        """pykrx get_market_ohlcv_by_ticker 형태 (거래정지 종목은 OHLC/거래량 0)"""
+        d = self._day.get(date)
+        if d is None:
+            return pd.DataFrame()
+        mask = self.markets == market
+        close = self.closes[d, mask]
+        prev = self.prev_closes[d, mask]
+        halted = self.halted[d, mask]
+        spread = np.abs(close - prev)
+        df = pd.DataFrame({
+            "시가": prev,
+            "고가": np.maximum(close, prev) + spread * 0.1,
+            "저가": np.minimum(close, prev) - spread * 0.1,
+            "종가": close,
+            "거래량": self.volume[d, mask],
+            "거래대금": close * self.volume[d, mask],
+            "등락률": self.pct[d, mask],
+        }, index=pd.Index(np.array(self.codes)[mask], name="티커"))
+        df.loc[halted, ["시가", "고가", "저가", "종가", "등락률"]] = 0
+        if self.universe == "KR":
+            prices = ["시가", "고가", "저가", "종가", "거래대금"]
+            df[prices] = df[prices].round().astype(np.int64)
+        return df
+
+    def snapshot(self, date: str) -> pd.DataFrame:
+        """스크린 입력 형태 (snapshot_frame, 종목명 포함, 거래정지 제외)"""
+        markets = KR_MARKETS if self.universe == "KR" else US_MARKETS
+        frames = [snapshot_frame(self.ohlcv(date, market), market) for market in markets]
+        snap = pd.concat([f for f in frames if not f.empty])
+        snap.insert(0, "종목명", snap.index.map(self.names))
+        return snap
+
+    def quotes(self, date: str) -> dict[str, dict]:
+        """TwelveData quote 형태 (US, 거래정지 종목 제외)"""
+        d = self._day[date]
+        iso = f"{date[:4]}-{date[4:6]}-{date[6:]}"
+        return {
+            code: {
+                "name": self.names[code], "datetime": iso,
+                "close": f"{self.closes[d, i]:.2f}", "previous_close": f"{self.prev_closes[d, i]:.2f}",
+                "volume": str(self.volume[d, i]), "percent_change": f"{self.pct[d, i]:.4f}",
+            }
+            for i, code in enumerate(self.codes) if not self.halted[d, i]
+        }
+
+    # -- 탭 내용 -----------------------------------------------------------
+    def daily_tabs(self, reasons: bool = True) -> Iterator[tuple[str, dict[str, tuple[list[str], list[list]]]]]:
+        """
+        날짜별 스크린 / 크로스 결과 → (YYYY-MM-DD, {탭: (헤더, 당일 행)}) (오래된 날짜부터)
+        reasons=True면 사유 칸에 테마 기반 합성 문구
+        """
+        screens = load_screens(self.universe)
+        cross_tab = "크로스" if self.universe == "KR" else "US_크로스"
+        if self.universe == "KR":
+            fmt = lambda v: str(int(round(v)))
+        else:
+            fmt = lambda v: f"{v:.2f}"
+
+        state = MAState(MA_SHORT, MA_LONG)
+        state.sync_universe(self.codes)
+        for code in self.codes:
+            state.seed(code, [], 1)
+
+        for date in self.dates:
+            iso = f"{date[:4]}-{date[4:6]}-{date[6:]}"
+            snap = self.snapshot(date)
+            hits = run_screens(screens, snap)
+            tabs = {}
+            for screen in screens:
+                records = to_records(hits[screen.name])
+                why = {
+                    r["종목코드"]: f"{self.sectors[r['종목코드']]} 테마 {r['방향']} (합성)" for r in records
+                } if reasons and screen.reasons else None
+                tabs[screen.tab] = (screen.columns, build_rows(screen, records, iso, why))
+            closes = snap["종가"].astype(float).to_dict()
+            rows = []
+            for c in state.update(int(date), closes):
+                code = c["종목코드"]
+                rows.append([
+                    iso, code, self.names[code], snap.loc[code, "시장"], c["유형"],
+                    fmt(c["단기MA"]), fmt(c["장기MA"]), fmt(c["종가"]),
+                ])
+            tabs[cross_tab] = (CROSS_HEADERS[self.universe], rows)
+            yield iso, tabs
+
+    def tab_contents(self, reasons: bool = True) -> dict[str, tuple[list[str], list[list]]]:
+        """전 기간 탭 내용 {탭: (헤더, 행)} (최신 날짜가 위 — 매일 2행에 삽입한 시트와 같은 순서)"""
+        headers: dict[str, list[str]] = {}
+        daily: dict[str, list[list[list]]] = {}
+        for _, tabs in self.daily_tabs(reasons):
+            for tab, (columns, rows) in tabs.items():
+                headers[tab] = columns
+                daily.setdefault(tab, []).append(rows)
+        return {
+            tab: (headers[tab], [row for rows in reversed(daily[tab]) for row in rows])
+            for tab in headers
+        }
+
+    # -- 파일 출력 ---------------------------------------------------------
+    def write_snapshots(self, out_dir: Path):
+        """
+        날짜별 스냅샷을 research.py 캐시 형식으로 저장 (out_dir/KR/{날짜}.pkl)
+        → RESEARCH_CACHE_DIR=out_dir research.py KR ... 로 합성 데이터 위에서 실행 가능
+        """
+        path = out_dir / self.universe
+        path.mkdir(parents=True, exist_ok=True)
+        for date in self.dates:
+            snap = self.snapshot(date).drop(columns=["종목명"])
+            tmp = path / f"{date}.tmp"
+            snap.to_pickle(tmp)
+            os.replace(tmp, path / f"{date}.pkl")
+
+    def summary(self) -> dict:
+        return {
+            "universe": self.universe,
+            "tickers": len(self.codes),
+            "days": len(self.dates),
+            "from": self.dates[0],
+            "to": self.dates[-1],
+            "limit_up": int(self.limit_up.sum()),
+            "limit_down": int(self.limit_down.sum()),
+            "halted_days": int(self.halted.sum()),
+        }
+
+
+def write_tabs(tabs: dict[str, tuple[list[str], list[list]]], out_dir: Path):
+    """탭 내용 → out_dir/{탭}.csv (헤더 포함)"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for tab, (headers, rows) in tabs.items():
+        with open(out_dir / f"{tab}.csv", "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            writer.writerows(rows)
@@ -0,0 +1,107 @@
+"""checkpoints — 단계별 저장 / 재개 / 무효화, 기록 단계의 탭 단위 체크포인트"""
+
+import pandas as pd
+import pytest
+
+from analyzer import write_checkpointed
+from checkpoints import RunCheckpoint, prune_runs
+from sinks import MultiSink, RowSink, SqliteSink
+
+STAGES = ["snapshot", "crosses", "screens", "write", "reasons"]
+
+
+def test_resume_from_first_incomplete_stage(tmp_path):
+    ckpt = RunCheckpoint("20260105", STAGES, root=tmp_path)
+    assert ckpt.first_incomplete() == "snapshot" and not ckpt.complete()
+    snapshot = pd.DataFrame({"종가": [70000, 1200]}, index=["005930", "000660"])
+    ckpt.save("snapshot", snapshot)
+    ckpt.save("crosses", {"crosses": [{"종목코드": "005930"}], "partial": []})
+
+    # 다음 실행 (새 프로세스): 완료 단계 결과를 그대로 읽고 screens부터
+    again = RunCheckpoint("20260105", STAGES, root=tmp_path)
+    assert again.completed == ["snapshot", "crosses"]
+    assert again.first_incomplete() == "screens"
+    pd.testing.assert_frame_equal(again.load("snapshot"), snapshot)
+    assert again.load("crosses")["crosses"] == [{"종목코드": "005930"}]
+    assert again.load("screens", {"default": True}) == {"default": True}
+
+
+def test_partial_progress_is_kept_for_current_stage_only(tmp_path):
+    ckpt = RunCheckpoint("20260105", STAGES, root=tmp_path)
+    for stage in ("snapshot", "crosses", "screens"):
+        ckpt.save(stage, {"stage": stage})
+    ckpt.save("write", {"tabs": ["상한가"]}, complete=False)
+    # 앞 단계가 다시 계산되는 경우를 흉내: 뒤 단계 결과가 남아 있으면 안 됨
+    ckpt.save("reasons", {"stale": True}, complete=False)
+
+    again = RunCheckpoint("20260105", STAGES, root=tmp_path)
+    assert again.first_incomplete() == "write"
+    assert again.load("write") == {"tabs": ["상한가"]}   # 진행 중 결과는 이어서 사용
+    assert again.load("reasons") is None                 # 이후 단계는 무효화
+
+
+def test_from_stage_resets_later_stages(tmp_path):
+    ckpt = RunCheckpoint("20260105", STAGES, root=tmp_path)
+    for stage in STAGES:
+        ckpt.save(stage, {"stage": stage})
+    assert ckpt.complete()
+
+    again = RunCheckpoint("20260105", STAGES, root=tmp_path, from_stage="screens")
+    assert again.completed == ["snapshot", "crosses"]
+    assert again.load("screens") is None and again.load("write") is None
+    assert again.load("crosses") == {"stage": "crosses"}
+    with pytest.raises(ValueError):
+        RunCheckpoint("20260105", STAGES, root=tmp_path, from_stage="없는단계")
+
+
+def test_corrupt_manifest_starts_over(tmp_path):
+    ckpt = RunCheckpoint("20260105", STAGES, root=tmp_path)
+    ckpt.save("snapshot", {"ok": True})
+    (tmp_path / "20260105" / "manifest.json").write_text("{", encoding="utf-8")
+    assert RunCheckpoint("20260105", STAGES, root=tmp_path).first_incomplete() == "snapshot"
+
+
+def test_prune_runs_keeps_latest(tmp_path):
+    for day in ("20260102", "20260105", "20260106", "20260107"):
+        RunCheckpoint(day, STAGES, root=tmp_path)
+    (tmp_path / "profiles").mkdir()
+    prune_runs(tmp_path, keep=2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["20260106", "20260107", "profiles"]
+
+
+class _Sheets(RowSink):
+    def __init__(self, fail: bool):
+        self.fail = fail
+        self.tabs = []
+
+    def write(self, tab, headers, rows):
+        if self.fail:
+            raise RuntimeError("429 Quota exceeded")
+        self.tabs.append(tab)
+
+
+def test_tab_is_checkpointed_only_when_every_sink_succeeds(tmp_path):
+    headers, rows = ["날짜", "종목코드", "종목명"], [["2026-01-05", "005930", "삼성전자"]]
+    sheets, sqlite = _Sheets(fail=True), SqliteSink(str(tmp_path / "screens.db"))
+    sink = MultiSink([sheets, sqlite])
+    ckpt = RunCheckpoint("20260105", STAGES, root=tmp_path)
+    for stage in ("snapshot", "crosses", "screens"):
+        ckpt.save(stage, {})
+
+    # Sheets 실패, SQLite만 성공 → 기록 완료로 남기지 않음
+    written = []
+    assert not write_checkpointed(sink, ckpt, written, "상한가", headers, rows)
+    assert written == [] and len(sqlite.query(tab="상한가")) == 1
+
+    # 재실행: 같은 탭을 다시 기록
+    sheets.fail = False
+    again = RunCheckpoint("20260105", STAGES, root=tmp_path)
+    assert again.first_incomplete() == "write"
+    written = again.load("write", {"tabs": []})["tabs"]
+    assert write_checkpointed(sink, again, written, "상한가", headers, rows)
+    assert sheets.tabs == ["상한가"]
+    assert RunCheckpoint("20260105", STAGES, root=tmp_path).load("write") == {"tabs": ["상한가"]}
+    # 기록된 탭은 건너뜀
+    assert write_checkpointed(sink, again, written, "상한가", headers, rows)
+    assert sheets.tabs == ["상한가"]
+    sqlite.close()
@@ -0,0 +1,144 @@
+"""econ_calendar — 증분 기록 / 같은 날 같은 제목 이벤트 / 이전 키 저장소 변환 (LocalCalendarSource + fake_sheets)"""
+
+import json
+import os
+import sqlite3
+
+import pytest
+
+from econ_calendar import CALENDAR_TABS, CalendarStore, LocalCalendarSource, ingest, write_tab
+from fake_sheets import FakeSpreadsheet
+from sinks import MultiSink, SheetsSink, SqliteSink
+
+FEED = [
+    {"title": "CPI m/m", "country": "USD", "date": "2026-01-13T08:30:00-05:00",
+     "impact": "High", "forecast": "0.3%", "previous": "0.2%"},
+    {"title": "GDP q/q", "country": "JPY", "date": "2026-01-14T23:50:00-05:00",
+     "impact": "Medium", "forecast": "", "previous": "0.1%"},
+    {"title": "Bank Holiday", "country": "USD", "date": "2026-01-19T00:00:00-05:00",
+     "impact": "Holiday"},
+]
+
+
+class _FailingSheets(SheetsSink):
+    def write(self, tab, headers, rows):
+        raise RuntimeError("429 Quota exceeded")
+
+
+@pytest.fixture
+def env(tmp_path):
+    feed = tmp_path / "calendar.json"
+    feed.write_text(json.dumps(FEED), encoding="utf-8")
+    spreadsheet = FakeSpreadsheet()
+    store = CalendarStore(str(tmp_path / "calendar.db"))
+    sqlite = SqliteSink(str(tmp_path / "screens.db"))
+    yield feed, spreadsheet, store, sqlite
+    store.close()
+    sqlite.close()
+
+
+def _write_all(store, sink) -> int:
+    return sum(write_tab(store, sink, tab, countries) for tab, countries in CALENDAR_TABS.items())
+
+
+def test_unchanged_feed_writes_nothing(env):
+    feed, spreadsheet, store, sqlite = env
+    sink = MultiSink([SheetsSink(spreadsheet), sqlite])
+    source = LocalCalendarSource(str(feed))
+
+    assert ingest(store, source) == 2
+    assert _write_all(store, sink) == 3   # 경제일정 2개 + US_경제일정 1개
+    assert spreadsheet.worksheet("US_경제일정").get_values("B2") == [["[USD] CPI m/m"]]
+
+    # 같은 파일 (304) → 기록 없음
+    before = dict(spreadsheet.calls)
+    assert ingest(store, source) == 0
+    assert _write_all(store, sink) == 0
+    # 파일만 다시 저장 (내용 동일) → 내려받지만 바뀐 이벤트 없음
+    os.utime(feed, (feed.stat().st_atime, feed.stat().st_mtime + 10))
+    assert ingest(store, source) == 0
+    assert _write_all(store, sink) == 0
+    assert dict(spreadsheet.calls) == before
+
+
+def test_changed_event_patches_changed_cells(env):
+    feed, spreadsheet, store, sqlite = env
+    sink = MultiSink([SheetsSink(spreadsheet), sqlite])
+    source = LocalCalendarSource(str(feed))
+    ingest(store, source)
+    _write_all(store, sink)
+
+    changed = [dict(FEED[0], forecast="0.4%")] + FEED[1:]
+    feed.write_text(json.dumps(changed), encoding="utf-8")
+    os.utime(feed, (feed.stat().st_atime, feed.stat().st_mtime + 10))
+    assert ingest(store, source) == 1
+    before = spreadsheet.calls["insert_rows"]
+    assert _write_all(store, sink) == 2
+    assert spreadsheet.calls["insert_rows"] == before
+    ws = spreadsheet.worksheet("경제일정")
+    assert ["2026-01-13", "[USD] CPI m/m", "상", "예상: 0.4%, 이전: 0.2%"] in [r[:4] for r in ws.get_values("A1:E10")]
+
+
+def test_failed_sheets_write_is_retried(env):
+    feed, spreadsheet, store, sqlite = env
+    ingest(store, LocalCalendarSource(str(feed)))
+
+    # Sheets 실패, SQLite만 성공 → 기록 표시 안 함
+    assert _write_all(store, MultiSink([_FailingSheets(spreadsheet), sqlite])) == 0
+    # 다음 실행에서 Sheets에 기록
+    assert _write_all(store, MultiSink([SheetsSink(spreadsheet), sqlite])) == 3
+    assert len(spreadsheet.worksheet("경제일정").get_values("A2:E10")) == 2
+    assert len(sqlite.query(tab="경제일정")) == 2
+
+
+def test_same_title_same_day_are_separate_events(env):
+    feed, spreadsheet, store, sqlite = env
+    speeches = [
+        {"title": "FOMC Member Speaks", "country": "USD", "date": f"2026-01-15T{hour}:00:00-05:00",
+         "impact": "Medium", "forecast": "", "previous": ""}
+        for hour in ("09", "13")
+    ]
+    feed.write_text(json.dumps(speeches), encoding="utf-8")
+    sink = MultiSink([SheetsSink(spreadsheet), sqlite])
+    source = LocalCalendarSource(str(feed))
+
+    assert ingest(store, source) == 2
+    assert write_tab(store, sink, "US_경제일정", {"USD"}) == 2
+    ws = spreadsheet.worksheet("US_경제일정")
+    assert [r[1:] for r in ws.get_values("A2:F10") if r[1] == "[USD] FOMC Member Speaks"] == [
+        ["[USD] FOMC Member Speaks", "중", "-", "https://www.forexfactory.com/calendar", "18:00"],
+        ["[USD] FOMC Member Speaks", "중", "-", "https://www.forexfactory.com/calendar", "14:00"],
+    ]
+    assert len(sqlite.query(tab="US_경제일정")) == 2
+
+    # 오후 연설만 바뀜 → 그 행의 칸만 덮어씀
+    speeches[1]["impact"] = "High"
+    feed.write_text(json.dumps(speeches), encoding="utf-8")
+    os.utime(feed, (feed.stat().st_atime, feed.stat().st_mtime + 10))
+    assert ingest(store, source) == 1
+    assert write_tab(store, sink, "US_경제일정", {"USD"}) == 1
+    assert [(r[2], r[5]) for r in ws.get_values("A2:F3")] == [("상", "18:00"), ("중", "14:00")]
+
+
+def test_legacy_store_keeps_written_marks(env, tmp_path):
+    feed, spreadsheet, store, sqlite = env
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE calendar_events (date TEXT, event TEXT, country TEXT, data TEXT, hash TEXT,
+                                      updated REAL, PRIMARY KEY (date, event));
+        CREATE TABLE calendar_written (tab TEXT, date TEXT, event TEXT, hash TEXT, data TEXT,
+                                       PRIMARY KEY (tab, date, event));
+        CREATE TABLE calendar_sources (source TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, checked REAL);
+        INSERT INTO calendar_written VALUES ('US_경제일정', '2026-01-13', '[USD] CPI m/m', 'old', '{}');
+        INSERT INTO calendar_sources VALUES ('local', '', 'Tue, 13 Jan 2026 00:00:00 GMT', 0);
+    """)
+    conn.commit()
+    conn.close()
+
+    legacy = CalendarStore(path)
+    assert ingest(legacy, LocalCalendarSource(str(feed))) == 2
+    # 이전 키로 기록된 CPI는 다시 삽입하지 않음
+    assert write_tab(legacy, MultiSink([SheetsSink(spreadsheet), sqlite]), "US_경제일정", {"USD"}) == 0
+    assert write_tab(legacy, MultiSink([SheetsSink(spreadsheet), sqlite]), "경제일정", None) == 2
+    legacy.close()
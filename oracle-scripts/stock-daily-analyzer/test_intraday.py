@@ -0,0 +1,69 @@
+"""intraday — 상태 분류 / 폴링 간 상태 변화만 이벤트로"""
+
+import pandas as pd
+import pytest
+
+import analyzer
+import intraday
+from intraday import FLAT, LIMIT_DOWN, LIMIT_UP, SURGE_DOWN, SURGE_UP, IntradayScreen, classify
+
+
+@pytest.fixture(autouse=True)
+def names(monkeypatch):
+    monkeypatch.setattr(analyzer, "get_ticker_name", lambda code: f"종목{code}")
+
+
+def _poll(pcts: dict[str, float], volume: dict[str, int] = None) -> pd.DataFrame:
+    volume = volume or {}
+    return pd.DataFrame({
+        "종가": [10000] * len(pcts),
+        "등락률": list(pcts.values()),
+        "거래량": [volume.get(code, 1000) for code in pcts],
+    }, index=list(pcts))
+
+
+def test_classify_thresholds():
+    pct = pd.Series([analyzer.LIMIT_UP_PCT, analyzer.SURGE_PCT, 0.0, None,
+                     -analyzer.SURGE_PCT, analyzer.LIMIT_DOWN_PCT])
+    assert classify(pct).tolist() == [LIMIT_UP, SURGE_UP, FLAT, FLAT, SURGE_DOWN, LIMIT_DOWN]
+
+
+def test_only_transitions_are_emitted():
+    screen = IntradayScreen()
+    up, surge = analyzer.LIMIT_UP_PCT, analyzer.SURGE_PCT
+
+    first = screen.diff("KOSPI", _poll({"A": up, "B": surge, "C": 1.0}))
+    assert {(e["종목코드"], e["이벤트"]) for e in first} == {("A", "상한가 진입"), ("B", "급등 진입")}
+    assert first[0]["종목명"] == "종목A" and first[0]["시장"] == "KOSPI"
+
+    # 같은 상태면 이벤트 없음
+    assert screen.diff("KOSPI", _poll({"A": up, "B": surge + 1, "C": 2.0})) == []
+
+    events = screen.diff("KOSPI", _poll({"A": surge, "B": 1.0, "C": up, "D": -surge}))
+    assert {(e["종목코드"], e["이벤트"]) for e in events} == {
+        ("A", "상한가 이탈"), ("B", "급등 이탈"), ("C", "상한가 진입"), ("D", "급락 진입"),
+    }
+
+
+def test_halted_ticker_keeps_state():
+    screen = IntradayScreen()
+    up = analyzer.LIMIT_UP_PCT
+    screen.diff("KOSDAQ", _poll({"A": up}))
+    # 거래정지(거래량 0)로 등락률이 0으로 보여도 이탈 이벤트 없음
+    assert screen.diff("KOSDAQ", _poll({"A": 0.0}, volume={"A": 0})) == []
+    assert [e["이벤트"] for e in screen.diff("KOSDAQ", _poll({"A": 1.0}))] == ["상한가 이탈"]
+
+
+def test_markets_are_tracked_separately():
+    screen = IntradayScreen()
+    up = analyzer.LIMIT_UP_PCT
+    screen.diff("KOSPI", _poll({"A": up}))
+    assert [e["시장"] for e in screen.diff("KOSDAQ", _poll({"A": up}))] == ["KOSDAQ"]
+    assert screen.diff("KOSPI", _poll({})) == []
+
+
+def test_transition_labels():
+    assert intraday.transition_label(FLAT, FLAT) is None
+    assert intraday.transition_label(SURGE_UP, LIMIT_UP) == "상한가 진입"
+    assert intraday.transition_label(LIMIT_DOWN, SURGE_DOWN) == "하한가 이탈"
+    assert intraday.transition_label(SURGE_DOWN, FLAT) == "급락 이탈"
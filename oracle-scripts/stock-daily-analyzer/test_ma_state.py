@@ -0,0 +1,106 @@
+"""ma_state.MAState — pandas rolling 기준값과 비교 (거래정지 / 상장 / 상폐 포함)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ma_state import MAState
+
+SHORT, LONG = 5, 20
+
+
+def _closes(days: int = 80, tickers: int = 6, seed: int = 1) -> pd.DataFrame:
+    """날짜 × 종목 종가 (거래정지일은 NaN)"""
+    rng = np.random.default_rng(seed)
+    prices = 1000 * np.exp(np.cumsum(rng.normal(0, 0.03, (days, tickers)), axis=0))
+    prices = np.round(prices)
+    prices[rng.random((days, tickers)) < 0.05] = np.nan
+    dates = [int(d.strftime("%Y%m%d")) for d in pd.bdate_range("2025-01-02", periods=days)]
+    return pd.DataFrame(prices, index=dates, columns=[f"{i:06d}" for i in range(tickers)])
+
+
+def _reference(series: pd.Series) -> pd.DataFrame:
+    """거래정지일을 뺀 실제 거래일 종가로 계산한 MA와 크로스 (기준값)"""
+    traded = series.dropna()
+    ref = pd.DataFrame({
+        "ma_s": traded.rolling(SHORT).mean(),
+        "ma_l": traded.rolling(LONG).mean(),
+    })
+    prev_s, prev_l = ref["ma_s"].shift(), ref["ma_l"].shift()
+    ref["cross"] = None
+    ref.loc[(prev_s <= prev_l) & (ref["ma_s"] > ref["ma_l"]), "cross"] = "골든크로스"
+    ref.loc[(prev_s >= prev_l) & (ref["ma_s"] < ref["ma_l"]), "cross"] = "데드크로스"
+    return ref
+
+
+def test_update_matches_pandas_rolling():
+    closes = _closes()
+    seed_days = 25
+    state = MAState(SHORT, LONG)
+    state.sync_universe(list(closes.columns))
+    for code in closes.columns:
+        history = closes[code].iloc[:seed_days].dropna().tolist()
+        state.seed(code, history, int(closes.index[seed_days - 1]))
+
+    refs = {code: _reference(closes[code]) for code in closes.columns}
+    for date, row in closes.iloc[seed_days:].iterrows():
+        today = {code: float(v) for code, v in row.items() if not np.isnan(v)}
+        found = {(r["종목코드"], r["유형"]) for r in state.update(date, today)}
+
+        expected = set()
+        for code in today:
+            ref = refs[code].loc[date]
+            i = state._index[code]
+            assert state.ma_s[i] == pytest.approx(ref["ma_s"], nan_ok=True)
+            assert state.ma_l[i] == pytest.approx(ref["ma_l"], nan_ok=True)
+            assert state.last_close(code) == today[code]
+            if ref["cross"]:
+                expected.add((code, ref["cross"]))
+        assert found == expected
+        # 거래정지 종목은 갱신되지 않음
+        for code in set(closes.columns) - set(today):
+            assert state.last_update(code) < date
+
+
+def test_rerun_same_date_does_not_double_count():
+    closes = _closes(days=30, tickers=3)
+    state = MAState(SHORT, LONG)
+    for code in closes.columns:
+        state.seed(code, closes[code].iloc[:-1].dropna().tolist(), int(closes.index[-2]))
+    last = closes.iloc[-1].dropna().to_dict()
+    first = state.update(int(closes.index[-1]), last)
+    sums = state.sum_l.copy()
+    again = state.update(int(closes.index[-1]), last)
+    np.testing.assert_array_equal(state.sum_l, sums)
+    assert again == first
+
+
+def test_sync_universe_listing_and_delisting():
+    state = MAState(SHORT, LONG)
+    assert state.sync_universe(["A", "B"]) == ["A", "B"]
+    state.seed("A", list(range(1, 26)), 20250101)
+    state.seed("B", list(range(1, 26)), 20250101)
+
+    assert state.sync_universe(["B", "C"]) == ["C"]
+    assert "A" not in state and len(state) == 2
+    assert state.pending() == ["C"]
+    # 남은 종목의 상태는 행이 옮겨져도 그대로
+    assert state.last_close("B") == 25.0
+    assert state.ma_l[state._index["B"]] == pytest.approx(np.mean(range(6, 26)))
+
+
+def test_save_load_roundtrip(tmp_path):
+    closes = _closes(days=30, tickers=4)
+    state = MAState(SHORT, LONG)
+    for code in closes.columns:
+        state.seed(code, closes[code].dropna().tolist(), int(closes.index[-1]))
+    state.as_of = int(closes.index[-1])
+    path = tmp_path / "ma_KOSPI.npz"
+    state.save(path)
+
+    loaded = MAState.load(path, SHORT, LONG)
+    assert loaded.as_of == state.as_of
+    assert loaded.codes.tolist() == state.codes.tolist()
+    np.testing.assert_array_equal(loaded.ma_l, state.ma_l)
+    # MA 설정이 바뀌면 빈 상태로 재구성
+    assert len(MAState.load(path, 10, 60)) == 0
@@ -0,0 +1,48 @@
+"""panel — 구간 처리(compute_chunked) = 전체 패널 계산(compute_indicators) (synthetic 사용)"""
+
+import numpy as np
+import pytest
+
+from panel import Panel, array_blocks, compute_chunked, compute_indicators, verify_chunked
+from synthetic import SyntheticMarket
+
+PAIRS = [(5, 20), (20, 60)]
+
+
+@pytest.fixture(scope="module")
+def market():
+    # 거래정지가 구간 경계에 걸치도록 정지 확률을 높임
+    return SyntheticMarket("KR", tickers=80, days=160, seed=3, halt_rate=0.02)
+
+
+def _panel(market) -> Panel:
+    close = np.where(market.halted, np.nan, market.closes)
+    return Panel.from_arrays([int(d) for d in market.dates], market.codes, close,
+                             market.volume.astype(np.float32))
+
+
+def _blocks(market, days: int):
+    close = np.where(market.halted, np.nan, market.closes)
+    return array_blocks([int(d) for d in market.dates], market.codes, close, market.volume, days)
+
+
+@pytest.mark.parametrize("days", [1, 37, 500])
+def test_chunked_events_match_full_panel(market, days):
+    panel = _panel(market)
+    try:
+        expected = compute_indicators(panel, PAIRS, workers=1)
+    finally:
+        panel.close()
+    expected = expected.sort_values(["date", "code", "pair", "유형"], kind="stable").reset_index(drop=True)
+    events = compute_chunked(_blocks(market, days), PAIRS, limit_mb=0)
+    assert len(events) > 0
+    assert events.astype(str).equals(expected.astype(str))
+
+
+def test_chunked_indicators_match_full_panel(market):
+    panel = _panel(market)
+    try:
+        _, same = verify_chunked(panel, _blocks(market, 37), PAIRS)
+    finally:
+        panel.close()
+    assert same
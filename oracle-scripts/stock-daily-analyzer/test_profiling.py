@@ -0,0 +1,33 @@
+"""profiling — 스택 샘플이 스레드 풀 작업까지 단계별로 잡는지"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from profiling import StageProfiler
+
+
+def fetch_headlines(n: int) -> int:
+    end = time.monotonic() + 0.2
+    while time.monotonic() < end:
+        sum(range(1000))
+    return n
+
+
+def test_sampler_sees_worker_threads(tmp_path):
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="reason") as pool:
+        pool.submit(int).result()   # 풀 스레드를 미리 띄워 둠 (대기 상태)
+        prof = StageProfiler(True, tmp_path)
+        with prof.stage("screens"):
+            time.sleep(0.1)
+        with prof.stage("reasons"):
+            list(pool.map(fetch_headlines, range(2)))
+        prof.close()
+
+    stacks = [line.rsplit(" ", 1)[0].split(";") for line in open(tmp_path / "profile.folded", encoding="utf-8")]
+    workers = [s for s in stacks if s[1].startswith("[reason_")]
+    assert workers and all(s[0] == "reasons" for s in workers)
+    assert any("fetch_headlines" in frame for s in workers for frame in s)
+    # 작업을 기다리는 풀 스레드는 샘플에서 제외
+    assert not [s for s in stacks if s[0] == "screens" and s[1].startswith("[")]
+    assert {s["stage"] for s in prof.stats} == {"screens", "reasons"}
+    assert (tmp_path / "reasons.prof").exists()
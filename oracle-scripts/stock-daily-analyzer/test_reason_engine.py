@@ -0,0 +1,115 @@
+"""reason_engine — 모델 단계 라우팅 / 승격 / 예산 초과 시 템플릿 사유 (Claude는 가짜 클라이언트)"""
+
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import reason_engine
+from reason_engine import LocalHeadlineSource, ReasonEngine, RunBudget, route, template_reason
+
+HEADLINES = {
+    "000001": ["삼성전자, 2분기 잠정실적 영업이익 10조"],          # 공시성 → fast
+    "000002": [],                                                  # 뉴스 없음 → fast
+    "000003": ["반도체 업황 기대감", "외국인 순매수 확대"],          # 여러 개 → large
+}
+
+
+def _item(code: str, pct: float = 15.0) -> dict:
+    return {"종목코드": code, "종목명": f"종목{code}", "등락률(%)": pct}
+
+
+class _Client:
+    """messages.create 호출을 기록하고 프롬프트의 항목 수만큼 사유를 돌려줌 (fail: 실패시킬 모델)"""
+
+    def __init__(self, fail: set = frozenset()):
+        self.fail = fail
+        self.calls = []
+        self._lock = threading.Lock()
+        self.messages = SimpleNamespace(create=self.create)
+
+    def create(self, model, max_tokens, messages, **options):
+        prompt = messages[0]["content"]
+        codes = [code for code in HEADLINES if code in prompt]
+        with self._lock:
+            self.calls.append((model, codes))
+        if model in self.fail:
+            raise RuntimeError("overloaded")
+        text = json.dumps([f"{model}:{code}" for code in codes], ensure_ascii=False)
+        return SimpleNamespace(content=[SimpleNamespace(text=text)],
+                               usage=SimpleNamespace(input_tokens=100, output_tokens=20))
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    path = tmp_path / "headlines.json"
+    path.write_text(json.dumps(HEADLINES, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    monkeypatch.setattr(reason_engine, "_cache", {})
+    monkeypatch.setattr(reason_engine, "_inflight", {})
+    monkeypatch.setattr(reason_engine, "REASON_FAST_MODEL", "fast-model")
+    monkeypatch.setattr(reason_engine, "REASON_MODEL", "large-model")
+    return ReasonEngine("KR", LocalHeadlineSource(str(path)))
+
+
+def _use(monkeypatch, client: _Client) -> _Client:
+    monkeypatch.setattr(reason_engine, "get_anthropic_client", lambda: client)
+    return client
+
+
+def test_route():
+    assert route(_item("1"), []) == "fast"
+    assert route(_item("1"), ["단일 헤드라인"]) == "fast"
+    assert route(_item("1"), ["유상증자 결정 공시", "기타"]) == "fast"
+    assert route(_item("1"), ["업황 기대", "수급 개선"]) == "large"
+    assert route({**_item("1"), "members": ["1", "2"]}, []) == "large"
+
+
+def test_items_go_to_their_tier(engine, monkeypatch):
+    client = _use(monkeypatch, _Client())
+    items = [_item(code) for code in HEADLINES]
+    result = engine.analyze(items, timeout=30)
+
+    assert result == {
+        "000001": "fast-model:000001",
+        "000002": "fast-model:000002",
+        "000003": "large-model:000003",
+    }
+    assert sorted(client.calls) == [("fast-model", ["000001", "000002"]), ("large-model", ["000003"])]
+
+
+def test_fast_failure_escalates_to_large(engine, monkeypatch):
+    client = _use(monkeypatch, _Client(fail={"fast-model"}))
+    result = engine.analyze([_item(code) for code in HEADLINES], timeout=30)
+    assert result == {code: f"large-model:{code}" for code in HEADLINES}
+    assert [codes for model, codes in client.calls if model == "large-model"] in (
+        [["000003"], ["000001", "000002"]], [["000001", "000002"], ["000003"]],
+    )
+
+
+def test_over_budget_items_get_template(engine, monkeypatch):
+    client = _use(monkeypatch, _Client())
+    # 토큰 예산이 배치 하나 추정치보다 작음 → Claude를 부르지 않고 템플릿
+    monkeypatch.setattr(reason_engine, "RunBudget", lambda seconds: RunBudget(seconds, tokens=10))
+    items = [_item(code) for code in HEADLINES]
+    result = engine.analyze(items, timeout=30)
+    assert client.calls == []
+    assert result == {code: template_reason(item, HEADLINES[code]) for code, item in
+                      zip(HEADLINES, items)}
+    # 작업 큐용 (fallback=False): 템플릿 없이 빠짐 → 다음 시도에서 재분석
+    assert engine.analyze(items, timeout=30, fallback=False) == {}
+
+
+def test_no_api_key_uses_template(engine, monkeypatch):
+    monkeypatch.delenv("ANTHROPIC_API_KEY")
+    client = _use(monkeypatch, _Client())
+    result = engine.analyze([_item("000002", pct=-12.5)], timeout=30)
+    assert client.calls == []
+    assert result == {"000002": "급락 -12.5% (관련 뉴스 없음)"}
+
+
+def test_template_reason():
+    assert template_reason(_item("1", 29.9), ["  긴   헤드라인 " + "가" * 40]) == "긴 헤드라인 " + "가" * 22 + "…"
+    sector = {"종목코드": "반도체", "업종": "반도체", "members": ["1", "2", "3"], "등락률(%)": 12.0}
+    assert template_reason(sector, []) == "반도체 업종 동반 급등 (3종목 평균 +12.0%)"
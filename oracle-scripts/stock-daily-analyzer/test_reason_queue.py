@@ -0,0 +1,107 @@
+"""reason_queue — claim / retry / lease 만료 / drain"""
+
+import pytest
+
+import reason_queue
+from reason_queue import ReasonQueue, drain
+
+
+def _item(code: str) -> dict:
+    return {"종목코드": code, "종목명": f"종목{code}", "등락률(%)": 30.0}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = ReasonQueue(str(tmp_path / "reason_queue.db"))
+    yield q
+    q.close()
+
+
+def test_enqueue_is_idempotent(queue):
+    jobs = [(_item("000001"), ["상한가"]), (_item("000002"), ["상한가", "연속"]), (_item("000003"), [])]
+    assert queue.enqueue("2026-01-02", jobs) == 2   # 탭이 없는 항목은 넣지 않음
+    assert queue.enqueue("2026-01-02", jobs) == 0
+    assert queue.pending() == 2
+
+
+def test_claim_latest_date_and_marks_running(queue):
+    queue.enqueue("2026-01-02", [(_item("000001"), ["상한가"])])
+    queue.enqueue("2026-01-05", [(_item("000002"), ["상한가"]), (_item("000003"), ["급등락"])])
+
+    jobs = queue.claim()
+    assert [job.date for job in jobs] == ["2026-01-05", "2026-01-05"]
+    assert [job.tabs for job in jobs] == [["상한가"], ["급등락"]]
+    # 처리 중인 작업은 다시 나가지 않음 → 다음 claim은 이전 날짜
+    assert [job.item["종목코드"] for job in queue.claim()] == ["000001"]
+    assert queue.claim() == []
+
+
+def test_expired_lease_is_reclaimed(queue, monkeypatch):
+    queue.enqueue("2026-01-02", [(_item("000001"), ["상한가"])])
+    assert len(queue.claim()) == 1
+    assert queue.claim() == []
+    # 워커가 죽어 lease가 지나면 다른 워커가 가져감
+    monkeypatch.setattr(reason_queue, "REASON_LEASE", 0)
+    assert [job.item["종목코드"] for job in queue.claim()] == ["000001"]
+
+
+def test_retry_waits_for_backoff(queue):
+    queue.enqueue("2026-01-02", [(_item("000001"), ["상한가"])])
+    job, = queue.claim()
+    queue.retry([job], "timeout")
+    assert queue.claim() == []
+    assert queue.stats() == {"pending": 1}
+
+
+def test_retry_gives_up_after_max_attempts(queue, monkeypatch):
+    monkeypatch.setattr(reason_queue, "REASON_RETRY_BASE", 0)
+    queue.enqueue("2026-01-02", [(_item("000001"), ["상한가"])])
+    for attempt in range(1, reason_queue.REASON_MAX_ATTEMPTS + 1):
+        job, = queue.claim()
+        assert job.attempts == attempt - 1
+        queue.retry([job], "timeout")
+    assert queue.stats() == {"failed": 1}
+    assert queue.claim() == []
+    assert queue.failures()[0][2:] == (reason_queue.REASON_MAX_ATTEMPTS, "timeout")
+
+
+class _Sink:
+    def __init__(self, fail: int = 0):
+        self.fail = fail
+        self.patched = []
+
+    def patch(self, tab, column, values, overwrite=False):
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("429")
+        self.patched.append((tab, column, dict(values)))
+        return len(values)
+
+
+def test_drain_keeps_reason_when_write_fails(queue, monkeypatch):
+    monkeypatch.setattr(reason_queue, "REASON_RETRY_BASE", 0)
+    queue.enqueue("2026-01-02", [(_item("000001"), ["상한가", "연속"]), (_item("000002"), ["상한가"])])
+    calls = []
+
+    def analyze(items):
+        calls.append([item["종목코드"] for item in items])
+        return {item["종목코드"]: f"사유 {item['종목코드']}" for item in items}
+
+    sink = _Sink(fail=1)
+    stats = drain(queue, analyze, sink)
+    # 첫 기록 실패 → 사유를 보관한 채 재시도, Claude는 한 번만 호출
+    assert calls == [["000001", "000002"]]
+    assert stats["done"] == 2 and stats["retry"] == 2
+    assert queue.pending() == 0
+    assert ("상한가", "사유", {("2026-01-02", "000001"): "사유 000001",
+                             ("2026-01-02", "000002"): "사유 000002"}) in sink.patched
+    assert queue.reasons("2026-01-02") == {"000001": "사유 000001", "000002": "사유 000002"}
+
+
+def test_drain_template_fallback_on_last_attempt(queue, monkeypatch):
+    monkeypatch.setattr(reason_queue, "REASON_RETRY_BASE", 0)
+    queue.enqueue("2026-01-02", [(_item("000001"), ["상한가"])])
+    sink = _Sink()
+    stats = drain(queue, lambda items: {}, sink, fallback=lambda item: "템플릿")
+    assert stats["template"] == 1 and stats["done"] == 1
+    assert sink.patched == [("상한가", "사유", {("2026-01-02", "000001"): "템플릿"})]
@@ -0,0 +1,106 @@
+"""sheet_queue — 쓰기 지연 큐의 배치 순서 / 재시도 / 실패 행 보존"""
+
+import json
+
+import pytest
+from gspread.exceptions import APIError
+
+import sheet_queue
+from sheet_queue import QueuedSheetsSink
+
+HEADERS = ["날짜", "종목코드"]
+
+
+class _Response:
+    def __init__(self, status: int):
+        self.status_code = status
+        self.text = "error"
+
+    def json(self):
+        return {"error": {"code": self.status_code, "message": "error", "status": "ERROR"}}
+
+
+class _Sheets:
+    """SheetsSink 대역: insert 한 번 = write 한 번, 앞쪽 호출은 errors 순서대로 실패"""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.writes = []
+        self.closed = False
+
+    def write(self, tab, headers, rows):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.writes.append((tab, [list(r) for r in rows]))
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def no_wait(monkeypatch, tmp_path):
+    monkeypatch.setattr(sheet_queue.time, "sleep", lambda s: None)
+    monkeypatch.setattr(sheet_queue, "FAILED_WRITES_FILE", tmp_path / "failed_writes.jsonl")
+
+
+def _queue(sheets, **kwargs) -> QueuedSheetsSink:
+    # 백그라운드 스레드가 close 전에 깨지 않도록 flush_interval을 길게
+    return QueuedSheetsSink(sheets, writes_per_minute=6000, flush_interval=60, **kwargs)
+
+
+def test_batches_per_tab_in_insert_order():
+    sheets = _Sheets()
+    queue = _queue(sheets)
+    queue.write("상한가", HEADERS, [["2026-01-05", "A"]])
+    queue.write("크로스", HEADERS, [["2026-01-05", "X"]])
+    queue.write("상한가", HEADERS, [["2026-01-06", "B"], ["2026-01-06", "C"]])
+    queue.write("상한가", HEADERS, [])
+    queue.close()
+
+    # 가장 먼저 대기한 탭부터, 탭마다 insert 한 번 — 최신 날짜가 위 (날짜별로 2행에 삽입한 것과 같음)
+    assert sheets.writes == [
+        ("상한가", [["2026-01-06", "B"], ["2026-01-06", "C"], ["2026-01-05", "A"]]),
+        ("크로스", [["2026-01-05", "X"]]),
+    ]
+    assert queue.writes == 2 and queue.rows_written == 4
+    assert sheets.closed
+
+
+def test_max_batch_rows_splits_oldest_first():
+    sheets = _Sheets()
+    queue = _queue(sheets, max_batch_rows=2)
+    for day in ("01", "02", "03"):
+        queue.write("급등락", HEADERS, [[f"2026-01-{day}", "A"]])
+    queue.close()
+    # 오래된 배치부터 기록, 나중 insert가 위로 오므로 시트에는 03, 02, 01 순
+    assert [rows for _, rows in sheets.writes] == [
+        [["2026-01-02", "A"], ["2026-01-01", "A"]],
+        [["2026-01-03", "A"]],
+    ]
+
+
+def test_retryable_error_is_retried():
+    sheets = _Sheets(errors=[APIError(_Response(429)), APIError(_Response(503))])
+    queue = _queue(sheets)
+    queue.write("상한가", HEADERS, [["2026-01-05", "A"]])
+    queue.close()
+    assert sheets.writes == [("상한가", [["2026-01-05", "A"]])]
+    assert not sheet_queue.FAILED_WRITES_FILE.exists()
+
+
+@pytest.mark.parametrize("errors", [
+    [APIError(_Response(400))],                                  # 재시도 대상 아님
+    [APIError(_Response(429))] * sheet_queue.MAX_RETRIES,        # 재시도 소진
+])
+def test_failed_rows_are_spilled(errors):
+    sheets = _Sheets(errors=errors)
+    queue = _queue(sheets)
+    queue.write("상한가", HEADERS, [["2026-01-05", "A"]])
+    queue.write("상한가", HEADERS, [["2026-01-06", "B"]])
+    queue.close()
+
+    assert sheets.writes == []
+    spilled = [json.loads(line) for line in open(sheet_queue.FAILED_WRITES_FILE, encoding="utf-8")]
+    assert spilled == [{"tab": "상한가", "headers": HEADERS,
+                        "rows": [["2026-01-06", "B"], ["2026-01-05", "A"]]}]
+    assert queue.writes == 0
@@ -0,0 +1,144 @@
+"""sinks — SqliteSink 키 / MultiSink 부분 실패 / diff_ranges / SheetsSink replace 모드 / ensure_headers (fake_sheets 사용)"""
+
+import pytest
+
+from fake_sheets import FakeSpreadsheet
+from sinks import MultiSink, RowSink, SheetMirror, SheetsSink, SqliteSink, diff_ranges, ensure_headers
+from streaks import STREAK_HEADERS
+
+HEADERS = ["날짜", "Ticker", "등락률(%)"]
+
+
+def _rows(ws) -> list[list[str]]:
+    """시트 내용 (끝쪽 빈 칸/빈 행 제외)"""
+    rows = [list(r) for r in ws.get_all_values()]
+    for row in rows:
+        while row and row[-1] == "":
+            row.pop()
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+def _apply(old: list[list], new: list[list]) -> list[list[str]]:
+    """old가 들어 있는 가짜 탭에 diff_ranges 결과를 적용한 뒤 시트 내용"""
+    ws = FakeSpreadsheet().add_worksheet("탭", rows=100, cols=10)
+    if old:
+        ws.update(values=old, range_name="A1")
+    ws.batch_update(diff_ranges(old, new))
+    return _rows(ws)
+
+
+class _Failing(RowSink):
+    def write(self, tab, headers, rows):
+        raise RuntimeError("429 Quota exceeded")
+
+
+def test_sqlite_rerun_overwrites(tmp_path):
+    sink = SqliteSink(str(tmp_path / "screens.db"))
+    sink.write("US_급등락", HEADERS, [["2026-01-02", "AAPL", "1.0"], ["2026-01-02", "MSFT", "2.0"]])
+    sink.write("US_급등락", HEADERS, [["2026-01-02", "AAPL", "1.5"], ["2026-01-05", "AAPL", "3.0"]])
+    rows = sink.query(tab="US_급등락", code="AAPL")
+    assert [(r["날짜"], r["등락률(%)"]) for r in rows] == [("2026-01-05", "3.0"), ("2026-01-02", "1.5")]
+    assert len(sink.query(date_from="2026-01-02", date_to="2026-01-02")) == 2
+    sink.close()
+
+
+def test_multisink_failure_does_not_block_others(tmp_path):
+    sqlite = SqliteSink(str(tmp_path / "screens.db"))
+    MultiSink([_Failing(), sqlite]).write("US_급등락", HEADERS, [["2026-01-02", "AAPL", "1.0"]])
+    assert len(sqlite.query(tab="US_급등락")) == 1
+    # 모든 sink가 실패하면 예외
+    with pytest.raises(RuntimeError):
+        MultiSink([_Failing(), _Failing()]).write("US_급등락", HEADERS, [["2026-01-02", "AAPL", "1.0"]])
+    sqlite.close()
+
+
+class _FailingSheets(SheetsSink):
+    def write(self, tab, headers, rows):
+        raise RuntimeError("429 Quota exceeded")
+
+
+def test_multisink_reports_failed_sheets(tmp_path):
+    sheets = _FailingSheets(FakeSpreadsheet())
+    sqlite = SqliteSink(str(tmp_path / "screens.db"))
+    sink = MultiSink([sheets, sqlite])
+    # Sheets만 실패 → 예외 없이 실패한 sink를 돌려줌 (호출 측이 완료 표시 / 종료 코드 결정)
+    assert sink.write("US_급등락", HEADERS, [["2026-01-02", "AAPL", "1.0"]]) == [sheets]
+    assert len(sqlite.query(tab="US_급등락")) == 1
+    sqlite.close()
+
+
+@pytest.mark.parametrize("old, new", [
+    ([HEADERS, ["2026-01-02", "AAPL", "1.0"]], [HEADERS, ["2026-01-02", "AAPL", "1.0"]]),
+    ([HEADERS, ["d", "A", "1"], ["d", "B", "2"]], [HEADERS, ["d", "A", "1"], ["d", "B", "3"]]),
+    ([HEADERS, ["d", "A", "1"]], [HEADERS, ["d", "A", "1"], ["d", "B", "2"], ["d", "C", "3"]]),
+    ([HEADERS, ["d", "A", "1"], ["d", "B", "2"], ["d", "C", "3"]], [HEADERS, ["d", "A", "1"]]),
+    ([HEADERS, ["d", "A", "1", "메모"]], [HEADERS, ["d", "A", "1"]]),
+    ([], [HEADERS, ["d", "A", "1"]]),
+])
+def test_diff_ranges_reproduces_new(old, new):
+    assert _apply(old, new) == new
+
+
+def test_diff_ranges_minimal():
+    old = [HEADERS] + [["d", c, "1"] for c in "ABCDE"]
+    new = [HEADERS] + [["d", c, "2" if c in "BCE" else "1"] for c in "ABCDE"]
+    assert [u["range"] for u in diff_ranges(old, new)] == ["A3:C4", "A6:C6"]
+    assert diff_ranges(old, old) == []
+    # get_all_values가 채워 돌려주는 끝쪽 빈 칸은 변경이 아님
+    assert diff_ranges([HEADERS + [""]], [HEADERS]) == []
+
+
+def test_diff_ranges_blanks_removed_rows():
+    old = [HEADERS, ["d", "A", "1"], ["d", "B", "2"]]
+    updates = diff_ranges(old, [HEADERS])
+    assert updates == [{"range": "A2:C3", "values": [["", "", ""], ["", "", ""]]}]
+
+
+def test_replace_writes_only_changes(tmp_path):
+    spreadsheet = FakeSpreadsheet()
+    sink = SheetsSink(spreadsheet, mode="replace", mirror=SheetMirror(tmp_path / "mirror.json"))
+    rows = [["2026-01-02", t, "1.0"] for t in ("AAPL", "MSFT", "NVDA")]
+    sink.write("US_급등락", HEADERS, rows)
+    assert spreadsheet.calls["batch_update"] == 1
+
+    # 같은 내용이면 Sheets 호출 없음 (미러와 비교)
+    before = dict(spreadsheet.calls)
+    sink.write("US_급등락", HEADERS, rows)
+    assert dict(spreadsheet.calls) == before
+
+    rows[1][2] = "2.5"
+    sink.write("US_급등락", HEADERS, rows)
+    ws = spreadsheet.worksheet("US_급등락")
+    assert _rows(ws) == [HEADERS] + rows
+
+    # 미러가 새로 만들어져도 (다른 프로세스) 시트를 읽어 같은 결과
+    other = SheetsSink(spreadsheet, mode="replace", mirror=SheetMirror(tmp_path / "other.json"))
+    other.write("US_급등락", HEADERS, rows[:1])
+    assert _rows(ws) == [HEADERS] + rows[:1]
+
+
+def test_ensure_headers_widens_grid():
+    ws = FakeSpreadsheet().add_worksheet("상한가", rows=10, cols=3)
+    ws.update(values=[HEADERS], range_name="A1")
+    assert ensure_headers(ws, HEADERS + ["사유", "업종"])
+    assert ws.row_values(1) == HEADERS + ["사유", "업종"]
+    assert ws.col_count >= 5
+    # 이미 같거나 앞부분이 다르면 건드리지 않음
+    assert not ensure_headers(ws, HEADERS + ["사유", "업종"])
+    assert not ensure_headers(ws, ["다른", "헤더"])
+
+
+def test_sqlite_streak_rows_keep_both_types(tmp_path):
+    sink = SqliteSink(str(tmp_path / "screens.db"))
+    day = ["2026-01-02", "005930", "삼성전자", "KOSPI"]
+    sink.write("연속", STREAK_HEADERS, [
+        day + ["상한가", "2", "2025-12-31", "69.0", "70000"],
+        day + ["급등", "3", "2025-12-30", "80.0", "70000"],
+    ])
+    # 재실행해도 중복 없이 덮어씀
+    sink.write("연속", STREAK_HEADERS, [day + ["급등", "4", "2025-12-29", "90.0", "70000"]])
+    rows = sink.query(tab="연속", code="005930")
+    assert sorted((r["유형"], r["연속일"]) for r in rows) == [("급등", "4"), ("상한가", "2")]
+    sink.close()
@@ -0,0 +1,65 @@
+"""watchlist — 역색인 매칭 / digest 발송 (MemoryNotifier)"""
+
+import json
+import os
+
+from watchlist import MemoryNotifier, WatchlistIndex, load_index, notify
+
+CONFIG = {
+    "kim": {"tickers": ["005930", "000660"], "notify": {"memory": True}},
+    "lee": {"tickers": ["aapl", "005930"], "tabs": ["US_급등락"], "notify": {"memory": True}},
+}
+
+HITS = [
+    ("상한가", {"종목코드": "005930", "종목명": "삼성전자", "등락률(%)": 29.95, "종가": "70000"}),
+    ("급등락", {"종목코드": "005930", "종목명": "삼성전자", "등락률(%)": 29.95}),
+    ("상한가", {"종목코드": "005930", "종목명": "삼성전자", "등락률(%)": 29.95}),
+    ("크로스", {"종목코드": "000660", "종목명": "SK하이닉스", "유형": "골든크로스"}),
+    ("US_급등락", {"종목코드": "AAPL", "종목명": "Apple", "등락률(%)": -12.3456}),
+    ("급등락", {"종목코드": "035720", "종목명": "카카오", "등락률(%)": 15.0}),
+]
+
+
+def test_digest_per_subscriber():
+    index = WatchlistIndex.from_config(CONFIG)
+    sent, failed = notify(index, "2026-01-02", HITS)
+    assert sorted(sent) == ["kim", "lee"] and failed == []
+
+    kim, = index.subscribers["kim"].notifier.sent
+    # 같은 탭 / 종목은 한 번만, hit 순서 유지
+    assert [(a["탭"], a["종목코드"]) for a in kim["alerts"]] == [
+        ("상한가", "005930"), ("급등락", "005930"), ("크로스", "000660"),
+    ]
+    assert kim["text"].splitlines()[0] == "[관심종목] 2026-01-02 kim — 3건"
+
+    lee, = index.subscribers["lee"].notifier.sent
+    # tabs 설정 → US_급등락만, 종목코드는 대문자로 맞춤
+    assert lee["alerts"] == [{"탭": "US_급등락", "종목코드": "AAPL", "종목명": "Apple", "등락률(%)": -12.35}]
+
+
+def test_skip_and_failure():
+    index = WatchlistIndex.from_config(CONFIG)
+
+    class Broken(MemoryNotifier):
+        def send(self, *args):
+            raise ConnectionError("webhook down")
+
+    index.subscribers["lee"].notifier = Broken()
+    done = []
+    sent, failed = notify(index, "2026-01-02", HITS, skip=["kim"], on_sent=done.append)
+    assert sent == [] and failed == ["lee"] and done == []
+    assert index.subscribers["kim"].notifier.sent == []
+
+
+def test_load_index_reuses_until_config_changes(tmp_path):
+    path = tmp_path / "watchlist.json"
+    path.write_text(json.dumps(CONFIG), encoding="utf-8")
+    first = load_index(str(path))
+    assert load_index(str(path)) is first
+
+    path.write_text(json.dumps({"park": {"tickers": ["NVDA"], "notify": {"memory": True}}}), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    second = load_index(str(path))
+    assert second is not first and list(second.subscribers) == ["park"]
+    assert len(load_index(str(tmp_path / "missing.json"))) == 0
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+관심종목 알림 (watchlist)
+- 트레이더별 관심종목 목록을 읽어 종목코드 → 구독자 역색인을 만들고,
+  그날의 스크린 / 크로스 결과(hit)만 훑어 매칭 → O(hit 수), 관심종목 수와 무관
+- 구독자마다 그날 걸린 종목을 한 번에 묶어(digest) 알림 1건으로 보냄
+- 알림 채널은 구독자별 설정: webhook(Slack/Discord 호환 JSON) / file(JSONL) / memory(테스트용)
+- 역색인은 설정 파일이 바뀔 때만 다시 만듦 (daemon에서 매 실행마다 다시 읽지 않음)
+
+설정 (WATCHLIST_PATH: JSON 파일 하나, 또는 *.json 파일이 든 디렉터리):
+  {
+    "kim": {"tickers": ["005930", "000660"], "notify": {"webhook": "https://hooks.slack.com/..."}},
+    "lee": {"tickers": ["AAPL", "NVDA"], "tabs": ["US_급등락", "US_크로스"],
+            "notify": {"file": "alerts/lee.jsonl"}}
+  }
+  - tabs: 알림 받을 탭 (없으면 전체)
+  - notify: 없으면 WATCHLIST_OUTBOX 파일에 기록
+
+CLI:
+  python3 watchlist.py show
+  python3 watchlist.py match 005930 AAPL --tab 급등락
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import requests
+
+log = logging.getLogger(__name__)
+
+WATCHLIST_PATH = os.getenv("WATCHLIST_PATH", str(Path(__file__).parent / "watchlists.json"))
+WATCHLIST_OUTBOX = os.getenv("WATCHLIST_OUTBOX", str(Path(__file__).parent / "alerts.jsonl"))
+WATCHLIST_WEBHOOK_TIMEOUT = float(os.getenv("WATCHLIST_WEBHOOK_TIMEOUT", "10"))
+# digest 본문에 싣는 최대 줄 수 (나머지는 "외 N건", alerts 필드에는 전부 포함)
+WATCHLIST_DIGEST_LINES = int(os.getenv("WATCHLIST_DIGEST_LINES", "30"))
+
+
+# ---------------------------------------------------------------------------
+# 알림 채널
+# ---------------------------------------------------------------------------
+class Notifier:
+    """send(subscriber, date, alerts, text) — 실패 시 예외 (해당 구독자만 재시도 대상)"""
+
+    def send(self, subscriber: str, date: str, alerts: list[dict], text: str):
+        raise NotImplementedError
+
+
+class WebhookNotifier(Notifier):
+    """JSON POST. text(Slack) / content(Discord) 둘 다 채움"""
+
+    def __init__(self, url: str, timeout: float = WATCHLIST_WEBHOOK_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, subscriber: str, date: str, alerts: list[dict], text: str):
+        response = requests.post(self.url, json={
+            "text": text, "content": text,
+            "subscriber": subscriber, "date": date, "alerts": alerts,
+        }, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class FileNotifier(Notifier):
+    """digest 한 건 = JSONL 한 줄 (append)"""
+
+    def __init__(self, path: str = WATCHLIST_OUTBOX):
+        self.path = Path(path)
+
+    def send(self, subscriber: str, date: str, alerts: list[dict], text: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps({
+            "subscriber": subscriber, "date": date, "alerts": alerts, "text": text,
+            "sent_at": datetime.now().isoformat(timespec="seconds"),
+        }, ensure_ascii=False)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class MemoryNotifier(Notifier):
+    """보낸 digest를 메모리에만 쌓음 (스모크 테스트 / --dry-run)"""
+
+    def __init__(self):
+        self.sent: list[dict] = []
+
+    def send(self, subscriber: str, date: str, alerts: list[dict], text: str):
+        self.sent.append({"subscriber": subscriber, "date": date, "alerts": alerts, "text": text})
+
+
+def build_notifier(spec: Optional[dict]) -> Notifier:
+    spec = spec or {}
+    if "webhook" in spec:
+        return WebhookNotifier(spec["webhook"])
+    if spec.get("memory"):
+        return MemoryNotifier()
+    path = spec.get("file", WATCHLIST_OUTBOX)
+    if not Path(path).is_absolute():
+        path = str(Path(__file__).parent / path)
+    return FileNotifier(path)
+
+
+# ---------------------------------------------------------------------------
+# 역색인
+# ---------------------------------------------------------------------------
+class Subscriber:
+    def __init__(self, name: str, tickers: list[str], tabs: Optional[list[str]], notifier: Notifier):
+        self.name = name
+        self.tickers = tickers
+        self.tabs = set(tabs) if tabs else None
+        self.notifier = notifier
+
+    def wants(self, tab: str) -> bool:
+        return self.tabs is None or tab in self.tabs
+
+
+class WatchlistIndex:
+    """종목코드 → 구독자 목록"""
+
+    def __init__(self, subscribers: list[Subscriber]):
+        self.subscribers = {s.name: s for s in subscribers}
+        self.by_code: dict[str, list[Subscriber]] = {}
+        for s in subscribers:
+            for code in dict.fromkeys(s.tickers):
+                self.by_code.setdefault(code, []).append(s)
+
+    @classmethod
+    def from_config(cls, config: dict) -> "WatchlistIndex":
+        subscribers = []
+        for name, entry in config.items():
+            tickers = [str(t).strip().upper() for t in entry.get("tickers", []) if str(t).strip()]
+            subscribers.append(Subscriber(name, tickers, entry.get("tabs"), build_notifier(entry.get("notify"))))
+        return cls(subscribers)
+
+    def __len__(self) -> int:
+        return len(self.subscribers)
+
+    def match(self, hits: Iterable[tuple[str, dict]]) -> dict[str, list[dict]]:
+        """
+        hits: (탭, 항목) — 항목은 to_records / 크로스 결과 dict (종목코드, 종목명, 등락률(%) 또는 유형)
+        Returns: {구독자: [알림]} (hit 순서 유지, 같은 탭 / 종목은 한 번만)
+        """
+        matches: dict[str, list[dict]] = {}
+        seen = set()
+        for tab, item in hits:
+            code = str(item.get("종목코드", "")).upper()
+            for s in self.by_code.get(code, ()):
+                if not s.wants(tab) or (s.name, tab, code) in seen:
+                    continue
+                seen.add((s.name, tab, code))
+                matches.setdefault(s.name, []).append(alert_of(tab, item))
+        return matches
+
+
+def alert_of(tab: str, item: dict) -> dict:
+    alert = {"탭": tab, "종목코드": item["종목코드"], "종목명": item.get("종목명", item["종목코드"])}
+    if "등락률(%)" in item:
+        alert["등락률(%)"] = round(float(item["등락률(%)"]), 2)
+    if "유형" in item:
+        alert["유형"] = item["유형"]
+    if "종가" in item:
+        alert["종가"] = item["종가"] if isinstance(item["종가"], str) else float(item["종가"])
+    return alert
+
+
+def _signature(path: Path) -> tuple:
+    """설정 변경 감지용 (파일 / 디렉터리 안 *.json의 mtime)"""
+    if path.is_dir():
+        return tuple((p.name, p.stat().st_mtime_ns) for p in sorted(path.glob("*.json")))
+    if path.exists():
+        return ((path.name, path.stat().st_mtime_ns),)
+    return ()
+
+
+def _read_config(path: Path) -> dict:
+    files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+    config = {}
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            config.update(json.load(f))
+    return config
+
+
+_cache: dict[str, tuple[tuple, WatchlistIndex]] = {}
+
+
+def load_index(path: str = WATCHLIST_PATH) -> WatchlistIndex:
+    """설정이 그대로면 이전에 만든 역색인 재사용 (설정 없으면 빈 색인)"""
+    signature = _signature(Path(path))
+    cached = _cache.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    index = WatchlistIndex.from_config(_read_config(Path(path)) if signature else {})
+    _cache[path] = (signature, index)
+    if signature:
+        log.info(f"관심종목: 구독자 {len(index)}명, 종목 {len(index.by_code)}개")
+    return index
+
+
+# ---------------------------------------------------------------------------
+# 알림 발송
+# ---------------------------------------------------------------------------
+def format_digest(subscriber: str, date: str, alerts: list[dict]) -> str:
+    lines = [f"[관심종목] {date} {subscriber} — {len(alerts)}건"]
+    for alert in alerts[:WATCHLIST_DIGEST_LINES]:
+        if "유형" in alert:
+            detail = alert["유형"]
+        elif "등락률(%)" in alert:
+            detail = f"{alert['등락률(%)']:+.2f}%"
+        else:
+            detail = ""
+        lines.append(f"• {alert['탭']} {alert['종목명']}({alert['종목코드']}) {detail}".rstrip())
+    if len(alerts) > WATCHLIST_DIGEST_LINES:
+        lines.append(f"… 외 {len(alerts) - WATCHLIST_DIGEST_LINES}건")
+    return "\n".join(lines)
+
+
+def screen_hits(screens: list, records: dict[str, list[dict]]) -> list[tuple[str, dict]]:
+    """스크린 결과 → (탭, 항목)"""
+    return [(screen.tab, item) for screen in screens for item in records.get(screen.name, [])]
+
+
+def notify(index: WatchlistIndex, date: str, hits: Iterable[tuple[str, dict]],
+           skip: Iterable[str] = (), on_sent: Optional[Callable[[str], None]] = None) -> tuple[list[str], list[str]]:
+    """
+    매칭된 구독자마다 digest 1건 발송
+    skip: 이미 보낸 구독자 (재실행 시 중복 발송 방지), on_sent: 발송 성공 직후 호출
+    Returns: (보낸 구독자, 실패한 구독자)
+    """
+    if not len(index):
+        return [], []
+    skip = set(skip)
+    sent, failed = [], []
+    for name, alerts in index.match(hits).items():
+        if name in skip:
+            continue
+        try:
+            index.subscribers[name].notifier.send(name, date, alerts, format_digest(name, date, alerts))
+        except Exception as e:
+            log.error(f"관심종목 알림 실패 ({name}): {e}")
+            failed.append(name)
+            continue
+        sent.append(name)
+        if on_sent:
+            on_sent(name)
+    if sent or failed:
+        log.info(f"관심종목 알림: {len(sent)}명 발송" + (f", {len(failed)}명 실패" if failed else ""))
+    return sent, failed
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="관심종목 알림")
+    parser.add_argument("--path", default=WATCHLIST_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("show", help="구독자별 종목 수 / 알림 채널")
+    m = sub.add_parser("match", help="종목코드로 매칭 결과와 digest 미리보기 (발송 안 함)")
+    m.add_argument("codes", nargs="+")
+    m.add_argument("--tab", default="급등락")
+    args = parser.parse_args()
+
+    if not _signature(Path(args.path)):
+        print(f"관심종목 설정 없음: {args.path}", file=sys.stderr)
+        sys.exit(1)
+    index = load_index(args.path)
+
+    if args.command == "show":
+        for s in index.subscribers.values():
+            tabs = ",".join(sorted(s.tabs)) if s.tabs else "전체"
+            print(f"{s.name}: {len(s.tickers)}종목, 탭 {tabs}, {type(s.notifier).__name__}")
+        return
+
+    date = datetime.now().strftime("%Y-%m-%d")
+    hits = [(args.tab, {"종목코드": code, "종목명": code}) for code in args.codes]
+    for name, alerts in index.match(hits).items():
+        print(format_digest(name, date, alerts))
+
+
+if __name__ == "__main__":
+    main()
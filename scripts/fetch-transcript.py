@@ -1,33 +1,261 @@
 #!/usr/bin/env python3
-"""Fetch YouTube transcript and output as JSON."""
+"""Fetch YouTube transcript and output as JSON.
+
+One-shot:
+    fetch-transcript.py VIDEO_ID
+    -> {"transcript": "...", "snippets": N}  or  {"error": "..."} (exit 1)
+
+Worker (long-lived, JSON lines):
+    fetch-transcript.py --worker [--concurrency 4]
+        stdin:  {"id": "req-1", "video_id": "VIDEO_ID"}
+        stdout: {"id": "req-1", "transcript": "...", "snippets": N, "language": "ko"}
+    fetch-transcript.py --socket /tmp/transcript.sock
+        same protocol over a Unix socket, one JSON line per request/response.
+
+Chunked output (one-shot --chunks, or "chunks": true in a worker request):
+    {"chunk": 0, "start": 0.0, "end": 312.4, "tokens": 1490, "text": "..."}
+    ...
+    {"done": true, "chunks": K, "snippets": N, "language": "ko", "cached": false}
+Chunks keep snippet timings and stay under --max-tokens (estimated), so a
+summarizer can start on the first chunk of a long transcript.
+
+Fetched transcripts are kept in a compressed on-disk cache keyed by
+(video_id, language); see transcript_cache.py. Disable with --no-cache.
+
+The worker keeps one HTTP session and the imported API across requests and
+lists the available transcripts once per video to pick the language,
+instead of retrying fetches blindly.
+"""
 import sys
 import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from transcript_cache import TranscriptCache, iter_chunks
+
+PREFERRED_LANGUAGES = ['ko', 'en']
+# Cache alias for the language picked when no preferred language exists
+DEFAULT_LANGUAGE_KEY = '_default'
+DEFAULT_MAX_TOKENS = 1500
+
+_api = None
+_api_lock = threading.Lock()
+_cache = None
 
-def main():
-    if len(sys.argv) < 2:
-        print(json.dumps({"error": "Video ID required"}))
-        sys.exit(1)
 
-    video_id = sys.argv[1]
+def get_api():
+    """Create the transcript API once, backed by a pooled requests session."""
+    global _api
+    with _api_lock:
+        if _api is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from youtube_transcript_api import YouTubeTranscriptApi
 
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _api = YouTubeTranscriptApi(http_client=session)
+        return _api
+
+
+def pick_transcript(transcript_list):
+    """Prefer ko, then en (manual before generated), else the first available."""
     try:
-        from youtube_transcript_api import YouTubeTranscriptApi
-        ytt_api = YouTubeTranscriptApi()
+        return transcript_list.find_transcript(PREFERRED_LANGUAGES)
+    except Exception:
+        for transcript in transcript_list:
+            return transcript
+    raise LookupError('No transcripts available')
+
 
-        # Try multiple language preferences
+def enable_cache():
+    global _cache
+    try:
+        _cache = TranscriptCache()
+    except OSError:
+        _cache = None
+
+
+def load_transcript(video_id):
+    """Return ({"language", "snippets": [[start, duration, text], ...]}, cached)."""
+    if _cache is not None:
+        payload = _cache.get(video_id, PREFERRED_LANGUAGES + [DEFAULT_LANGUAGE_KEY])
+        if payload is not None:
+            return payload, True
+
+    api = get_api()
+    transcript = pick_transcript(api.list(video_id))
+    fetched = transcript.fetch()
+    payload = {
+        "video_id": video_id,
+        "language": transcript.language_code,
+        "snippets": [[round(s.start, 3), round(s.duration, 3), s.text] for s in fetched.snippets],
+    }
+    if _cache is not None:
+        _cache.put(video_id, payload["language"], payload)
+        if payload["language"] not in PREFERRED_LANGUAGES:
+            _cache.put(video_id, DEFAULT_LANGUAGE_KEY, payload)
+    return payload, False
+
+
+def fetch_transcript(video_id):
+    payload, cached = load_transcript(video_id)
+    snippets = payload["snippets"]
+    return {
+        "transcript": ' '.join([s[2] for s in snippets]),
+        "snippets": len(snippets),
+        "language": payload["language"],
+        "cached": cached,
+    }
+
+
+def stream_chunks(video_id, max_tokens):
+    """Yield chunk dicts followed by a final summary dict."""
+    payload, cached = load_transcript(video_id)
+    count = 0
+    for chunk in iter_chunks(payload["snippets"], max_tokens):
+        count += 1
+        yield chunk
+    yield {
+        "done": True,
+        "chunks": count,
+        "snippets": len(payload["snippets"]),
+        "language": payload["language"],
+        "cached": cached,
+    }
+
+
+def handle_request(line, emit):
+    """Process one JSON-lines request, passing each response dict to `emit`."""
+    try:
+        request = json.loads(line)
+    except ValueError:
+        emit({"error": "Invalid JSON"})
+        return
+    if isinstance(request, str):
+        request = {"video_id": request}
+
+    base = {}
+    if "id" in request:
+        base["id"] = request["id"]
+    video_id = request.get("video_id")
+    if not video_id:
+        emit({**base, "error": "Video ID required"})
+        return
+    base["video_id"] = video_id
+    try:
+        if request.get("chunks"):
+            max_tokens = int(request.get("max_tokens") or DEFAULT_MAX_TOKENS)
+            for item in stream_chunks(video_id, max_tokens):
+                emit({**base, **item})
+        else:
+            emit({**base, **fetch_transcript(video_id)})
+    except Exception as e:
+        emit({**base, "error": str(e)})
+
+
+def run_stdio_worker(concurrency):
+    out_lock = threading.Lock()
+
+    def emit(response):
+        with out_lock:
+            sys.stdout.write(json.dumps(response, ensure_ascii=False) + '\n')
+            sys.stdout.flush()
+
+    def respond(line):
+        handle_request(line, emit)
+
+    # Bounded concurrency: at most `concurrency` fetches in flight,
+    # and at most 2x that many requests buffered ahead of them.
+    slots = threading.BoundedSemaphore(concurrency * 2)
+
+    def task(line):
         try:
-            transcript = ytt_api.fetch(video_id=video_id, languages=['ko', 'en'])
-        except Exception:
-            try:
-                transcript = ytt_api.fetch(video_id=video_id, languages=['en'])
-            except Exception:
-                transcript = ytt_api.fetch(video_id=video_id)
-
-        text = ' '.join([s.text for s in transcript.snippets])
-        print(json.dumps({"transcript": text, "snippets": len(transcript.snippets)}))
+            respond(line)
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            slots.acquire()
+            pool.submit(task, line)
+
+
+def run_socket_worker(path, concurrency):
+    import os
+    import socketserver
+
+    fetch_slots = threading.BoundedSemaphore(concurrency)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            def emit(response):
+                self.wfile.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+                self.wfile.flush()
+
+            for raw in self.rfile:
+                line = raw.decode('utf-8').strip()
+                if not line:
+                    continue
+                with fetch_slots:
+                    handle_request(line, emit)
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socketserver.ThreadingUnixStreamServer(path, Handler)
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('video_id', nargs='?')
+    parser.add_argument('--worker', action='store_true', help='serve JSON lines on stdin/stdout')
+    parser.add_argument('--socket', help='serve JSON lines on a Unix socket at this path')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--chunks', action='store_true', help='stream timestamped chunks as JSON lines')
+    parser.add_argument('--max-tokens', type=int, default=DEFAULT_MAX_TOKENS, help='token budget per chunk')
+    parser.add_argument('--no-cache', action='store_true', help='bypass the on-disk transcript cache')
+    args = parser.parse_args()
+
+    if not args.no_cache:
+        enable_cache()
+
+    if args.worker:
+        run_stdio_worker(max(1, args.concurrency))
+        return
+    if args.socket:
+        run_socket_worker(args.socket, max(1, args.concurrency))
+        return
+
+    if not args.video_id:
+        print(json.dumps({"error": "Video ID required"}))
+        sys.exit(1)
+
+    try:
+        if args.chunks:
+            for item in stream_chunks(args.video_id, args.max_tokens):
+                print(json.dumps(item, ensure_ascii=False), flush=True)
+            return
+        result = fetch_transcript(args.video_id)
+        print(json.dumps({"transcript": result["transcript"], "snippets": result["snippets"]}))
     except Exception as e:
         print(json.dumps({"error": str(e)}))
         sys.exit(1)
 
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,107 @@
+"""Tests for transcript_cache: LRU eviction, shared blobs, multi-instance index merging."""
+import os
+import time
+
+import pytest
+
+import transcript_cache
+from transcript_cache import TranscriptCache, iter_chunks
+
+
+def payload(seed, size=4000):
+    # os.urandom hex does not compress much, so each entry has a predictable blob size
+    return {'video_id': seed, 'snippets': [[0.0, 1.0, os.urandom(size // 2).hex()]]}
+
+
+def blob_size(cache, video_id, language='en'):
+    return cache._index[cache.key(video_id, language)]['size']
+
+
+def test_roundtrip_and_language_order(tmp_path):
+    cache = TranscriptCache(tmp_path)
+    data = payload('a')
+    cache.put('a', 'ko', data)
+    assert cache.get('a', ['en', 'ko']) == data
+    assert cache.get('a', ['en']) is None
+    assert cache.get('missing', ['en', 'ko']) is None
+
+
+def test_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_cache, 'ATIME_FLUSH_HITS', 1)
+    cache = TranscriptCache(tmp_path)
+    cache.put('a', 'en', payload('a'))
+    size = blob_size(cache, 'a')
+    cache.max_bytes = int(size * 2.5)
+
+    cache.put('b', 'en', payload('b'))
+    time.sleep(0.01)
+    assert cache.get('a', ['en']) is not None   # 'a' is now more recent than 'b'
+    time.sleep(0.01)
+    cache.put('c', 'en', payload('c'))
+
+    assert cache.get('b', ['en']) is None
+    assert cache.get('a', ['en']) is not None
+    assert cache.get('c', ['en']) is not None
+    blobs = sorted(p.name for p in (tmp_path / 'blobs').iterdir())
+    assert blobs == sorted(entry['blob'] for entry in cache._index.values())
+    assert sum(entry['size'] for entry in cache._index.values()) <= cache.max_bytes
+
+
+def test_shared_blob_kept_while_referenced(tmp_path):
+    cache = TranscriptCache(tmp_path)
+    shared = payload('x')
+    cache.put('x', 'en', shared)
+    time.sleep(0.01)
+    cache.put('y', 'en', payload('y'))
+    time.sleep(0.01)
+    cache.put('x', 'en-US', shared)     # same bytes -> same blob, most recently used
+    blob = cache._index['x:en']['blob']
+    assert cache._index['x:en-US']['blob'] == blob
+
+    # room for two blobs: evicting 'x:en' frees nothing (blob still used), so 'y' goes too
+    cache.max_bytes = blob_size(cache, 'x') * 2 + blob_size(cache, 'y') // 2
+    time.sleep(0.01)
+    cache.put('z', 'en', payload('z'))
+    assert set(cache._index) == {'x:en-US', 'z:en'}
+    assert (tmp_path / 'blobs' / blob).exists()
+
+
+def test_instances_merge_index_entries(tmp_path):
+    first = TranscriptCache(tmp_path)
+    second = TranscriptCache(tmp_path)
+    first.put('a', 'en', payload('a'))
+    second.put('b', 'en', payload('b'))   # must not drop 'a' written by the other instance
+    assert first.get('b', ['en']) is not None
+    assert second.get('a', ['en']) is not None
+    assert set(TranscriptCache(tmp_path)._index) == {'a:en', 'b:en'}
+
+
+def test_eviction_across_instances(tmp_path):
+    first = TranscriptCache(tmp_path)
+    first.put('a', 'en', payload('a'))
+    limit = int(blob_size(first, 'a') * 1.5)
+    second = TranscriptCache(tmp_path, max_bytes=limit)
+    time.sleep(0.01)
+    second.put('b', 'en', payload('b'))
+    assert set(second._index) == {'b:en'}
+    assert first.get('a', ['en']) is None
+
+
+def test_unreadable_blob_is_a_miss(tmp_path):
+    cache = TranscriptCache(tmp_path)
+    cache.put('a', 'en', payload('a'))
+    (tmp_path / 'blobs' / cache._index['a:en']['blob']).write_bytes(b'corrupt')
+    assert cache.get('a', ['en']) is None
+    assert 'a:en' not in TranscriptCache(tmp_path)._index
+
+
+@pytest.mark.parametrize('max_tokens', [5, 50, 10_000])
+def test_iter_chunks_respects_budget(max_tokens):
+    snippets = [[i * 2.0, 2.0, f'sentence number {i} of the transcript'] for i in range(40)]
+    chunks = list(iter_chunks(snippets, max_tokens))
+    assert ' '.join(c['text'] for c in chunks) == ' '.join(s[2] for s in snippets)
+    assert [c['chunk'] for c in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        # a single snippet over budget still forms its own chunk
+        assert chunk['tokens'] <= max_tokens or chunk['text'].count('sentence number') == 1
+    assert chunks[-1]['end'] == 80.0
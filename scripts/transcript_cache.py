@@ -0,0 +1,240 @@
+"""On-disk transcript cache and token-budgeted chunking for fetch-transcript.py.
+
+Blobs are content-addressed: the compressed JSON payload is stored under the
+SHA-256 of its bytes, and a small index maps (video_id, language) to a blob.
+Blobs are zstd-compressed when the `zstandard` package is installed, gzip
+otherwise. The index tracks last access and evicts least-recently-used
+entries once the total blob size exceeds the configured limit.
+
+Several processes may share one cache (the one-shot CLI runs once per
+video). Index writes take an fcntl lock on index.lock, re-read the index
+from disk and merge this process's changes into it before replacing it
+through a per-process temp file, so no process drops another's entries.
+Read hits only record the access time in memory; those are merged in
+batches. Any OSError from the cache is treated as a miss so the caller
+falls back to fetching.
+"""
+import os
+import sys
+import json
+import gzip
+import time
+import atexit
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: thread lock only
+    fcntl = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'TRANSCRIPT_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'cowen-transcripts'),
+)
+DEFAULT_MAX_BYTES = int(float(os.environ.get('TRANSCRIPT_CACHE_MAX_MB', '200')) * 1024 * 1024)
+# Pending access-time updates are merged into index.json after this many hits
+# or this many seconds, and at exit.
+ATIME_FLUSH_HITS = 32
+ATIME_FLUSH_SECONDS = 60
+
+
+def _compress(data):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), '.zst'
+    # mtime=0: gzip otherwise stamps the current time, so equal payloads would get different blobs
+    return gzip.compress(data, compresslevel=6, mtime=0), '.gz'
+
+
+def _decompress(data, suffix):
+    if suffix == '.zst':
+        if zstandard is None:
+            raise RuntimeError('zstandard is required to read this cache entry')
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _write_atomic(path, data):
+    """Write bytes via a temp file unique to this process, then rename over `path`."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class TranscriptCache:
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.blobs = self.root / 'blobs'
+        self.index_path = self.root / 'index.json'
+        self.lock_path = self.root / 'index.lock'
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self._index = self._load_index()
+        self._index_mtime = self._mtime()
+        self._atimes = {}   # key -> atime not yet written to index.json
+        self._flushed_at = time.time()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def key(video_id, language):
+        return f'{video_id}:{language}'
+
+    def _mtime(self):
+        try:
+            return self.index_path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _update_index(self, changes=None):
+        """Merge `changes` ({key: entry or None to delete}) and pending atimes into the
+        on-disk index under the file lock, evict, and write it back. Caller holds self._lock."""
+        with self._file_lock():
+            index = self._load_index()
+            for key, entry in (changes or {}).items():
+                if entry is None:
+                    index.pop(key, None)
+                else:
+                    index[key] = entry
+            for key, atime in self._atimes.items():
+                if key in index:
+                    index[key]['atime'] = max(index[key]['atime'], atime)
+            self._evict(index)
+            _write_atomic(self.index_path, json.dumps(index).encode('utf-8'))
+            self._index = index
+            self._index_mtime = self._mtime()
+        self._atimes = {}
+        self._flushed_at = time.time()
+
+    def flush(self):
+        """Write pending access times (called automatically at exit)."""
+        with self._lock:
+            if not self._atimes:
+                return
+            try:
+                self._update_index()
+            except OSError as e:
+                print(f'transcript cache: index update failed: {e}', file=sys.stderr)
+
+    def get(self, video_id, languages):
+        """Return the cached payload for the first language in `languages`, or None."""
+        try:
+            with self._lock:
+                # Pick up entries written by other processes since we last read the index
+                if self._mtime() != self._index_mtime:
+                    self._index = self._load_index()
+                    self._index_mtime = self._mtime()
+                for language in languages:
+                    key = self.key(video_id, language)
+                    entry = self._index.get(key)
+                    if entry is None:
+                        continue
+                    path = self.blobs / entry['blob']
+                    try:
+                        payload = json.loads(_decompress(path.read_bytes(), path.suffix))
+                    except (OSError, ValueError, RuntimeError):
+                        self._update_index({key: None})
+                        continue
+                    self._atimes[key] = time.time()
+                    if (len(self._atimes) >= ATIME_FLUSH_HITS
+                            or time.time() - self._flushed_at >= ATIME_FLUSH_SECONDS):
+                        self._update_index()
+                    return payload
+        except OSError as e:
+            print(f'transcript cache: read failed, fetching instead: {e}', file=sys.stderr)
+        return None
+
+    def put(self, video_id, language, payload):
+        data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        compressed, suffix = _compress(data)
+        blob = hashlib.sha256(compressed).hexdigest() + suffix
+        try:
+            with self._lock:
+                path = self.blobs / blob
+                if not path.exists():
+                    _write_atomic(path, compressed)
+                self._update_index({self.key(video_id, language): {
+                    'blob': blob, 'size': len(compressed), 'atime': time.time(),
+                }})
+        except OSError as e:
+            print(f'transcript cache: write failed: {e}', file=sys.stderr)
+
+    def _evict(self, index):
+        sizes = {}
+        for entry in index.values():
+            sizes[entry['blob']] = entry['size']
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(index.items(), key=lambda kv: kv[1]['atime']):
+            if total <= self.max_bytes:
+                break
+            del index[key]
+            blob = entry['blob']
+            if not any(e['blob'] == blob for e in index.values()):
+                total -= sizes.get(blob, 0)
+                try:
+                    (self.blobs / blob).unlink()
+                except OSError:
+                    pass
+
+
+def estimate_tokens(text):
+    """Rough token estimate: ~4 chars/token for ASCII, ~1.5 chars/token otherwise (e.g. Korean)."""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    other = len(text) - ascii_chars
+    return int(ascii_chars / 4 + other / 1.5) + 1
+
+
+def iter_chunks(snippets, max_tokens):
+    """Group [start, duration, text] snippets into timestamped chunks under `max_tokens`."""
+    texts, tokens, start, end = [], 0, None, None
+    index = 0
+    for snippet_start, duration, text in snippets:
+        cost = estimate_tokens(text)
+        if texts and tokens + cost > max_tokens:
+            yield {'chunk': index, 'start': start, 'end': end, 'tokens': tokens, 'text': ' '.join(texts)}
+            index += 1
+            texts, tokens, start = [], 0, None
+        if start is None:
+            start = snippet_start
+        texts.append(text)
+        tokens += cost
+        end = round(snippet_start + duration, 3)
+    if texts:
+        yield {'chunk': index, 'start': start, 'end': end, 'tokens': tokens, 'text': ' '.join(texts)}